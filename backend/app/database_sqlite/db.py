@@ -1,22 +1,357 @@
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, event, inspect, literal_column, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
-from app.database_sqlite.models.all_models import Base
+from app.database_sqlite.models.all_models import Base, MissingPersonsFrame, Sighting
+from app.utilities.helper import parse_duration
+from app.utilities import config
+from collections import defaultdict
+import numpy as np
+import datetime
+import json
 import os
 
-# Ensure the database folder exists
-db_dir = 'databases/sql_db'
-os.makedirs(db_dir, exist_ok=True)
 
-# Create a SQLite engine with the database located inside the 'database' folder
-db_path = os.path.join(db_dir, 'faceDetection.db')
-engine = create_engine(f"sqlite:///{db_path}")
+def _tune_sqlite_connection(dbapi_connection, connection_record):
+    """
+    Configure every new SQLite connection for concurrent ingest writes and API reads:
+    WAL lets readers proceed while a writer is active, and the busy timeout makes
+    writers wait for the lock instead of failing with "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size=-{int(config.SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def create_db_engine(db_url: str = config.DB_URL):
+    """
+    Create the SQLAlchemy engine for `db_url`.
+
+    SQLite databases get their folder created and are tuned on connect; server databases
+    (PostgreSQL, MySQL, ...) use a pre-pinged, recycled connection pool.
+    """
+    url = make_url(db_url)
+    pool_options = {
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+    }
+
+    if url.get_backend_name() == "sqlite":
+        if not url.database or url.database == ":memory:":
+            # In-memory databases live in a single connection and cannot be pooled
+            return create_engine(url, connect_args={"check_same_thread": False})
+        os.makedirs(os.path.dirname(os.path.abspath(url.database)), exist_ok=True)
+        db_engine = create_engine(
+            url,
+            connect_args={
+                # Sessions are used from FastAPI's threadpool and background ingest threads
+                "check_same_thread": False,
+                "timeout": config.SQLITE_BUSY_TIMEOUT_MS / 1000
+            },
+            **pool_options
+        )
+        event.listen(db_engine, "connect", _tune_sqlite_connection)
+        return db_engine
+
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_recycle=config.DB_POOL_RECYCLE,
+        **pool_options
+    )
+
+
+engine = create_db_engine()
+
+
+def upgrade_schema(bind):
+    """
+    Add nullable columns and indexes that were introduced after a table was first created.
+    `create_all` only creates missing tables and never alters existing ones.
+    """
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or column.primary_key or not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def backfill_timestamp_seconds(bind):
+    """Fill `timestamp_seconds` of rows stored before it existed from their text `timestamp`."""
+    table = MissingPersonsFrame.__table__
+    with bind.begin() as conn:
+        rows = conn.execute(
+            table.select()
+            .with_only_columns(table.c.missing_person_id, table.c.frame_id, table.c.missing_frame_id,
+                               table.c.cam_id, table.c.timestamp)
+            .where(table.c.timestamp_seconds.is_(None), table.c.timestamp.is_not(None))
+        ).all()
+        updates = []
+        for row in rows:
+            try:
+                seconds = parse_duration(row.timestamp)
+            except ValueError:
+                continue
+            updates.append({
+                "b_person": row.missing_person_id, "b_frame": row.frame_id,
+                "b_match": row.missing_frame_id, "b_cam": row.cam_id, "b_seconds": seconds
+            })
+        if updates:
+            conn.execute(
+                table.update()
+                .where(table.c.missing_person_id == bindparam("b_person"),
+                       table.c.frame_id == bindparam("b_frame"),
+                       table.c.missing_frame_id == bindparam("b_match"),
+                       table.c.cam_id == bindparam("b_cam"))
+                .values(timestamp_seconds=bindparam("b_seconds")),
+                updates
+            )
+
+
+def migrate_box_columns(bind, batch_size: int = 5000):
+    """
+    Copy boxes of rows stored with the former JSON `box` column into the numeric box columns.
+    The legacy column is left in place and is no longer read or written.
+    """
+    if "box" not in {column["name"] for column in inspect(bind).get_columns(MissingPersonsFrame.__tablename__)}:
+        return
+
+    table = MissingPersonsFrame.__table__
+    legacy_box = literal_column("box")
+    statement = table.update()\
+        .where(table.c.missing_person_id == bindparam("b_person"),
+               table.c.frame_id == bindparam("b_frame"),
+               table.c.missing_frame_id == bindparam("b_match"),
+               table.c.cam_id == bindparam("b_cam"))\
+        .values(box_x1=bindparam("b_x1"), box_y1=bindparam("b_y1"),
+                box_x2=bindparam("b_x2"), box_y2=bindparam("b_y2"))
+    # Migrated rows drop out of the query; unreadable ones stay ahead of the rest in key order and are skipped
+    skipped = 0
+    with bind.begin() as conn:
+        while True:
+            rows = conn.execute(
+                table.select()
+                .with_only_columns(table.c.missing_person_id, table.c.frame_id, table.c.missing_frame_id,
+                                   table.c.cam_id, legacy_box)
+                .where(table.c.box_x1.is_(None), legacy_box.is_not(None))
+                .order_by(table.c.missing_person_id, table.c.frame_id, table.c.missing_frame_id, table.c.cam_id)
+                .offset(skipped)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                try:
+                    x1, y1, x2, y2 = json.loads(row[4])
+                except (TypeError, ValueError):
+                    skipped += 1
+                    continue
+                updates.append({
+                    "b_person": row.missing_person_id, "b_frame": row.frame_id,
+                    "b_match": row.missing_frame_id, "b_cam": row.cam_id,
+                    "b_x1": x1, "b_y1": y1, "b_x2": x2, "b_y2": y2
+                })
+            if updates:
+                conn.execute(statement, updates)
 
 # Create all tables
 Base.metadata.create_all(engine)
+upgrade_schema(engine)
+backfill_timestamp_seconds(engine)
+migrate_box_columns(engine)
 
 # Create a configured "Session" class and instance
 SessionLocal = sessionmaker(bind=engine)
 
+
+def bulk_insert_frames(db, frames: list[dict]) -> None:
+    """
+    Insert many MissingPersonsFrame rows in one executemany round trip and fold them
+    into the persons' sightings.
+
+    Args:
+        db:     SQLAlchemy session; the caller commits.
+        frames: Column-name to value mappings, one per row.
+    """
+    if frames:
+        db.bulk_insert_mappings(MissingPersonsFrame, frames)
+        record_sightings(db, frames)
+
+
+def _extend_sighting(sighting: Sighting, first_seconds: float, last_seconds: float, first_seen, last_seen,
+                     match_count: int, best_score, best_frame_id, best_missing_frame_id) -> None:
+    sighting.first_seconds = min(sighting.first_seconds, first_seconds)
+    sighting.last_seconds = max(sighting.last_seconds, last_seconds)
+    seen = [value for value in (sighting.first_seen, sighting.last_seen, first_seen, last_seen) if value is not None]
+    sighting.first_seen = min(seen) if seen else None
+    sighting.last_seen = max(seen) if seen else None
+    sighting.match_count += match_count
+    if best_score is not None and (sighting.best_score is None or best_score < sighting.best_score):
+        sighting.best_score = best_score
+        sighting.best_frame_id = best_frame_id
+        sighting.best_missing_frame_id = best_missing_frame_id
+
+
+def record_sightings(db, frames: list[dict], gap: float = config.SIGHTING_GAP_SECONDS) -> None:
+    """
+    Merge newly inserted matches into the sighting intervals of their person and camera.
+
+    Only the sightings of each (person, camera) within `gap` seconds of the new matches are
+    loaded; a new match extends the sighting it falls into or next to, starts a new one when
+    it is isolated, and joins two sightings when it closes the gap between them.
+
+    Args:
+        db:     SQLAlchemy session; the caller commits.
+        frames: MissingPersonsFrame mappings, as passed to `bulk_insert_frames`.
+        gap:    Largest distance in video seconds between matches of one sighting.
+    """
+    groups = defaultdict(list)
+    for frame in frames:
+        # Matches without a video offset cannot be placed on the timeline
+        if frame.get("timestamp_seconds") is not None:
+            groups[(frame["missing_person_id"], frame["cam_id"])].append(frame)
+
+    for (missing_person_id, cam_id), rows in groups.items():
+        rows.sort(key=lambda row: row["timestamp_seconds"])
+        lower, upper = rows[0]["timestamp_seconds"] - gap, rows[-1]["timestamp_seconds"] + gap
+        existing = db.query(Sighting).filter(
+            Sighting.missing_person_id == missing_person_id,
+            Sighting.cam_id == cam_id,
+            Sighting.last_seconds >= lower,
+            Sighting.first_seconds <= upper
+        ).all()
+
+        # Sweep existing intervals and new points in time order, merging whatever is within `gap`
+        items = [(sighting.first_seconds, sighting, None) for sighting in existing] + \
+                [(row["timestamp_seconds"], None, row) for row in rows]
+        items.sort(key=lambda item: item[0])
+        current = None
+        for start, sighting, row in items:
+            if current is not None and start - current.last_seconds <= gap:
+                if sighting is not None:
+                    _extend_sighting(current, sighting.first_seconds, sighting.last_seconds, sighting.first_seen,
+                                     sighting.last_seen, sighting.match_count, sighting.best_score,
+                                     sighting.best_frame_id, sighting.best_missing_frame_id)
+                    db.delete(sighting)
+                else:
+                    _extend_sighting(current, start, start, row.get("captured_at"), row.get("captured_at"), 1,
+                                     row.get("score"), row["frame_id"], row["missing_frame_id"])
+            elif sighting is not None:
+                current = sighting
+            else:
+                current = Sighting(
+                    missing_person_id=missing_person_id,
+                    cam_id=cam_id,
+                    first_seconds=start,
+                    last_seconds=start,
+                    first_seen=row.get("captured_at"),
+                    last_seen=row.get("captured_at"),
+                    match_count=1,
+                    best_score=row.get("score"),
+                    best_frame_id=row["frame_id"],
+                    best_missing_frame_id=row["missing_frame_id"]
+                )
+                db.add(current)
+
+
+def clear_sightings(db, missing_person_id: str) -> None:
+    """Drop the sightings of a person, e.g. before their matches are recorded again."""
+    db.query(Sighting).filter_by(missing_person_id=missing_person_id).delete(synchronize_session=False)
+
+
+def backfill_sightings(session_factory) -> None:
+    """Build the sightings of persons whose matches were stored before sightings existed."""
+    frames = MissingPersonsFrame.__table__
+    with session_factory() as db:
+        person_ids = [row[0] for row in db.query(frames.c.missing_person_id).distinct()
+                      .filter(frames.c.timestamp_seconds.is_not(None))
+                      .filter(~db.query(Sighting).filter(Sighting.missing_person_id == frames.c.missing_person_id)
+                              .exists())]
+        for missing_person_id in person_ids:
+            rows = db.execute(
+                frames.select()
+                .with_only_columns(frames.c.missing_person_id, frames.c.cam_id, frames.c.frame_id,
+                                   frames.c.missing_frame_id, frames.c.timestamp_seconds, frames.c.captured_at,
+                                   frames.c.score)
+                .where(frames.c.missing_person_id == missing_person_id)
+            ).mappings().all()
+            record_sightings(db, [dict(row) for row in rows])
+            db.commit()
+
+
+def match_frame_rows(missing_person_id: str, matches: list[dict]) -> list[dict]:
+    """
+    Build `bulk_insert_frames` mappings for the vector search matches of a missing person,
+    numbering matches per camera in the order they were found.
+    """
+    next_match_idx = {}
+    frames = []
+    for match in matches:
+        cam_id = match["cam_id"]
+        missing_frame_id = next_match_idx.get(cam_id, 0)
+        next_match_idx[cam_id] = missing_frame_id + 1
+        frames.append(dict(
+            missing_person_id=missing_person_id,
+            missing_frame_id=missing_frame_id,
+            frame_id=match["frame_id"],
+            cam_id=cam_id,
+            face_idx=match.get("face_idx"),
+            timestamp=match["timestamp"],
+            timestamp_seconds=match["timestamp_seconds"] if match.get("timestamp_seconds") is not None
+                else parse_duration(match["timestamp"]),
+            captured_at=datetime.datetime.fromtimestamp(match["captured_at"], datetime.timezone.utc)
+                .replace(tzinfo=None) if match.get("captured_at") is not None else None,
+            score=match["score"],
+            **MissingPersonsFrame.box_values(match["box"])
+        ))
+    return frames
+
+
+# Build the sightings of matches stored before sightings existed
+backfill_sightings(SessionLocal)
+
+
+# Columns read by `match_arrays`
+MATCH_ARRAY_COLUMNS = (
+    MissingPersonsFrame.box_x1,
+    MissingPersonsFrame.box_y1,
+    MissingPersonsFrame.box_x2,
+    MissingPersonsFrame.box_y2,
+    MissingPersonsFrame.score,
+    MissingPersonsFrame.timestamp_seconds
+)
+
+def match_arrays(rows) -> dict:
+    """
+    Convert a page of match rows selecting `MATCH_ARRAY_COLUMNS` into NumPy arrays.
+
+    Returns:
+        dict with "boxes" (n, 4), "scores" (n,) and "timestamp_seconds" (n,) float arrays;
+        unknown values are NaN.
+    """
+    values = np.array(
+        [tuple(getattr(row, column.key) for column in MATCH_ARRAY_COLUMNS) for row in rows],
+        dtype=np.float64
+    ).reshape(len(rows), len(MATCH_ARRAY_COLUMNS))
+    return {
+        "boxes": values[:, :4],
+        "scores": values[:, 4],
+        "timestamp_seconds": values[:, 5]
+    }
+
 # Dependency for accessing DB in routes
 def get_db():
     db = SessionLocal()
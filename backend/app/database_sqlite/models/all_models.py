@@ -1,22 +1,11 @@
-from sqlalchemy import Column, Float, Integer, String, Text, ForeignKey, DateTime, UniqueConstraint, LargeBinary
-from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy.types import TypeDecorator
+from sqlalchemy import Boolean, Column, Float, Integer, String, Text, ForeignKey, DateTime, UniqueConstraint, LargeBinary, \
+    Index
+from sqlalchemy.orm import declarative_base, relationship, deferred
 import uuid
 import datetime
-import json
 
 Base = declarative_base()
 
-# Utility for storing list[list[float]] as JSON
-class JSONList(TypeDecorator):
-    impl = Text
-
-    def process_bind_param(self, value, dialect):
-        return json.dumps(value)
-
-    def process_result_value(self, value, dialect):
-        return json.loads(value)
-
 # Table 1: Users
 class User(Base):
     __tablename__ = 'users'
@@ -30,24 +19,149 @@ class User(Base):
 # Table 2: MissingPersonsFrames
 class MissingPersonsFrame(Base):
     __tablename__ = 'missing_persons_frames'
+    __table_args__ = (
+        # Serves per-person keyset pagination ordered by camera and match index
+        Index("ix_missing_persons_frames_person_cam_match", "missing_person_id", "cam_id", "missing_frame_id"),
+        # Serve time-window filtering within a camera (video offset) and across cameras (capture time)
+        Index("ix_missing_persons_frames_person_cam_time", "missing_person_id", "cam_id", "timestamp_seconds"),
+        Index("ix_missing_persons_frames_person_captured", "missing_person_id", "captured_at"),
+    )
 
     missing_person_id = Column(String(36), ForeignKey("missing_persons.missing_person_id"), primary_key=True)
     frame_id = Column(Text, primary_key=True)
     missing_frame_id = Column(Integer, primary_key=True)
     cam_id = Column(Text, primary_key=True)
-    timestamp = Column(Text)
-    box = Column(JSONList)
+    face_idx = Column(Integer)  # index of the detection within the frame, locates stored crops
+    timestamp = Column(Text)  # human readable offset into the video, e.g. "0:00:03.000"
+    timestamp_seconds = Column(Float)  # offset into the video in seconds
+    captured_at = Column(DateTime)  # absolute capture time (UTC)
+    # Detection box (x1, y1, x2, y2) as plain numeric columns, see `box`
+    box_x1 = Column(Float)
+    box_y1 = Column(Float)
+    box_x2 = Column(Float)
+    box_y2 = Column(Float)
     score = Column(Float)
     missing_person = relationship("MissingPersons", back_populates="frames")  # no change
 
+    @property
+    def box(self):
+        """Detection box as an [x1, y1, x2, y2] list, or None if unknown."""
+        if self.box_x1 is None:
+            return None
+        return [self.box_x1, self.box_y1, self.box_x2, self.box_y2]
+
+    @staticmethod
+    def box_values(box) -> dict:
+        """Column values storing `box`, for constructors and bulk insert mappings."""
+        x1, y1, x2, y2 = box if box else (None, None, None, None)
+        return {"box_x1": x1, "box_y1": y1, "box_x2": x2, "box_y2": y2}
+
 # Table 3: MissingPersons
 class MissingPersons(Base):
     __tablename__ = 'missing_persons'
+    __table_args__ = (
+        # Serves name-ordered keyset pagination of the person listing
+        Index("ix_missing_persons_name", "first_name", "last_name", "missing_person_id"),
+    )
 
     missing_person_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     first_name = Column(Text, nullable=False)
     last_name = Column(Text, nullable=False)
     details = Column(Text)
-    photo = Column(LargeBinary)
+    photo = deferred(Column(LargeBinary))  # loaded only when accessed, listings never pull the blob
+
+    frames = relationship("MissingPersonsFrame", back_populates="missing_person")  # fixed
+
+# Table 4: Cameras
+class Camera(Base):
+    __tablename__ = 'cameras'
+
+    cam_id = Column(Text, primary_key=True)
+    source = Column(Text)  # uploaded file name or stream URL
+    started_at = Column(DateTime)  # capture time (UTC) of the first frame, anchors `captured_at`
+    fps = Column(Float)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+# Table 5: VideoHashes
+class VideoHash(Base):
+    __tablename__ = 'video_hashes'
+
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 of the uploaded file
+    cam_id = Column(Text, nullable=False)
+    filename = Column(Text)
+    size = Column(Integer)
+    status = Column(Text, nullable=False, default="processing")  # processing | done
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+# Table 6: PhotoEmbeddings
+class PhotoEmbedding(Base):
+    __tablename__ = 'photo_embeddings'
+
+    content_hash = Column(String(64), primary_key=True)  # `embedding_cache_key` of the uploaded photo
+    embedding = Column(LargeBinary, nullable=False)  # float32 face vector
+    embedding_model = Column(Text)  # model that produced the vector, NULL for LEGACY_EMBEDDING_MODEL
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+# Table 7: MissingPersonPhotos
+class MissingPersonPhoto(Base):
+    __tablename__ = 'missing_person_photos'
+
+    photo_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    missing_person_id = Column(String(36), ForeignKey("missing_persons.missing_person_id"), nullable=False, index=True)
+    photo = deferred(Column(LargeBinary))  # reference photo as JPEG
+    embedding = Column(LargeBinary, nullable=False)  # float32 face vector of the photo
+    embedding_model = Column(Text)  # model that produced the vector, NULL for LEGACY_EMBEDDING_MODEL
+    content_hash = Column(String(64))  # SHA-256 of the uploaded photo
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+# Table 8: Sightings
+# Contiguous appearances of a missing person on one camera: matches at most `SIGHTING_GAP_SECONDS`
+# apart collapsed into one interval, maintained as matches are inserted (see `record_sightings`)
+class Sighting(Base):
+    __tablename__ = 'sightings'
+    __table_args__ = (
+        # Serves the cross-camera timeline (capture time order) and per-camera interval merges
+        Index("ix_sightings_person_seen", "missing_person_id", "first_seen"),
+        Index("ix_sightings_person_cam_seconds", "missing_person_id", "cam_id", "first_seconds"),
+    )
+
+    sighting_id = Column(Integer, primary_key=True, autoincrement=True)
+    missing_person_id = Column(String(36), ForeignKey("missing_persons.missing_person_id"), nullable=False)
+    cam_id = Column(Text, nullable=False)
+    first_seconds = Column(Float, nullable=False)  # offsets into the video in seconds
+    last_seconds = Column(Float, nullable=False)
+    first_seen = Column(DateTime)  # absolute capture times (UTC), unknown for cameras without a start time
+    last_seen = Column(DateTime)
+    match_count = Column(Integer, nullable=False, default=0)
+    best_score = Column(Float)  # lowest cosine distance within the interval
+    best_frame_id = Column(Text)  # frame and match index of the best match, the representative frame
+    best_missing_frame_id = Column(Integer)
+
+# Table 9: IngestJobs
+# Shared queue of video processing jobs, claimed by ingest workers (see `app.utilities.job_queue`)
+class IngestJob(Base):
+    __tablename__ = 'ingest_jobs'
+    __table_args__ = (
+        # Serves claiming the oldest available job and finding stale running ones
+        Index("ix_ingest_jobs_status_available", "status", "available_at"),
+    )
 
-    frames = relationship("MissingPersonsFrame", back_populates="missing_person")  # fixed
\ No newline at end of file
+    job_id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    status = Column(Text, nullable=False, default="queued")  # queued | running | done | failed
+    video_path = Column(Text, nullable=False)  # file name within UPLOAD_DIR, shared by the API and all workers
+    filename = Column(Text)
+    content_hash = Column(String(64))  # VideoHash claimed by the upload, resolved when the job ends
+    cam_id = Column(Text, nullable=False)  # fixed at enqueue time so retries write to the same camera
+    frame_skip = Column(Integer, nullable=False, default=1)
+    store_crops = Column(Boolean, nullable=False, default=True)
+    recorded_at = Column(DateTime)  # capture time (UTC) of the first frame
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    worker_id = Column(Text)
+    position = Column(Integer, nullable=False, default=0)  # first frame not processed yet, retries resume here
+    faces_stored = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    available_at = Column(DateTime, default=datetime.datetime.utcnow)  # not claimed before, for retry backoff
+    heartbeat_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    finished_at = Column(DateTime)
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -16,4 +17,20 @@ class LoginUser(BaseModel):
     Schema for user login input validation.
     """
     email: EmailStr = Field(..., example="john.doe@example.com",description="Email address of the user")
-    password: str = Field(..., min_length=8, example="securePassword123",description="Password of the user")
\ No newline at end of file
+    password: str = Field(..., min_length=8, example="securePassword123",description="Password of the user")
+
+class StreamSource(BaseModel):
+    """
+    Schema for starting ingestion of a live camera source.
+    """
+    source: str = Field(..., example="rtsp://192.168.1.10:554/stream1",description="RTSP/HTTP URL, webcam index, or video file inside STREAM_FILE_DIR")
+    max_fps: Optional[float] = Field(5, gt=0, example=5,description="Maximum number of frames processed per second, None for as fast as possible")
+    store_crops: bool = Field(True, description="Store face crops and thumbnails for each detection")
+    loop: bool = Field(False, description="Restart file sources when they end (local testing)")
+
+class ProfilerSettings(BaseModel):
+    """
+    Schema for switching the ingest sampling profiler on or off.
+    """
+    enabled: bool = Field(..., example=True,description="Profile ingest jobs started from now on")
+    interval_ms: Optional[float] = Field(None, gt=0, example=5,description="Sampling interval in milliseconds")
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+from app.utilities import config
+from app.utilities.logger_config import logger
+
+
+class AlertBroker:
+    """
+    Fans match alerts out from ingest threads to subscribers on the server's event loop.
+
+    `publish` is called from ingest threads and never blocks on subscribers: it applies
+    per-person throttling and hands the event to the event loop in a single callback,
+    which copies it into each subscriber's bounded queue. A subscriber that falls behind
+    loses its oldest alerts instead of slowing down ingest or other subscribers.
+    """
+
+    def __init__(self, throttle_seconds: float = config.ALERT_THROTTLE_SECONDS,
+                 queue_size: int = config.ALERT_QUEUE_SIZE):
+        self.throttle_seconds = throttle_seconds
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._loop = None
+        self._last_sent = {}
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+        self.published = 0
+        self.throttled = 0
+        self.dropped = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Register a subscriber; must be called from the event loop."""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        logger.info(f"Alert subscriber added, {len(self._subscribers)} connected")
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+        logger.info(f"Alert subscriber removed, {len(self._subscribers)} connected")
+
+    def publish(self, event: dict, throttle_key) -> bool:
+        """
+        Send `event` to every subscriber unless an alert with the same `throttle_key`
+        was sent within `throttle_seconds`. Safe to call from any thread.
+
+        Returns:
+            True if the event was handed to the event loop.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._subscribers:
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            last_sent = self._last_sent.get(throttle_key)
+            if last_sent is not None and now - last_sent < self.throttle_seconds:
+                self.throttled += 1
+                return False
+            self._last_sent[throttle_key] = now
+            self.published += 1
+            # Forget keys outside the throttle window, at most once per window
+            if now >= self._next_prune:
+                self._last_sent = {key: sent for key, sent in self._last_sent.items()
+                                   if now - sent < self.throttle_seconds}
+                self._next_prune = now + self.throttle_seconds
+
+        loop.call_soon_threadsafe(self._fan_out, event)
+        return True
+
+    def _fan_out(self, event: dict) -> None:
+        for queue in list(self._subscribers):
+            if queue.full():
+                queue.get_nowait()
+                with self._lock:
+                    self.dropped += 1
+            queue.put_nowait(event)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "throttled": self.throttled,
+            "dropped": self.dropped
+        }
+
+
+# Shared broker used by the ingest path and the alert endpoint
+alert_broker = AlertBroker()
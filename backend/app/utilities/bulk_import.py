@@ -0,0 +1,337 @@
+import csv
+import io
+import os
+import threading
+import time
+import uuid
+import zipfile
+from PIL import Image
+from sqlalchemy.exc import SQLAlchemyError
+from app.utilities import config
+from app.utilities.logger_config import logger
+from app.utilities.dedup import embedding_cache_key, vector_to_bytes, vector_from_bytes
+from app.utilities.model_loader import model_loader
+
+# Columns of the import manifest; `photo` names the image file of each record
+MANIFEST_COLUMNS = ("first_name", "last_name", "details", "photo")
+
+
+class BatchFormatError(ValueError):
+    """Raised when an import batch cannot be read at all."""
+
+
+def _new_record(row: int, fields: dict) -> dict:
+    return {
+        "row": row,
+        "first_name": (fields.get("first_name") or "").strip(),
+        "last_name": (fields.get("last_name") or "").strip(),
+        "details": (fields.get("details") or "").strip(),
+        "photo": os.path.basename((fields.get("photo") or "").strip()),
+        "status": "pending",  # pending | registered | no_face | invalid | failed
+        "missing_person_id": None,
+        "matches": 0,
+        "error": None
+    }
+
+
+def read_manifest(manifest_text: str, photos: dict) -> list[tuple[dict, bytes]]:
+    """
+    Pair every manifest row with its photo bytes.
+
+    Args:
+        manifest_text: CSV with a header row containing `MANIFEST_COLUMNS`.
+        photos:        Photo bytes keyed by file name.
+
+    Raises:
+        BatchFormatError: If the manifest is missing columns or has too many rows.
+
+    Returns:
+        (record, photo_bytes) pairs; records that cannot be imported are already marked
+        "invalid" and come with None bytes.
+    """
+    reader = csv.DictReader(io.StringIO(manifest_text))
+    missing_columns = [column for column in ("first_name", "last_name", "photo")
+                       if column not in (reader.fieldnames or [])]
+    if missing_columns:
+        raise BatchFormatError(f"Manifest is missing columns: {', '.join(missing_columns)}")
+
+    entries = []
+    for row, fields in enumerate(reader, start=1):
+        if row > config.IMPORT_MAX_RECORDS:
+            raise BatchFormatError(f"A batch can hold at most {config.IMPORT_MAX_RECORDS} records.")
+        record = _new_record(row, fields)
+        photo_bytes = photos.get(record["photo"])
+        if not record["first_name"] or not record["last_name"]:
+            record["status"], record["error"] = "invalid", "First and last name are required."
+        elif photo_bytes is None:
+            record["status"], record["error"] = "invalid", f"Photo {record['photo']!r} not found in batch."
+        entries.append((record, photo_bytes if record["status"] == "pending" else None))
+    return entries
+
+
+def read_zip_batch(archive) -> list[tuple[dict, bytes]]:
+    """
+    Read a zip holding a `manifest.csv` (or any single CSV) and the photos it names.
+
+    Args:
+        archive: Path or binary file object of the zip.
+
+    Raises:
+        BatchFormatError: If the archive or its manifest cannot be read.
+    """
+    try:
+        with zipfile.ZipFile(archive) as zip_file:
+            members = [info for info in zip_file.infolist() if not info.is_dir()]
+            manifests = [info for info in members if info.filename.lower().endswith(".csv")]
+            manifest = next((info for info in manifests
+                             if os.path.basename(info.filename).lower() == "manifest.csv"),
+                            manifests[0] if len(manifests) == 1 else None)
+            if manifest is None:
+                raise BatchFormatError("The archive must contain a manifest.csv.")
+
+            manifest_text = zip_file.read(manifest).decode("utf-8-sig")
+            # Only the photos the manifest names are read, oversized members are skipped
+            wanted = {os.path.basename((row.get("photo") or "").strip())
+                      for row in csv.DictReader(io.StringIO(manifest_text))}
+            photos = {}
+            for info in members:
+                name = os.path.basename(info.filename)
+                if info is manifest or name not in wanted:
+                    continue
+                if info.file_size > config.IMPORT_MAX_PHOTO_BYTES:
+                    logger.warning(f"Skipping oversized photo {info.filename} ({info.file_size} bytes)")
+                    continue
+                photos[name] = zip_file.read(info)
+    except zipfile.BadZipFile as err:
+        raise BatchFormatError(f"Invalid zip archive: {err}")
+    return read_manifest(manifest_text, photos)
+
+
+class BulkImportJob:
+    """
+    Registers a batch of missing persons in the background.
+
+    The batch goes through the same steps as a single registration, but each step is
+    batched: faces are detected and embedded `IMPORT_EMBED_BATCH_SIZE` photos at a time,
+    person rows are written in one transaction, all vectors are upserted together and
+    matching queries the frame vectors `IMPORT_MATCH_BATCH_SIZE` persons at a time.
+    Progress and the outcome of every record are reported by `info`.
+    """
+
+    def __init__(self, user_id: str, entries: list[tuple[dict, bytes]]):
+        self.job_id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.records = [record for record, _ in entries]
+        self._photos = [photo_bytes for _, photo_bytes in entries]
+        self.status = "queued"  # queued | embedding | storing | matching | done | failed
+        self.error = None
+        self.embedded = 0
+        self.matched = 0
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self._worker = threading.Thread(target=self._run, name=f"import-{self.job_id}", daemon=True)
+
+    def start(self) -> None:
+        self._worker.start()
+
+    def _set_status(self, status: str) -> None:
+        self.status = status
+        self.updated_at = time.time()
+        logger.info(f"Import {self.job_id}: {status}")
+
+    def _run(self) -> None:
+        # Imported lazily: storage is only needed once a job actually runs
+        from app.utilities.vector_storage import store_missing_batch, delete_missing_batch, search_matches_batch
+        from app.database_sqlite.db import SessionLocal, bulk_insert_frames, match_frame_rows
+        from app.database_sqlite.models.all_models import MissingPersons, MissingPersonPhoto, PhotoEmbedding
+
+        try:
+            self._set_status("embedding")
+            pending = [idx for idx, record in enumerate(self.records) if record["status"] == "pending"]
+            registered = self._embed(pending, SessionLocal, PhotoEmbedding)
+
+            self._set_status("storing")
+            with SessionLocal() as db:
+                db.bulk_insert_mappings(MissingPersons, [
+                    dict(missing_person_id=self.records[idx]["missing_person_id"],
+                         first_name=self.records[idx]["first_name"],
+                         last_name=self.records[idx]["last_name"],
+                         details=self.records[idx]["details"],
+                         photo=jpeg_bytes)
+                    for idx, (_, jpeg_bytes, _) in registered.items()
+                ])
+                db.bulk_insert_mappings(MissingPersonPhoto, [
+                    dict(photo_id=str(uuid.uuid4()),
+                         missing_person_id=self.records[idx]["missing_person_id"],
+                         photo=jpeg_bytes,
+                         embedding=vector_to_bytes(vector),
+                         embedding_model=config.EMBEDDING_MODEL)
+                    for idx, (vector, jpeg_bytes, _) in registered.items()
+                ])
+                # Vectors go in before the commit, so a vector store failure rolls the persons back
+                person_ids = [self.records[idx]["missing_person_id"] for idx in registered]
+                store_missing_batch(person_ids, [vector for vector, _, _ in registered.values()])
+                try:
+                    db.commit()
+                except Exception:
+                    delete_missing_batch(person_ids)
+                    raise
+            for idx in registered:
+                self.records[idx]["status"] = "registered"
+            self._cache_embeddings(registered, SessionLocal, PhotoEmbedding)
+
+            self._set_status("matching")
+            order = list(registered)
+            for start in range(0, len(order), config.IMPORT_MATCH_BATCH_SIZE):
+                batch = order[start:start + config.IMPORT_MATCH_BATCH_SIZE]
+                results = search_matches_batch([registered[idx][0] for idx in batch],
+                                               max_distance=config.MATCH_MAX_DISTANCE)
+                frames = []
+                for idx, matches in zip(batch, results):
+                    self.records[idx]["matches"] = len(matches)
+                    frames.extend(match_frame_rows(self.records[idx]["missing_person_id"], matches))
+                with SessionLocal() as db:
+                    bulk_insert_frames(db, frames)
+                    db.commit()
+                self.matched += len(batch)
+                self.updated_at = time.time()
+
+            self._set_status("done")
+
+        except Exception as err:
+            self.error = str(err)
+            for record in self.records:
+                if record["status"] == "pending":
+                    record["status"], record["error"] = "failed", str(err)
+            self._set_status("failed")
+            logger.exception(f"Error running import {self.job_id}")
+
+        finally:
+            self._photos = []
+
+    def _cache_embeddings(self, registered: dict, SessionLocal, PhotoEmbedding) -> None:
+        """
+        Cache the embeddings of newly embedded photos in their own transaction, after the persons
+        are stored. The cache is only an optimisation, so failing to write it never fails the import.
+        """
+        new_cache = {photo_hash: vector for vector, _, photo_hash in registered.values() if photo_hash is not None}
+        if not new_cache:
+            return
+        with SessionLocal() as db:
+            try:
+                # Registrations and gallery uploads may have cached some of these photos meanwhile
+                known = {row.content_hash for row in db.query(PhotoEmbedding.content_hash)
+                         .filter(PhotoEmbedding.content_hash.in_(set(new_cache)))}
+                db.bulk_insert_mappings(PhotoEmbedding, [
+                    dict(content_hash=photo_hash, embedding=vector_to_bytes(vector),
+                         embedding_model=config.EMBEDDING_MODEL)
+                    for photo_hash, vector in new_cache.items() if photo_hash not in known
+                ])
+                db.commit()
+            except SQLAlchemyError as err:
+                db.rollback()
+                logger.warning(f"Import {self.job_id}: embeddings not cached: {err}")
+
+    def _embed(self, pending: list[int], SessionLocal, PhotoEmbedding) -> dict:
+        """
+        Embed the photos of the `pending` records, reusing cached embeddings of known photos.
+
+        Returns:
+            {record index: (vector, jpeg_bytes, photo_hash or None if already cached)} for every
+            record with a face; the other records are marked "invalid" or "no_face".
+        """
+        hashes = {idx: embedding_cache_key(self._photos[idx]) for idx in pending}
+        with SessionLocal() as db:
+            cached = {row.content_hash: vector_from_bytes(row.embedding)
+                      for row in db.query(PhotoEmbedding)
+                      .filter(PhotoEmbedding.content_hash.in_(set(hashes.values())))} if hashes else {}
+
+        registered = {}
+        new_hashes = set()
+        for start in range(0, len(pending), config.IMPORT_EMBED_BATCH_SIZE):
+            batch = pending[start:start + config.IMPORT_EMBED_BATCH_SIZE]
+            # Photos are decoded one batch at a time to bound memory on large imports
+            jpegs, to_embed = {}, {}
+            for idx in batch:
+                record = self.records[idx]
+                try:
+                    image = Image.open(io.BytesIO(self._photos[idx])).convert("RGB")
+                except Exception as err:
+                    record["status"], record["error"] = "invalid", f"Unreadable image: {err}"
+                    continue
+                finally:
+                    self._photos[idx] = None
+                image_buffer = io.BytesIO()
+                image.save(image_buffer, format="JPEG")
+                jpegs[idx] = image_buffer.getvalue()
+                if hashes[idx] in cached:
+                    registered[idx] = (cached[hashes[idx]], jpegs[idx], None)
+                else:
+                    to_embed[idx] = image
+
+            if to_embed:
+                vectors = model_loader.vectorize_primary_faces(list(to_embed.values()))
+                for idx, vector in zip(to_embed, vectors):
+                    if vector is None:
+                        self.records[idx]["status"], self.records[idx]["error"] = \
+                            "no_face", "No face detected in the photo."
+                        continue
+                    # The same photo can appear several times in a batch, its embedding is cached once
+                    photo_hash = hashes[idx]
+                    registered[idx] = (vector, jpegs[idx], None if photo_hash in new_hashes else photo_hash)
+                    new_hashes.add(photo_hash)
+
+            self.embedded += len(batch)
+            self.updated_at = time.time()
+
+        for idx in registered:
+            self.records[idx]["missing_person_id"] = str(uuid.uuid4())
+        return dict(sorted(registered.items()))
+
+    def info(self, include_records: bool = True) -> dict:
+        counts = {}
+        for record in self.records:
+            counts[record["status"]] = counts.get(record["status"], 0) + 1
+        info = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "total": len(self.records),
+            "embedded": self.embedded,
+            "matched": self.matched,
+            "counts": counts,
+            "error": self.error
+        }
+        if include_records:
+            info["records"] = self.records
+        return info
+
+
+class ImportRegistry:
+    """In-memory registry of import jobs; finished jobs are forgotten after `IMPORT_JOB_TTL_SECONDS`."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, user_id: str, entries: list[tuple[dict, bytes]]) -> BulkImportJob:
+        self.expire()
+        job = BulkImportJob(user_id, entries)
+        with self._lock:
+            self._jobs[job.job_id] = job
+        job.start()
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def expire(self) -> None:
+        cutoff = time.time() - config.IMPORT_JOB_TTL_SECONDS
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job.status in ("done", "failed") and job.updated_at < cutoff]:
+                del self._jobs[job_id]
+
+
+# Shared registry used by the API
+import_registry = ImportRegistry()
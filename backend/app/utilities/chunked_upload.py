@@ -0,0 +1,325 @@
+import os
+import hashlib
+import struct
+import threading
+import time
+import uuid
+import cv2
+from app.utilities import config
+from app.utilities.logger_config import logger
+from app.utilities.frames_storage import Video_FramesStorage
+from app.utilities.metrics import FRAMES_DECODED, FRAMES_SKIPPED
+from app.utilities.model_loader import model_loader
+
+# Container extensions accepted for chunked uploads
+UPLOAD_EXTENSIONS = (".mp4", ".ts")
+
+
+def is_streamable(path: str) -> bool:
+    """
+    Tell whether the received prefix of a video can be decoded before the upload completes.
+
+    MPEG-TS is always streamable. MP4 is streamable when its index (`moov`) or fragments
+    (`moof`) come before the media data (`mdat`), i.e. "faststart" or fragmented files.
+    Returns False while the answer is not known yet.
+    """
+    with open(path, "rb") as video_file:
+        if video_file.read(1) == b"\x47":
+            return True
+
+        offset = 0
+        while True:
+            video_file.seek(offset)
+            header = video_file.read(8)
+            if len(header) < 8:
+                return False
+            size, box_type = struct.unpack(">I4s", header)
+            if box_type in (b"moov", b"moof"):
+                return True
+            if box_type == b"mdat":
+                return False
+            if size == 1:
+                large_size = video_file.read(8)
+                if len(large_size) < 8:
+                    return False
+                size = struct.unpack(">Q", large_size)[0]
+            if size < 8:
+                return False
+            offset += size
+
+
+class UploadSession:
+    """
+    A resumable, chunked video upload that can be processed while it is still arriving.
+
+    Chunks are appended at explicit offsets so an interrupted client can ask for the current
+    offset and resume. With `progressive` processing, a worker thread decodes the frames
+    already received as soon as the container allows it, and picks up where it left off
+    as more data arrives.
+    """
+
+    def __init__(self, user_id: str, filename: str, frame_skip: int, store_crops: bool = config.STORE_FACE_CROPS,
+                 started_at=None, progressive: bool = True, total_size: int = None):
+        self.upload_id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.filename = os.path.basename(filename)
+        self.extension = os.path.splitext(self.filename)[1].lower()
+        self.path = os.path.join(config.UPLOAD_DIR, f"{self.upload_id}{self.extension}")
+        self.frame_skip = max(1, frame_skip)
+        self.store_crops = store_crops
+        self.started_at = started_at
+        self.progressive = progressive
+        self.total_size = total_size
+        self.received = 0
+        self.complete = False
+        self.content_hash = None  # SHA-256 of the file, known once complete
+        self.status = "uploading"  # uploading | processing | done | duplicate | failed | aborted
+        self.error = None
+        self.cam_id = None
+        self.fps = None
+        self.frames_decoded = 0
+        self.faces_stored = 0
+        self.updated_at = time.time()
+        self._condition = threading.Condition()
+        self._worker = None
+        self._aborted = False
+        self._digest = hashlib.sha256()
+
+        os.makedirs(config.UPLOAD_DIR, exist_ok=True)
+        open(self.path, "wb").close()
+
+    def append(self, offset: int, chunk: bytes) -> int:
+        """
+        Append `chunk` at `offset`, which must equal the number of bytes received so far.
+
+        Raises:
+            ValueError: If the offset does not match or the upload is already complete.
+
+        Returns:
+            The new number of bytes received.
+        """
+        with self._condition:
+            if self.complete:
+                raise ValueError("Upload is already complete.")
+            if offset != self.received:
+                raise ValueError(f"Expected offset {self.received}, got {offset}.")
+            with open(self.path, "ab") as video_file:
+                video_file.write(chunk)
+            # Chunks arrive strictly in order, so the file hash is built as it streams in
+            self._digest.update(chunk)
+            self.received += len(chunk)
+            self.updated_at = time.time()
+            self._condition.notify_all()
+
+        if self.progressive and self._worker is None and self.received >= config.UPLOAD_PROGRESSIVE_MIN_BYTES \
+                and is_streamable(self.path):
+            self.start_processing()
+        return self.received
+
+    def finish(self) -> str:
+        """
+        Mark the upload complete. Processing is started separately with `start_processing`,
+        once the caller has checked the content hash against earlier uploads.
+
+        Returns:
+            The SHA-256 hex digest of the uploaded file.
+        """
+        with self._condition:
+            if self.total_size is not None and self.received != self.total_size:
+                raise ValueError(f"Received {self.received} of {self.total_size} bytes.")
+            self.complete = True
+            self.content_hash = self._digest.hexdigest()
+            self.updated_at = time.time()
+            self._condition.notify_all()
+        return self.content_hash
+
+    @property
+    def processing_started(self) -> bool:
+        return self._worker is not None
+
+    def mark_duplicate(self, cam_id: str) -> None:
+        """Resolve the upload to the camera of an identical earlier upload without processing it."""
+        with self._condition:
+            self.cam_id = cam_id
+            self.status = "duplicate"
+            self._aborted = True
+            self._condition.notify_all()
+        self._remove_file()
+
+    def abort(self) -> None:
+        """Stop processing and remove the temporary file."""
+        with self._condition:
+            self._aborted = True
+            self.status = "aborted"
+            self._condition.notify_all()
+        if self._worker is None:
+            self._remove_file()
+
+    def start_processing(self) -> None:
+        with self._condition:
+            if self._worker is not None:
+                return
+            self.status = "processing"
+            self._worker = threading.Thread(target=self._process, name=f"upload-{self.upload_id}", daemon=True)
+        self._worker.start()
+
+    def _wait_for_data(self, received_before: int) -> bool:
+        """Wait until more bytes arrive or the upload completes; False if aborted."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.received > received_before or self.complete or self._aborted,
+                timeout=config.UPLOAD_PROGRESSIVE_POLL_SECONDS
+            )
+            return not self._aborted
+
+    def _decode_pass(self, storage, final: bool) -> None:
+        """
+        Decode frames from `frames_decoded` onwards. On a partial file the last frame read is
+        held back until a later frame decodes, so a frame cut off by the end of the received
+        data is never processed.
+        """
+        cap = cv2.VideoCapture(self.path)
+        if not cap.isOpened():
+            cap.release()
+            return
+        if self.frames_decoded:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, self.frames_decoded)
+        self.fps = self.fps or cap.get(cv2.CAP_PROP_FPS) or None
+        if self.fps is None:
+            if not final:
+                # Match timestamps need the frame rate; wait until more of the file is in
+                cap.release()
+                return
+            self.fps = config.UPLOAD_DEFAULT_FPS
+            logger.warning(f"Upload {self.upload_id} reports no frame rate, assuming {self.fps} fps")
+        storage.fps = self.fps
+
+        frame_id = self.frames_decoded
+        pending = None
+        while not self._aborted:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if pending is not None:
+                self._handle_frame(storage, *pending)
+                self.frames_decoded = pending[1] + 1
+            pending = (frame, frame_id)
+            frame_id += 1
+        cap.release()
+
+        if pending is not None and final and not self._aborted:
+            self._handle_frame(storage, *pending)
+            self.frames_decoded = pending[1] + 1
+
+    def _handle_frame(self, storage, frame, frame_id: int) -> None:
+        FRAMES_DECODED.inc()
+        if frame_id % self.frame_skip == 0:
+            self.faces_stored += storage.process_frame(frame, frame_id, frame_id / self.fps)
+        else:
+            FRAMES_SKIPPED.inc(reason="frame_skip")
+
+    def _process(self) -> None:
+        from app.database_sqlite.db import SessionLocal
+        from app.database_sqlite.models.all_models import Camera, VideoHash
+
+        try:
+            storage = Video_FramesStorage(
+                detection_model=model_loader.create(),
+                store_crops=self.store_crops,
+                started_at=self.started_at
+            )
+            self.cam_id = f"cam-{storage.cam_id}"
+            logger.info(f"Processing upload {self.upload_id} as {self.cam_id} (complete={self.complete})")
+
+            while not self._aborted:
+                final = self.complete
+                received_before = self.received
+                self._decode_pass(storage, final)
+                if final or not self._wait_for_data(received_before):
+                    break
+
+            if self._aborted:
+                return
+
+            with SessionLocal() as db:
+                db.add(Camera(cam_id=self.cam_id, source=self.filename,
+                              started_at=storage.started_at, fps=self.fps))
+                # Later uploads of the same file resolve to this camera
+                db.merge(VideoHash(content_hash=self.content_hash, cam_id=self.cam_id,
+                                   filename=self.filename, size=self.received, status="done"))
+                db.commit()
+            self.status = "done"
+            logger.info(f"Upload {self.upload_id} processed: {self.frames_decoded} frames, {self.faces_stored} faces")
+
+        except Exception as err:
+            self.status = "failed"
+            self.error = str(err)
+            logger.exception(f"Error processing upload {self.upload_id}")
+
+        finally:
+            self.updated_at = time.time()
+            self._remove_file()
+
+    def _remove_file(self) -> None:
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+                logger.info(f"Removed the video file in path {self.path}")
+        except OSError as err:
+            logger.error(f"Error removing video file {self.path}: {err}")
+
+    def info(self) -> dict:
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "status": self.status,
+            "received": self.received,
+            "total_size": self.total_size,
+            "complete": self.complete,
+            "content_hash": self.content_hash,
+            "progressive": self.progressive,
+            "camera_id": self.cam_id.removeprefix("cam-") if self.cam_id else None,
+            "frames_decoded": self.frames_decoded,
+            "faces_stored": self.faces_stored,
+            "error": self.error
+        }
+
+
+class UploadRegistry:
+    """In-memory registry of chunked uploads; idle sessions expire after `UPLOAD_SESSION_TTL_SECONDS`."""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs) -> UploadSession:
+        self.expire()
+        session = UploadSession(**kwargs)
+        with self._lock:
+            self._sessions[session.upload_id] = session
+        return session
+
+    def get(self, upload_id: str):
+        with self._lock:
+            return self._sessions.get(upload_id)
+
+    def remove(self, upload_id: str):
+        with self._lock:
+            return self._sessions.pop(upload_id, None)
+
+    def expire(self) -> None:
+        """Abort uploads that stopped receiving data and forget finished ones."""
+        cutoff = time.time() - config.UPLOAD_SESSION_TTL_SECONDS
+        with self._lock:
+            stale = [session for session in self._sessions.values()
+                     if session.updated_at < cutoff and session.status != "processing"]
+            for session in stale:
+                del self._sessions[session.upload_id]
+        for session in stale:
+            if session.status == "uploading":
+                logger.info(f"Expiring idle upload {session.upload_id}")
+                session.abort()
+
+
+# Shared registry used by the API
+upload_registry = UploadRegistry()
@@ -0,0 +1,49 @@
+import hashlib
+import numpy as np
+from app.utilities import config
+
+
+def hash_bytes(data: bytes) -> str:
+    """SHA-256 hex digest of `data`."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def embedding_cache_key(photo_bytes: bytes, model_id: str = config.EMBEDDING_MODEL) -> str:
+    """
+    Key of a photo's cached embedding for `model_id`: the photo's SHA-256 for the legacy
+    model, so caches from before the model was selectable stay valid, and a SHA-256 salted
+    with the model ID for any other model.
+    """
+    if model_id == config.LEGACY_EMBEDDING_MODEL:
+        return hash_bytes(photo_bytes)
+    return hashlib.sha256(model_id.encode() + b"\0" + photo_bytes).hexdigest()
+
+
+def copy_and_hash(source, destination, chunk_size: int = config.UPLOAD_CHUNK_SIZE):
+    """
+    Copy a file object to another while hashing it, so the content hash of an upload
+    costs no extra read of the file.
+
+    Returns:
+        (sha256 hex digest, number of bytes copied)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        digest.update(chunk)
+        destination.write(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def vector_to_bytes(vector) -> bytes:
+    """Pack an embedding as float32 bytes for storage."""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def vector_from_bytes(data: bytes) -> list[float]:
+    """Unpack an embedding stored with `vector_to_bytes`."""
+    return np.frombuffer(data, dtype=np.float32).tolist()
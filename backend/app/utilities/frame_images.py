@@ -0,0 +1,169 @@
+import io
+import os
+import cv2
+import numpy as np
+from PIL import Image
+from app.utilities import config
+from app.utilities.helper import draw_box, make_etag
+from app.utilities.logger_config import logger
+
+# Image variants that can be served for a stored detection
+IMAGE_MODES = ("frame", "crop", "thumbnail")
+
+
+def frame_image_path(cam_id: str, frame_id: str) -> str:
+    """Path of the full-size frame JPEG written at ingest time."""
+    return os.path.join(config.FRAME_DIR, cam_id, f"{frame_id}.jpeg")
+
+
+def face_crop_path(cam_id: str, frame_id: str, face_idx: int) -> str:
+    """Path of the face crop stored for one detection of a frame."""
+    return os.path.join(config.FRAME_DIR, cam_id, "crops", f"{frame_id}_face{face_idx}.jpeg")
+
+
+def thumbnail_path(cam_id: str, frame_id: str, face_idx: int) -> str:
+    """Path of the annotated, downscaled frame stored for one detection of a frame."""
+    return os.path.join(config.FRAME_DIR, cam_id, "thumbnails", f"{frame_id}_face{face_idx}.jpeg")
+
+
+def _clip_box(box, width: int, height: int):
+    x1, y1, x2, y2 = map(int, box)
+    x1, x2 = max(0, min(x1, width)), max(0, min(x2, width))
+    y1, y2 = max(0, min(y1, height)), max(0, min(y2, height))
+    return x1, y1, x2, y2
+
+
+def make_face_crop(image: np.ndarray, box, size: int = config.FACE_CROP_SIZE):
+    """
+    Crop a face out of a frame and shrink it so its longest side is at most `size`.
+
+    Returns:
+        The cropped image array, or None if the box does not overlap the frame.
+    """
+    height, width = image.shape[:2]
+    x1, y1, x2, y2 = _clip_box(box, width, height)
+    if x2 <= x1 or y2 <= y1:
+        return None
+
+    crop = image[y1:y2, x1:x2]
+    scale = size / max(crop.shape[:2])
+    if scale < 1:
+        crop = cv2.resize(crop, (max(1, int((x2 - x1) * scale)), max(1, int((y2 - y1) * scale))),
+                          interpolation=cv2.INTER_AREA)
+    return crop
+
+
+def make_thumbnail(image: np.ndarray, box=None, max_size: int = config.THUMBNAIL_MAX_SIZE, color=(255, 0, 0)):
+    """
+    Downscale a frame so its longest side is at most `max_size` and draw the detection box on it, if given.
+
+    `color` must match the channel order of `image` (RGB by default, pass (0, 0, 255) for BGR).
+    """
+    height, width = image.shape[:2]
+    scale = min(1.0, max_size / max(height, width))
+    if scale < 1:
+        thumb = cv2.resize(image, (max(1, int(width * scale)), max(1, int(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    else:
+        thumb = image.copy()
+    if box:
+        thumb = draw_box(thumb, [coord * scale for coord in box], color=color, thickness=2)
+    return thumb
+
+
+def save_face_assets(frame: np.ndarray, cam_id: str, frame_id: str, boxes) -> None:
+    """
+    Persist a face crop and an annotated thumbnail for every detection in a BGR frame.
+
+    Args:
+        frame:    Frame as read by OpenCV (BGR).
+        cam_id:   Identifier for the camera.
+        frame_id: Identifier for the video frame.
+        boxes:    Detected (x1, y1, x2, y2) boxes, in the same order as the stored vectors.
+    """
+    os.makedirs(os.path.dirname(face_crop_path(cam_id, frame_id, 0)), exist_ok=True)
+    os.makedirs(os.path.dirname(thumbnail_path(cam_id, frame_id, 0)), exist_ok=True)
+    params = [cv2.IMWRITE_JPEG_QUALITY, config.JPEG_QUALITY]
+
+    for idx, box in enumerate(boxes):
+        crop = make_face_crop(frame, box)
+        if crop is not None:
+            cv2.imwrite(face_crop_path(cam_id, frame_id, idx), crop, params)
+        thumb = make_thumbnail(frame, box, color=(0, 0, 255))
+        cv2.imwrite(thumbnail_path(cam_id, frame_id, idx), thumb, params)
+
+
+def encode_jpeg(image: np.ndarray) -> bytes:
+    """Encode an RGB image array as JPEG bytes."""
+    buffer = io.BytesIO()
+    Image.fromarray(image).save(buffer, format="JPEG", quality=config.JPEG_QUALITY)
+    return buffer.getvalue()
+
+
+def image_source_path(cam_id: str, frame_id: str, face_idx=None, mode: str = "frame") -> str:
+    """
+    Return the file `render_image` reads for a detection in the requested mode.
+
+    Raises:
+        ValueError: If `mode` is not supported.
+        FileNotFoundError: If the frame image is missing on disk.
+    """
+    if mode not in IMAGE_MODES:
+        raise ValueError(f"Unsupported image mode: {mode}")
+
+    if mode != "frame" and face_idx is not None:
+        asset_path = face_crop_path(cam_id, frame_id, face_idx) if mode == "crop" \
+            else thumbnail_path(cam_id, frame_id, face_idx)
+        if os.path.exists(asset_path):
+            return asset_path
+        logger.debug(f"No stored {mode} at {asset_path}, rendering from full frame")
+
+    path = frame_image_path(cam_id, frame_id)
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return path
+
+
+def image_etag(cam_id: str, frame_id: str, box=None, face_idx=None, mode: str = "frame") -> str:
+    """
+    Compute the ETag of a rendered detection image without rendering it.
+    The tag changes whenever the source file, the box or the mode changes.
+    """
+    path = image_source_path(cam_id, frame_id, face_idx=face_idx, mode=mode)
+    stat = os.stat(path)
+    return make_etag(path, stat.st_mtime_ns, stat.st_size, box, mode)
+
+
+def render_image(cam_id: str, frame_id: str, box=None, face_idx=None, mode: str = "frame") -> bytes:
+    """
+    Return JPEG bytes of a stored detection in the requested mode.
+
+    Crops and thumbnails stored at ingest time are returned as-is without decoding.
+    Detections ingested without stored assets fall back to rendering from the full frame.
+
+    Args:
+        cam_id:   Identifier for the camera.
+        frame_id: Identifier for the video frame.
+        box:      (x1, y1, x2, y2) box of the detection, drawn on the frame if given.
+        face_idx: Index of the detection within the frame, if known.
+        mode:     One of IMAGE_MODES.
+
+    Raises:
+        ValueError: If `mode` is not supported.
+        FileNotFoundError: If the frame image is missing on disk.
+    """
+    path = image_source_path(cam_id, frame_id, face_idx=face_idx, mode=mode)
+    if path != frame_image_path(cam_id, frame_id):
+        with open(path, "rb") as asset_file:
+            return asset_file.read()
+
+    np_image = np.array(Image.open(path).convert("RGB"))
+    if mode == "crop" and box:
+        crop = make_face_crop(np_image, box)
+        if crop is not None:
+            return encode_jpeg(crop)
+    if mode == "thumbnail":
+        return encode_jpeg(make_thumbnail(np_image, box))
+    if box:
+        np_image = draw_box(np_image, box)
+    return encode_jpeg(np_image)
@@ -2,22 +2,141 @@ import os
 import cv2
 import uuid
 import json
+from contextlib import nullcontext
 from app.utilities import config
 import datetime
 from PIL import Image
 from app.utilities.logger_config import logger
-from app.utilities.vector_storage import store_frame_vectors
+from app.utilities.vector_storage import store_frame_vectors, match_missing_persons
+from app.utilities.alerts import alert_broker
+from app.utilities.frame_images import save_face_assets
+from app.utilities.profiling import StageTimer, ingest_profiler
+from app.utilities.metrics import FRAMES_DECODED, FRAMES_PROCESSED, FRAMES_SKIPPED, FACES_PROCESSED
 from uuid import uuid4
 
 class Video_FramesStorage:
 
-    def __init__(self, detection_model=None):
+    def __init__(self, detection_model=None, store_crops=config.STORE_FACE_CROPS, started_at=None,
+                 live_alerts=config.LIVE_ALERTS, cam_id=None, model_lock=None):
         self.detection_model = detection_model
-        self.cam_id = str(uuid4())
+        # Held only around detection and embedding when the model is shared with other threads
+        self.model_lock = model_lock or nullcontext()
+        self.store_crops = store_crops
+        self.live_alerts = live_alerts
+        # Capture time (naive UTC) of the first frame, used to derive absolute frame times
+        self.started_at = started_at or datetime.datetime.utcnow()
+        self.fps = None
+        # Per-stage timings and counters, read by benchmarks and progress reports
+        self.timer = StageTimer()
+        self.frames_decoded = 0
+        self.frames_processed = 0
+        self.faces_stored = 0
+        # A known camera ID resumes writing to an existing camera, e.g. when an ingest job is retried
+        self.cam_id = cam_id or str(uuid4())
         self.FRAME_DIR = os.path.join(config.FRAME_DIR, f"cam-{self.cam_id}")
         os.makedirs(self.FRAME_DIR, exist_ok=True)
 
-    def extract_frames(self, video_path,frame_skip=5):
+    def discard(self) -> None:
+        """Remove the frame folder of a camera that ends up not being processed."""
+        try:
+            os.rmdir(self.FRAME_DIR)
+        except OSError as e:
+            logger.error(f"Error removing frame folder {self.FRAME_DIR}: {e}")
+
+    def process_frame(self, frame, frame_id: int, seconds: float, captured_at: float = None) -> int:
+        """
+        Detect, embed and store the faces of one frame.
+
+        Args:
+            frame:       Frame as read by OpenCV (BGR).
+            frame_id:    Index of the frame within the camera.
+            seconds:     Offset of the frame from the start of the camera, in seconds.
+            captured_at: Unix timestamp of the capture, defaults to `started_at` + `seconds`.
+
+        Returns:
+            Number of faces stored for the frame.
+        """
+        if captured_at is None:
+            captured_at = self.started_at.replace(tzinfo=datetime.timezone.utc).timestamp() + seconds
+        timestamp = str(datetime.timedelta(seconds=round(seconds, 3)))  # e.g., "0:00:03.000"
+
+        frame_filename = os.path.join(self.FRAME_DIR, f"frame_{frame_id}.jpeg")
+
+        # Convert OpenCV image (BGR) to PIL image (RGB)
+        with self.timer.time("convert"):
+            image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            pil_image = Image.fromarray(image_rgb)
+
+        # Get bounding boxes using YOLO
+        with self.model_lock, self.timer.time("detect"):
+            boxes = self.detection_model.bounding_boxes(pil_image)
+        self.frames_processed += 1
+        FRAMES_PROCESSED.inc(result="faces" if boxes else "no_faces")
+        if not boxes:
+            return 0
+
+        # Embed the detected boxes directly, detection already ran once for this frame
+        with self.model_lock, self.timer.time("embed"):
+            vectors = self.detection_model.vectorize_boxes(pil_image, boxes)
+        with self.timer.time("write_frame"):
+            cv2.imwrite(frame_filename, frame)  # Save the frame
+        if self.store_crops:
+            with self.timer.time("write_assets"):
+                save_face_assets(frame, f"cam-{self.cam_id}", f"frame_{frame_id}", boxes)
+
+        # Call the external function with all required info
+        with self.timer.time("vector_insert"):
+            store_frame_vectors(
+                cam_id=f"cam-{self.cam_id}",
+                frame_id=f"frame_{frame_id}",
+                bounding_boxes=boxes,
+                vectors=vectors,
+                timestamp=timestamp,
+                timestamp_seconds=round(seconds, 3),
+                captured_at=captured_at
+            )
+        self.faces_stored += len(boxes)
+        FACES_PROCESSED.inc(len(boxes))
+        logger.info(f"cam-{self.cam_id} frame {frame_id}: stored {len(boxes)} faces",
+                    extra={"sample_key": f"frame:{self.cam_id}"})
+
+        if self.live_alerts and alert_broker.subscriber_count:
+            with self.timer.time("alerts"):
+                self._publish_alerts(frame_id, boxes, vectors, timestamp, captured_at)
+        return len(boxes)
+
+    def _publish_alerts(self, frame_id, boxes, vectors, timestamp, captured_at) -> None:
+        """Match the frame's faces against registered missing persons and push alerts."""
+        for match in match_missing_persons(vectors, max_distance=config.MATCH_MAX_DISTANCE):
+            logger.info(f"Live match of {match['person_id']} on cam-{self.cam_id} frame {frame_id}",
+                        extra={"sample_key": f"match:{match['person_id']}", "score": match["score"]})
+            alert_broker.publish({
+                "type": "match",
+                "missing_person_id": match["person_id"],
+                "cam_id": f"cam-{self.cam_id}",
+                "frame_id": f"frame_{frame_id}",
+                "face_idx": match["face_idx"],
+                "score": match["score"],
+                "box": boxes[match["face_idx"]],
+                "timestamp": timestamp,
+                "captured_at": datetime.datetime.fromtimestamp(captured_at, datetime.timezone.utc).isoformat()
+            }, throttle_key=match["person_id"])
+
+    def extract_frames(self, video_path, frame_skip=5, start_frame=0, remove_video=True, on_progress=None):
+        """
+        Run every `frame_skip`-th frame of a video through `process_frame`.
+
+        Args:
+            video_path:   Video file to read.
+            frame_skip:   Process one frame out of this many.
+            start_frame:  Frame to start decoding at, to resume an interrupted run.
+            remove_video: Delete the video file afterwards.
+            on_progress:  Called with the index of the next frame after each processed frame;
+                          returning False stops extraction early.
+
+        Returns:
+            True once the whole video was read, False if it is missing or extraction was stopped.
+        """
         if not os.path.exists(video_path):
             logger.error(f"Video file {video_path} does not exist.")
             return False
@@ -25,48 +144,43 @@ class Video_FramesStorage:
         cap = cv2.VideoCapture(video_path)
         frame_id = 0
         fps = cap.get(cv2.CAP_PROP_FPS)
+        self.fps = fps
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+            frame_id = start_frame
+
+        stopped = False
+        with ingest_profiler.profile(f"cam-{self.cam_id}"):
+            while cap.isOpened():
+                with self.timer.time("decode"):
+                    ret, frame = cap.read()
+                if not ret:
+                    break
+                self.frames_decoded += 1
+                FRAMES_DECODED.inc()
+
+                if frame_id % frame_skip != 0:
+                    FRAMES_SKIPPED.inc(reason="frame_skip")
+                    frame_id += 1
+                    continue
+                seconds = frame_id / fps  # in seconds
+                self.process_frame(frame, frame_id, seconds)
 
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            if frame_id % frame_skip != 0:
                 frame_id += 1
-                continue
-            seconds = frame_id / fps  # in seconds
-            timestamp = str(datetime.timedelta(seconds=round(seconds, 3)))  # e.g., "0:00:03.000"
-
-            frame_filename = os.path.join(self.FRAME_DIR, f"frame_{frame_id}.jpeg")
-
-            # Convert OpenCV image (BGR) to PIL image (RGB)
-            image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            pil_image = Image.fromarray(image_rgb)
-
-            # Get bounding boxes using YOLO
-            boxes = self.detection_model.bounding_boxes(pil_image)
-            if boxes:  # if faces are detected
-                vectors = self.detection_model.vectorize_faces(pil_image)
-                cv2.imwrite(frame_filename, frame)  # Save the frame
-
-                # Call the external function with all required info
-                store_frame_vectors(
-                    cam_id=f"cam-{self.cam_id}",
-                    frame_id=f"frame_{frame_id}",
-                    bounding_boxes=boxes,
-                    vectors=vectors,
-                    timestamp=timestamp
-                )
-
-            frame_id += 1
+                if on_progress is not None and on_progress(frame_id) is False:
+                    stopped = True
+                    break
 
         cap.release()
         logger.info(f"Processed {frame_id} frames.")
-        try:
-            os.remove(config.UPLOAD_DIR)
-            logger.info(f"Removed the video file in path {config.UPLOAD_DIR}")
-        except Exception as e:
-            logger.error(f"Error removing video file: {e}")
+        if stopped:
+            return False
+        if remove_video:
+            try:
+                os.remove(video_path)
+                logger.info(f"Removed the video file in path {video_path}")
+            except Exception as e:
+                logger.error(f"Error removing video file: {e}")
         return True
 
 
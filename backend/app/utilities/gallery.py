@@ -0,0 +1,147 @@
+import io
+from PIL import Image
+from sqlalchemy.exc import IntegrityError
+from app.utilities import config
+from app.utilities.logger_config import logger
+from app.utilities.dedup import hash_bytes, embedding_cache_key, vector_to_bytes, vector_from_bytes
+from app.utilities.vector_storage import template_vector, store_missing, get_missing_vector, search_gallery_matches
+from app.database_sqlite.db import bulk_insert_frames, match_frame_rows, clear_sightings
+from app.database_sqlite.models.all_models import MissingPersons, MissingPersonsFrame, MissingPersonPhoto, \
+    PhotoEmbedding
+
+
+def prepare_photos(db, photos: list[bytes], embed_faces) -> list[dict]:
+    """
+    Convert reference photos to JPEG and embed their main face, reusing cached embeddings
+    of known photos made with the active embedding model. Uncached photos are embedded in one batch.
+
+    Args:
+        db:        SQLAlchemy session.
+        photos:    Uploaded photo bytes.
+        embed_faces: Callable embedding the largest face of each image (like
+                     `Model.vectorize_primary_faces`), only called if a photo needs embedding.
+
+    Raises:
+        ValueError: If a photo cannot be read as an image.
+
+    Returns:
+        One dict per photo with "jpeg", "vector" (None if no face was found),
+        "content_hash", "cache_key" (see `embedding_cache_key`) and "cached".
+    """
+    prepared = []
+    images = {}
+    for idx, photo_bytes in enumerate(photos):
+        try:
+            image = Image.open(io.BytesIO(photo_bytes)).convert("RGB")
+        except Exception as err:
+            raise ValueError(f"Photo {idx + 1} is not a readable image: {err}")
+        image_buffer = io.BytesIO()
+        image.save(image_buffer, format="JPEG")
+
+        cache_key = embedding_cache_key(photo_bytes)
+        cached = db.get(PhotoEmbedding, cache_key)
+        prepared.append({
+            "jpeg": image_buffer.getvalue(),
+            "vector": vector_from_bytes(cached.embedding) if cached is not None else None,
+            "content_hash": hash_bytes(photo_bytes),
+            "cache_key": cache_key,
+            "cached": cached is not None
+        })
+        if cached is None:
+            images[idx] = image
+
+    if images:
+        for idx, vector in zip(images, embed_faces(list(images.values()))):
+            prepared[idx]["vector"] = vector
+    logger.info(f"Prepared {len(photos)} reference photos, {len(photos) - len(images)} from cache")
+    return prepared
+
+
+def add_gallery_photos(db, missing_person_id: str, prepared: list[dict]) -> None:
+    """Add prepared photos with a face to a person's gallery and cache their new embeddings."""
+    new_keys = set()
+    for photo in prepared:
+        if photo["vector"] is None:
+            continue
+        db.add(MissingPersonPhoto(
+            missing_person_id=missing_person_id,
+            photo=photo["jpeg"],
+            embedding=vector_to_bytes(photo["vector"]),
+            embedding_model=config.EMBEDDING_MODEL,
+            content_hash=photo["content_hash"]
+        ))
+        if not photo["cached"] and photo["cache_key"] not in new_keys:
+            new_keys.add(photo["cache_key"])
+            try:
+                # A concurrent upload of the same photo may cache it first; its embedding is as good
+                with db.begin_nested():
+                    db.merge(PhotoEmbedding(content_hash=photo["cache_key"],
+                                            embedding=vector_to_bytes(photo["vector"]),
+                                            embedding_model=config.EMBEDDING_MODEL))
+            except IntegrityError:
+                logger.info(f"Embedding of photo {photo['content_hash']} was cached concurrently")
+
+
+def _model_of(row) -> str:
+    return row.embedding_model or config.LEGACY_EMBEDDING_MODEL
+
+
+def gallery_vectors(db, missing_person_id: str, embed_faces=None) -> list[list[float]]:
+    """
+    Return the per-photo vectors of a person's gallery, made with the active embedding model.
+
+    Persons registered before galleries existed have a single vector in the vector store;
+    their gallery is created from it and the registered photo on first use. Photos embedded
+    with another model are embedded again with `embed_faces` and updated; without it, or if
+    the face is no longer found, they are left out.
+    """
+    rows = db.query(MissingPersonPhoto).filter_by(missing_person_id=missing_person_id) \
+        .order_by(MissingPersonPhoto.created_at).all()
+    if rows:
+        stale = [row for row in rows if _model_of(row) != config.EMBEDDING_MODEL]
+        if stale and embed_faces is not None:
+            images = [Image.open(io.BytesIO(row.photo)).convert("RGB") for row in stale]
+            for row, vector in zip(stale, embed_faces(images)):
+                if vector is not None:
+                    row.embedding = vector_to_bytes(vector)
+                    row.embedding_model = config.EMBEDDING_MODEL
+            logger.info(f"Embedded {len(stale)} gallery photos of {missing_person_id} "
+                        f"again with {config.EMBEDDING_MODEL}")
+        return [vector_from_bytes(row.embedding) for row in rows if _model_of(row) == config.EMBEDDING_MODEL]
+
+    legacy_vector = get_missing_vector(missing_person_id)
+    if legacy_vector is None:
+        return []
+    photo = db.query(MissingPersons.photo).filter_by(missing_person_id=missing_person_id).scalar()
+    db.add(MissingPersonPhoto(missing_person_id=missing_person_id, photo=photo,
+                              embedding=vector_to_bytes(legacy_vector), embedding_model=config.EMBEDDING_MODEL))
+    logger.info(f"Created gallery of legacy missing person {missing_person_id}")
+    return [legacy_vector]
+
+
+def match_person(db, missing_person_id: str, vectors: list[list[float]], replace: bool = False) -> int:
+    """
+    Store the template of a person's gallery and record its matches among stored frames.
+
+    Args:
+        db:                SQLAlchemy session; the caller commits.
+        missing_person_id: ID of the missing person.
+        vectors:           Per-photo vectors of the person's gallery.
+        replace:           Drop previously recorded matches first, e.g. after the gallery changed.
+
+    Returns:
+        The number of matches recorded.
+    """
+    template = template_vector(vectors)
+    store_missing(missing_person_id, template)
+    matches = search_gallery_matches(template, vectors, max_distance=config.MATCH_MAX_DISTANCE)
+    logger.info(f"Stored template of {len(vectors)} photos and retrieved {len(matches)} potential matches")
+
+    if replace:
+        db.query(MissingPersonsFrame).filter_by(missing_person_id=missing_person_id) \
+            .delete(synchronize_session=False)
+        clear_sightings(db, missing_person_id)
+    # Person row first so the frames' foreign key is satisfied, then all frames in one executemany
+    db.flush()
+    bulk_insert_frames(db, match_frame_rows(missing_person_id, matches))
+    return len(matches)
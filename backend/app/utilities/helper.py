@@ -1,8 +1,12 @@
 from PIL import Image
 import numpy as np
 import cv2
+import hashlib
+import base64
+import json
+from fastapi import Request, Response, status
 from jose import jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, time, timezone
 from app.utilities.logger_config import logger
 from app.utilities import config
 
@@ -20,4 +24,100 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, config.SECRET_KEY, algorithm=config.ALGORITHM)
\ No newline at end of file
+    return jwt.encode(to_encode, config.SECRET_KEY, algorithm=config.ALGORITHM)
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the given parts (bytes are hashed as-is)."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"|")
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an `If-None-Match` header value against an ETag (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def jpeg_response(request: Request, etag: str, load_bytes, max_age: int = config.IMAGE_CACHE_MAX_AGE,
+                  revalidate: bool = False) -> Response:
+    """
+    Build a cacheable JPEG response, answering conditional requests with `304 Not Modified`.
+    `load_bytes` is only called when the client does not already hold the current image.
+    With `revalidate`, clients must check the ETag on every use instead of caching for
+    `max_age`, for URLs that can point to a different image later.
+    """
+    cache_control = "private, no-cache" if revalidate else f"private, max-age={max_age}"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=load_bytes(), media_type="image/jpeg", headers=headers)
+
+
+def encode_cursor(values: dict) -> str:
+    """Encode keyset pagination values as an opaque URL-safe cursor."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception as err:
+        raise ValueError(f"Invalid cursor: {err}")
+    if not isinstance(values, dict):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_duration(value: str) -> float:
+    """
+    Parse a video offset such as "0:01:30.500", "01:30" or "90.5" into seconds.
+
+    Raises:
+        ValueError: If the value is not a valid offset.
+    """
+    parts = str(value).strip().split(":")
+    if not 1 <= len(parts) <= 3:
+        raise ValueError(f"Invalid timestamp: {value}")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    if seconds < 0:
+        raise ValueError(f"Invalid timestamp: {value}")
+    return seconds
+
+
+def to_utc_naive(value: datetime) -> datetime:
+    """Convert a datetime to naive UTC, the form capture times are stored in."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_time_bound(date_value: str, time_value: str = None, end: bool = False) -> datetime:
+    """
+    Combine a date (or ISO datetime) and an optional time of day into a naive UTC bound.
+
+    A date without a time covers the whole day: it starts at midnight for a lower bound and
+    ends at the last microsecond of the day for an upper bound.
+
+    Raises:
+        ValueError: If the date or time is malformed.
+    """
+    bound = to_utc_naive(datetime.fromisoformat(date_value))
+    if time_value:
+        return datetime.combine(bound.date(), time.fromisoformat(time_value))
+    if end and len(date_value) == 10:
+        return datetime.combine(bound.date(), time.max)
+    return bound
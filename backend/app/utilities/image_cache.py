@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+from app.utilities import config
+from app.utilities.logger_config import logger
+
+
+class ImageCache:
+    """
+    Thread-safe LRU cache of rendered JPEG images, bounded by the total size of the cached bytes.
+
+    Entries are (etag, jpeg_bytes) pairs so cache hits can answer conditional requests
+    without touching the database or the disk.
+    """
+
+    def __init__(self, max_bytes: int = config.IMAGE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached (etag, jpeg_bytes) pair for `key`, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, etag: str, jpeg_bytes: bytes) -> None:
+        """Cache an image, evicting least recently used entries to stay within `max_bytes`."""
+        size = len(jpeg_bytes)
+        if size > self.max_bytes:
+            logger.debug(f"Image of {size} bytes is larger than the cache, not caching {key}")
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous[1])
+            self._entries[key] = (etag, jpeg_bytes)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def get_or_load(self, key, load):
+        """
+        Return the cached (etag, jpeg_bytes) pair for `key`, calling `load()` to produce
+        and cache it on a miss.
+        """
+        entry = self.get(key)
+        if entry is None:
+            entry = load()
+            self.put(key, *entry)
+        return entry
+
+    def invalidate(self, missing_person_id: str) -> None:
+        """Drop every cached image belonging to a missing person."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == missing_person_id]:
+                _, jpeg_bytes = self._entries.pop(key)
+                self.current_bytes -= len(jpeg_bytes)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+
+# Shared cache for rendered frames and registered photos
+image_cache = ImageCache()
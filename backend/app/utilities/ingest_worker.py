@@ -0,0 +1,150 @@
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import uuid
+from app.utilities import config
+from app.utilities.logger_config import logger
+from app.utilities.frames_storage import Video_FramesStorage
+from app.utilities.job_queue import IngestQueue, ingest_queue
+from app.utilities.model_loader import ModelLoader, model_loader
+from app.database_sqlite.db import SessionLocal
+from app.database_sqlite.models.all_models import Camera, VideoHash
+
+
+class IngestWorker:
+    """
+    Processes queued videos one at a time, outside the API process.
+
+    Run as many workers as needed, on any machine sharing the database, `UPLOAD_DIR`,
+    `FRAME_DIR` and the vector store (`CHROMA_HOST`). While a job runs, a heartbeat thread
+    renews its lease and records the next frame to process, so a retried job resumes there;
+    frames and vectors are written idempotently under the job's fixed camera ID.
+    """
+
+    def __init__(self, queue: IngestQueue = ingest_queue, loader: ModelLoader = model_loader, worker_id: str = None,
+                 poll_seconds: float = config.JOB_POLL_SECONDS,
+                 heartbeat_seconds: float = config.JOB_HEARTBEAT_SECONDS):
+        self.queue = queue
+        self.loader = loader
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.poll_seconds = poll_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.jobs_done = 0
+        self.jobs_failed = 0
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        """Stop after handing the current job back to the queue."""
+        self._stop_event.set()
+
+    def run(self, once: bool = False) -> None:
+        """Claim and process jobs until stopped; with `once`, return when the queue is empty."""
+        logger.info(f"Ingest worker {self.worker_id} started")
+        while not self._stop_event.is_set():
+            for job in self.queue.requeue_stale():
+                self._abandon(job)
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                if once:
+                    break
+                self._stop_event.wait(self.poll_seconds)
+                continue
+            self.process(job)
+        logger.info(f"Ingest worker {self.worker_id} stopped: {self.jobs_done} done, {self.jobs_failed} failed")
+
+    def process(self, job) -> None:
+        storage = Video_FramesStorage(
+            detection_model=self.loader.get(),
+            store_crops=job.store_crops,
+            started_at=job.recorded_at,
+            cam_id=job.cam_id.removeprefix("cam-")
+        )
+        video_path = os.path.join(config.UPLOAD_DIR, job.video_path)
+        progress = {"position": job.position}
+        lease_lost = threading.Event()
+        job_ended = threading.Event()
+
+        def heartbeat():
+            while not job_ended.wait(self.heartbeat_seconds):
+                if not self.queue.heartbeat(job.job_id, self.worker_id, progress["position"],
+                                            job.faces_stored + storage.faces_stored):
+                    logger.warning(f"Ingest job {job.job_id} was taken from worker {self.worker_id}")
+                    lease_lost.set()
+                    return
+
+        def on_progress(next_frame: int) -> bool:
+            progress["position"] = next_frame
+            return not (lease_lost.is_set() or self._stop_event.is_set())
+
+        heartbeat_thread = threading.Thread(target=heartbeat, name=f"heartbeat-{job.job_id}", daemon=True)
+        heartbeat_thread.start()
+        try:
+            finished = storage.extract_frames(video_path, job.frame_skip, start_frame=job.position,
+                                              remove_video=False, on_progress=on_progress)
+            faces_stored = job.faces_stored + storage.faces_stored
+            if lease_lost.is_set():
+                return
+            if self._stop_event.is_set() and not finished:
+                self.queue.release(job.job_id, self.worker_id, progress["position"], faces_stored)
+                logger.info(f"Handed ingest job {job.job_id} back at frame {progress['position']}")
+                return
+            if not finished:
+                raise FileNotFoundError(f"Video {video_path} is not readable from this worker")
+
+            with SessionLocal() as db:
+                db.merge(Camera(cam_id=job.cam_id, source=job.filename, started_at=storage.started_at,
+                                fps=storage.fps))
+                if job.content_hash:
+                    hash_row = db.get(VideoHash, job.content_hash)
+                    if hash_row is not None:
+                        hash_row.status = "done"
+                db.commit()
+            if self.queue.complete(job.job_id, self.worker_id, progress["position"], faces_stored):
+                self.jobs_done += 1
+                self._remove_video(video_path)
+                logger.info(f"Ingest job {job.job_id} done: {faces_stored} faces stored as {job.cam_id}")
+
+        except Exception as err:
+            logger.exception(f"Ingest job {job.job_id} failed on worker {self.worker_id}")
+            if self.queue.fail(job.job_id, self.worker_id, str(err), position=progress["position"]) == "failed":
+                self.jobs_failed += 1
+                self._abandon(job)
+
+        finally:
+            job_ended.set()
+            heartbeat_thread.join()
+
+    def _abandon(self, job) -> None:
+        """Clean up after a job that failed for good, so the video can be uploaded again."""
+        if job.content_hash:
+            with SessionLocal() as db:
+                db.query(VideoHash).filter_by(content_hash=job.content_hash, status="processing").delete()
+                db.commit()
+        self._remove_video(os.path.join(config.UPLOAD_DIR, job.video_path))
+
+    @staticmethod
+    def _remove_video(path: str) -> None:
+        try:
+            if os.path.exists(path):
+                os.remove(path)
+                logger.info(f"Removed the video file in path {path}")
+        except OSError as err:
+            logger.error(f"Error removing video file {path}: {err}")
+
+
+if __name__ == "__main__":
+    # Standalone worker: python -m app.utilities.ingest_worker [--once]
+    parser = argparse.ArgumentParser(description="Process queued video ingest jobs.")
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    parser.add_argument("--worker-id", default=None, help="Name reported in job status, host-pid by default")
+    parser.add_argument("--poll-seconds", type=float, default=config.JOB_POLL_SECONDS)
+    args = parser.parse_args()
+
+    worker = IngestWorker(worker_id=args.worker_id, poll_seconds=args.poll_seconds)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: worker.stop())
+    worker.run(once=args.once)
+    sys.exit(0)
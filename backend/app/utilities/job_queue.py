@@ -0,0 +1,181 @@
+import datetime
+from sqlalchemy import func
+from app.utilities import config
+from app.utilities.logger_config import logger
+from app.database_sqlite.db import SessionLocal
+from app.database_sqlite.models.all_models import IngestJob
+
+# Columns reported by `IngestQueue.info`
+JOB_FIELDS = ("job_id", "status", "filename", "cam_id", "frame_skip", "attempts", "max_attempts", "worker_id",
+              "position", "faces_stored", "error")
+
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+class IngestQueue:
+    """
+    Queue of video processing jobs kept in the SQL database, shared by the API and ingest workers.
+
+    Any number of worker processes, on any machine that reaches the database and the shared
+    upload, frame and vector storage, claim jobs with a conditional UPDATE, so a job is only
+    ever handed to one worker. Running jobs are leased: their worker heartbeats, and a job
+    whose heartbeat stops (crashed or partitioned worker) is requeued. Failed jobs are retried
+    with exponential backoff until `max_attempts`, resuming at the last reported frame.
+
+    SQLite works for workers on one machine; use a server database (`DB_URL`) across machines.
+    """
+
+    def __init__(self, session_factory=SessionLocal,
+                 heartbeat_timeout: float = config.JOB_HEARTBEAT_TIMEOUT_SECONDS,
+                 max_attempts: int = config.JOB_MAX_ATTEMPTS,
+                 retry_backoff: float = config.JOB_RETRY_BACKOFF_SECONDS):
+        self.session_factory = session_factory
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+    def enqueue(self, video_path: str, cam_id: str, frame_skip: int, store_crops: bool = config.STORE_FACE_CROPS,
+                recorded_at: datetime.datetime = None, filename: str = None, content_hash: str = None) -> str:
+        """Queue a video for processing and return the job ID."""
+        with self.session_factory() as db:
+            job = IngestJob(video_path=video_path, cam_id=cam_id, frame_skip=max(1, frame_skip),
+                            store_crops=store_crops, recorded_at=recorded_at, filename=filename,
+                            content_hash=content_hash, max_attempts=self.max_attempts, available_at=_utcnow())
+            db.add(job)
+            db.commit()
+            logger.info(f"Queued ingest job {job.job_id} for {filename} as {cam_id}")
+            return job.job_id
+
+    def claim(self, worker_id: str, candidates: int = 5):
+        """
+        Lease the oldest available job to `worker_id`.
+
+        Returns:
+            The claimed job, detached from its session, or None if no job is available.
+        """
+        now = _utcnow()
+        with self.session_factory() as db:
+            job_ids = [row.job_id for row in db.query(IngestJob.job_id)
+                       .filter(IngestJob.status == "queued", IngestJob.available_at <= now)
+                       .order_by(IngestJob.available_at, IngestJob.created_at)
+                       .limit(candidates)]
+            for job_id in job_ids:
+                # Only one worker's UPDATE matches while the job is still queued
+                claimed = db.query(IngestJob)\
+                    .filter(IngestJob.job_id == job_id, IngestJob.status == "queued")\
+                    .update({"status": "running", "worker_id": worker_id, "heartbeat_at": now,
+                             "attempts": IngestJob.attempts + 1}, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    job = db.get(IngestJob, job_id)
+                    db.expunge(job)
+                    logger.info(f"Worker {worker_id} claimed ingest job {job_id} (attempt {job.attempts})")
+                    return job
+        return None
+
+    def _update_lease(self, job_id: str, worker_id: str, values: dict) -> bool:
+        """Update a job only while `worker_id` still holds it; False if the lease was lost."""
+        with self.session_factory() as db:
+            updated = db.query(IngestJob)\
+                .filter(IngestJob.job_id == job_id, IngestJob.worker_id == worker_id, IngestJob.status == "running")\
+                .update(values, synchronize_session=False)
+            db.commit()
+        return updated == 1
+
+    def heartbeat(self, job_id: str, worker_id: str, position: int, faces_stored: int) -> bool:
+        """Renew the lease and record progress; False if the job was requeued meanwhile."""
+        return self._update_lease(job_id, worker_id, {
+            "heartbeat_at": _utcnow(), "position": position, "faces_stored": faces_stored
+        })
+
+    def complete(self, job_id: str, worker_id: str, position: int, faces_stored: int) -> bool:
+        return self._update_lease(job_id, worker_id, {
+            "status": "done", "position": position, "faces_stored": faces_stored,
+            "error": None, "finished_at": _utcnow()
+        })
+
+    def release(self, job_id: str, worker_id: str, position: int, faces_stored: int) -> bool:
+        """Hand a job back without counting the attempt, e.g. when its worker shuts down."""
+        return self._update_lease(job_id, worker_id, {
+            "status": "queued", "worker_id": None, "position": position, "faces_stored": faces_stored,
+            "attempts": IngestJob.attempts - 1, "available_at": _utcnow()
+        })
+
+    def _retry_or_fail(self, job: IngestJob, error: str) -> dict:
+        if job.attempts < job.max_attempts:
+            delay = self.retry_backoff * 2 ** max(job.attempts - 1, 0)
+            return {"status": "queued", "worker_id": None, "error": error,
+                    "available_at": _utcnow() + datetime.timedelta(seconds=delay)}
+        return {"status": "failed", "error": error, "finished_at": _utcnow()}
+
+    def fail(self, job_id: str, worker_id: str, error: str, position: int = None) -> str:
+        """
+        Record a failed attempt: the job is queued again after a backoff, or marked failed
+        once it used up its attempts.
+
+        Returns:
+            The job's new status, or None if the worker no longer held the job.
+        """
+        with self.session_factory() as db:
+            job = db.get(IngestJob, job_id)
+            if job is None or job.worker_id != worker_id or job.status != "running":
+                return None
+            values = self._retry_or_fail(job, error)
+            if position is not None:
+                values["position"] = position
+            db.query(IngestJob)\
+                .filter(IngestJob.job_id == job_id, IngestJob.worker_id == worker_id, IngestJob.status == "running")\
+                .update(values, synchronize_session=False)
+            db.commit()
+        logger.warning(f"Ingest job {job_id} attempt failed ({error}), now {values['status']}")
+        return values["status"]
+
+    def requeue_stale(self) -> list[IngestJob]:
+        """
+        Take back running jobs whose worker stopped heartbeating.
+
+        Returns:
+            The jobs that ran out of attempts and were marked failed, for their owner to clean up.
+        """
+        cutoff = _utcnow() - datetime.timedelta(seconds=self.heartbeat_timeout)
+        failed = []
+        with self.session_factory() as db:
+            stale = db.query(IngestJob).filter(IngestJob.status == "running", IngestJob.heartbeat_at < cutoff).all()
+            for job in stale:
+                values = self._retry_or_fail(job, f"Worker {job.worker_id} stopped heartbeating")
+                # Matching the old heartbeat leaves the job alone if its worker renewed the lease meanwhile
+                updated = db.query(IngestJob)\
+                    .filter(IngestJob.job_id == job.job_id, IngestJob.status == "running",
+                            IngestJob.heartbeat_at == job.heartbeat_at)\
+                    .update(values, synchronize_session=False)
+                db.commit()
+                if updated:
+                    logger.warning(f"Ingest job {job.job_id} lost its worker {job.worker_id}, now {values['status']}")
+                    if values["status"] == "failed":
+                        db.refresh(job)
+                        db.expunge(job)
+                        failed.append(job)
+        return failed
+
+    def info(self, job_id: str):
+        """Status and progress of a job, or None if it does not exist."""
+        with self.session_factory() as db:
+            job = db.get(IngestJob, job_id)
+            if job is None:
+                return None
+            info = {field: getattr(job, field) for field in JOB_FIELDS}
+            for field in ("created_at", "heartbeat_at", "finished_at"):
+                value = getattr(job, field)
+                info[field] = value.isoformat() if value else None
+            return info
+
+    def counts(self) -> dict:
+        """Number of jobs per status."""
+        with self.session_factory() as db:
+            return dict(db.query(IngestJob.status, func.count()).group_by(IngestJob.status).all())
+
+
+# Shared queue used by the API and ingest workers
+ingest_queue = IngestQueue()
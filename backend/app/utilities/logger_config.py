@@ -1,7 +1,96 @@
+import atexit
+import copy
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from datetime import datetime
+from app.utilities import config
+from app.utilities.metrics import LOG_RECORDS_DROPPED
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including `extra` fields."""
+
+    # Attributes every LogRecord has; anything else was passed through `extra`
+    RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in self.RESERVED})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text  # formatted by DroppingQueueHandler.prepare
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Rate-limit hot-path records that carry a `sample_key` (passed via `extra`).
+
+    At most one record per key is let through every `interval` seconds; the next one that
+    passes reports how many were dropped in between as `suppressed`. Records without a
+    key are never dropped.
+    """
+
+    def __init__(self, interval: float = config.LOG_SAMPLE_INTERVAL_SECONDS):
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+        self._suppressed = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample_key", None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last[key] = now
+            record.suppressed = self._suppressed.pop(key, 0)
+        if record.suppressed:
+            record.msg = f"{record.msg} ({record.suppressed} similar suppressed)"
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the listener falls behind."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Make the record safe to hand to the listener thread. Unlike `QueueHandler.prepare`,
+        the traceback is not folded into the message but kept in `exc_text`, so the file
+        formatter decides where it goes (a separate field in JSON logs).
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
 
 
 def setup_file_logger(
@@ -10,10 +99,11 @@ def setup_file_logger(
     log_file: str = None,
     level=logging.INFO,
     max_bytes=5 * 1024 * 1024,  # 5 MB
-    backup_count=5
+    backup_count=5,
+    log_format: str = config.LOG_FORMAT
 ):
     now = datetime.now()
-    
+
     # Set default log directory and file name if not provided
     if log_dir is None:
         log_dir = f"logs/{now.strftime('%d-%m-%Y')}"
@@ -30,10 +120,13 @@ def setup_file_logger(
     logger.propagate = False  # Prevent logging from bubbling up
 
     # Formatter
-    formatter = logging.Formatter(
-        fmt='%(asctime)s | %(levelname)s | %(name)s | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if log_format == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            fmt='%(asctime)s | %(levelname)s | %(threadName)s | %(name)s | %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
 
     # File handler (Rotating)
     file_handler = RotatingFileHandler(
@@ -43,10 +136,19 @@ def setup_file_logger(
 
     # Avoid duplicate handlers
     if not logger.handlers:
-        logger.addHandler(file_handler)
+        # Request and ingest threads only enqueue records; a listener thread does the file I/O
+        log_queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+        queue_handler = DroppingQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter())
+        logger.addHandler(queue_handler)
+
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
 
     return logger
 
+
 # Usage example
 logger = setup_file_logger()
-logger.info("Logger is set up and working!")
\ No newline at end of file
+logger.info("Logger is set up and working!")
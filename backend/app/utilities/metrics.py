@@ -0,0 +1,137 @@
+import bisect
+import threading
+from app.utilities import config
+
+# Default histogram buckets in seconds, from sub-millisecond stages to slow requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels, rendered in Prometheus text format."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels.get(label, "") for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}{_format_labels(self.labels, key)} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels, rendered in Prometheus text format."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(label, "") for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            series_copy = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(series_copy.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, key)} {series[-1]}"
+            yield f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Holds the process' metrics and renders them for a Prometheus scrape."""
+
+    def __init__(self, prefix: str = "godseye"):
+        self.prefix = prefix
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labels: tuple = ()) -> Counter:
+        metric = Counter(f"{self.prefix}_{name}", documentation, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(f"{self.prefix}_{name}", documentation, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry and the metrics recorded by the ingest and API paths
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "stage_seconds",
+    "Time spent per ingest stage (decode, convert, detect, embed, write_frame, write_assets, "
+    "vector_insert, vector_search, alerts).",
+    labels=("stage",)
+)
+FRAMES_DECODED = registry.counter("frames_decoded_total", "Frames decoded from videos and streams.")
+FRAMES_PROCESSED = registry.counter(
+    "frames_processed_total", "Frames run through face detection, by whether faces were found.", labels=("result",)
+)
+FRAMES_SKIPPED = registry.counter(
+    "frames_skipped_total", "Frames not run through detection, by reason (frame_skip, stream_drop).",
+    labels=("reason",)
+)
+FACES_PROCESSED = registry.counter("faces_processed_total", "Faces embedded and stored.")
+LOG_RECORDS_DROPPED = registry.counter(
+    "log_records_dropped_total", "Log records dropped because the log writer thread fell behind."
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "API request latency until the response starts, by route template.",
+    labels=("method", "route", "status")
+)
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Record the duration of an ingest stage, if metrics are enabled."""
+    if config.METRICS_ENABLED:
+        STAGE_SECONDS.observe(seconds, stage=stage)
@@ -0,0 +1,58 @@
+import threading
+import time
+from contextlib import contextmanager
+from app.utilities import config
+from app.utilities.logger_config import logger
+
+
+class ModelLoader:
+    """
+    Lazily creates the shared detection and embedding model on first use.
+
+    Importing this module does not import torch, ultralytics or facenet_pytorch, so
+    processes that never run detection (auth endpoints, CLI tools) do not pay for them.
+    Inference on the shared model is serialized through `inference_lock`.
+    """
+
+    def __init__(self, model_path: str = config.MODEL_PATH):
+        self.model_path = model_path
+        self.load_seconds = None
+        self.inference_lock = threading.Lock()
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def create(self):
+        """Create a new, unshared model instance (for long ingest jobs that run their own)."""
+        from app.utilities.yolo_facenet import Model
+        return Model(self.model_path)
+
+    def get(self):
+        """Return the shared model, loading it on the first call."""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    self._model = self.create()
+                    self.load_seconds = time.perf_counter() - start
+                    logger.info(f"Loaded detection model {self.model_path} in {self.load_seconds:.2f}s")
+        return self._model
+
+    @contextmanager
+    def use(self):
+        """Hold the shared model for one inference call."""
+        model = self.get()
+        with self.inference_lock:
+            yield model
+
+    def vectorize_primary_faces(self, images: list) -> list:
+        """`Model.vectorize_primary_faces` on the shared model."""
+        with self.use() as model:
+            return model.vectorize_primary_faces(images)
+
+
+# Shared model used by registration, bulk imports and live streams
+model_loader = ModelLoader()
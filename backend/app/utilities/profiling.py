@@ -0,0 +1,133 @@
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from app.utilities import config
+from app.utilities.logger_config import logger
+from app.utilities.metrics import observe_stage
+
+
+class StageTimer:
+    """
+    Accumulates wall time and call counts per named pipeline stage.
+
+    Used by the ingest path to break the cost of a frame down into decode, detection,
+    embedding, image writes and vector inserts. Every measurement is also recorded in
+    the `stage_seconds` metric.
+    """
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    @contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.totals[stage] += seconds
+        self.counts[stage] += 1
+        observe_stage(stage, seconds)
+
+    def reset(self) -> None:
+        self.totals.clear()
+        self.counts.clear()
+
+    def summary(self) -> dict:
+        """Total seconds, call count and mean milliseconds per stage."""
+        return {
+            stage: {
+                "total_s": total,
+                "count": self.counts[stage],
+                "mean_ms": total / self.counts[stage] * 1000 if self.counts[stage] else 0.0
+            }
+            for stage, total in self.totals.items()
+        }
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiler for one thread.
+
+    A background thread snapshots the target thread's Python stack every `interval` seconds
+    and counts identical stacks. Results are written in the collapsed-stack format read by
+    flamegraph tools (`flamegraph.pl`, speedscope): one `frame;frame;frame count` line per stack.
+    """
+
+    def __init__(self, thread_id: int = None, interval: float = config.PROFILE_INTERVAL_SECONDS):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.samples = defaultdict(int)
+        self._stop_event = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._sampler.join()
+
+    def write(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as profile_file:
+            for stack, count in sorted(self.samples.items(), key=lambda item: -item[1]):
+                profile_file.write(f"{stack} {count}\n")
+
+
+class IngestProfiler:
+    """
+    Opt-in hook that profiles ingest jobs; can be switched on at runtime through the API.
+    Each profiled job writes `<PROFILE_DIR>/<name>-<unix time>.folded`.
+    """
+
+    def __init__(self, enabled: bool = config.PROFILE_INGEST, interval: float = config.PROFILE_INTERVAL_SECONDS,
+                 profile_dir: str = config.PROFILE_DIR):
+        self.enabled = enabled
+        self.interval = interval
+        self.profile_dir = profile_dir
+
+    @contextmanager
+    def profile(self, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        profiler = SamplingProfiler(interval=self.interval)
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            path = os.path.join(self.profile_dir, f"{name}-{int(time.time())}.folded")
+            profiler.write(path)
+            logger.info(f"Wrote ingest profile of {sum(profiler.samples.values())} samples to {path}")
+
+    def profiles(self) -> list[str]:
+        """Names of the written profiles, newest first."""
+        if not os.path.isdir(self.profile_dir):
+            return []
+        names = [name for name in os.listdir(self.profile_dir) if name.endswith(".folded")]
+        return sorted(names, key=lambda name: os.path.getmtime(os.path.join(self.profile_dir, name)), reverse=True)
+
+
+# Shared hook wrapped around `Video_FramesStorage.extract_frames`
+ingest_profiler = IngestProfiler()
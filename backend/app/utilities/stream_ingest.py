@@ -0,0 +1,339 @@
+import os
+import sys
+import time
+import datetime
+import threading
+from collections import deque
+from urllib.parse import urlparse
+import cv2
+import numpy as np
+from app.utilities import config
+from app.utilities.logger_config import logger
+from app.utilities.frames_storage import Video_FramesStorage
+from app.utilities.metrics import FRAMES_DECODED, FRAMES_SKIPPED
+from app.utilities.model_loader import ModelLoader, model_loader
+
+
+def check_stream_source(source: str) -> str:
+    """
+    Validate a stream source requested through the API.
+
+    Webcam indexes and URLs with a scheme from `STREAM_URL_SCHEMES` are accepted. Local video
+    files are only accepted from inside `STREAM_FILE_DIR`, so API users cannot make the
+    server open arbitrary files.
+
+    Raises:
+        ValueError: If the source is not allowed.
+
+    Returns:
+        The source to open, with file paths resolved.
+    """
+    source = source.strip()
+    if source.isdigit():
+        return source
+    scheme = urlparse(source).scheme.lower()
+    if scheme in config.STREAM_URL_SCHEMES and "://" in source:
+        return source
+    if scheme and len(scheme) > 1:
+        raise ValueError(f"Unsupported stream URL scheme {scheme!r}, expected one of: "
+                         f"{', '.join(config.STREAM_URL_SCHEMES)}")
+    if not config.STREAM_FILE_DIR:
+        raise ValueError("File sources are disabled, set STREAM_FILE_DIR to allow them")
+    root = os.path.realpath(config.STREAM_FILE_DIR)
+    path = os.path.realpath(os.path.join(root, source))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        raise ValueError(f"No video file {source} in the stream file directory")
+    return path
+
+
+class LatestFrameReader(threading.Thread):
+    """
+    Reads a camera source on a dedicated thread and keeps only its most recent frame.
+
+    Frames that are not consumed before the next one arrives are dropped, so a slow consumer
+    always works on live video instead of an ever-growing backlog. Lost streams are reopened
+    with exponential backoff. File sources stand in for live cameras: they are paced at their
+    native frame rate and end (or loop) when exhausted.
+    """
+
+    def __init__(self, source: str, name: str = None, realtime: bool = None, loop: bool = False):
+        super().__init__(name=name or f"reader-{source}", daemon=True)
+        self.source = source
+        self.is_file = os.path.exists(source)
+        self.realtime = self.is_file if realtime is None else realtime
+        self.loop = loop
+        self.fps = None
+        self.connected = False
+        self.finished = False
+        self.reconnects = 0
+        self.frames_read = 0
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._latest = None  # (seq, frame, grabbed_at monotonic, captured_at unix)
+        self._seq = 0
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep for up to `seconds`, returning early when the reader is stopped."""
+        if seconds > 0:
+            self._stop_event.wait(seconds)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+
+    def _open(self):
+        # Plain integers select a local webcam
+        cap = cv2.VideoCapture(int(self.source) if self.source.isdigit() else self.source)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        return cap
+
+    def _publish(self, frame) -> None:
+        with self._condition:
+            self._seq += 1
+            self.frames_read += 1
+            self._latest = (self._seq, frame, time.monotonic(), time.time())
+            self._condition.notify_all()
+        FRAMES_DECODED.inc()
+
+    def read_latest(self, last_seq: int, timeout: float = 1.0):
+        """
+        Wait for a frame newer than `last_seq`.
+
+        Returns:
+            (seq, frame, grabbed_at, captured_at) of the newest frame, or None on timeout,
+            stop, or when a file source is exhausted.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: (self._latest is not None and self._latest[0] > last_seq)
+                or self.finished or self.stopped,
+                timeout=timeout
+            )
+            if self._latest is not None and self._latest[0] > last_seq:
+                return self._latest
+            return None
+
+    def run(self) -> None:
+        backoff = config.STREAM_RECONNECT_MIN_SECONDS
+        while not self.stopped:
+            cap = self._open()
+            if cap is None:
+                self.reconnects += 1
+                logger.warning(f"Could not open stream {self.source}, retrying in {backoff:.1f}s")
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, config.STREAM_RECONNECT_MAX_SECONDS)
+                continue
+
+            self.connected = True
+            backoff = config.STREAM_RECONNECT_MIN_SECONDS
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or None
+            frame_interval = 1 / self.fps if self.realtime and self.fps else 0
+            next_due = time.monotonic()
+            logger.info(f"Stream {self.source} opened (fps={self.fps})")
+
+            while not self.stopped:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                self._publish(frame)
+                if frame_interval:
+                    next_due += frame_interval
+                    self._stop_event.wait(max(0.0, next_due - time.monotonic()))
+
+            cap.release()
+            self.connected = False
+            if self.stopped:
+                break
+            if self.is_file:
+                if self.loop:
+                    continue
+                logger.info(f"File stream {self.source} finished")
+                with self._condition:
+                    self.finished = True
+                    self._condition.notify_all()
+                break
+
+            self.reconnects += 1
+            logger.warning(f"Stream {self.source} lost, reconnecting in {backoff:.1f}s")
+            self._stop_event.wait(backoff)
+            backoff = min(backoff * 2, config.STREAM_RECONNECT_MAX_SECONDS)
+
+
+class CameraStream:
+    """
+    Ingests one live source: a `LatestFrameReader` plus a worker thread that detects,
+    embeds and stores faces of the newest frame, recording end-to-end latency per frame.
+    """
+
+    def __init__(self, source: str, detection_model, model_lock: threading.Lock,
+                 max_fps: float = config.STREAM_MAX_FPS, store_crops: bool = config.STORE_FACE_CROPS,
+                 loop: bool = False):
+        self.source = source
+        # The model is shared between cameras and not thread-safe; the storage holds `model_lock`
+        # only while detecting and embedding, so disk, vector store and alert I/O run in parallel
+        self.storage = Video_FramesStorage(detection_model=detection_model, store_crops=store_crops,
+                                           model_lock=model_lock)
+        self.cam_id = f"cam-{self.storage.cam_id}"
+        self.max_fps = max_fps
+        self.reader = LatestFrameReader(source, name=f"reader-{self.cam_id}", loop=loop)
+        self.worker = threading.Thread(target=self._run, name=f"ingest-{self.cam_id}", daemon=True)
+        self.latencies = deque(maxlen=config.STREAM_LATENCY_WINDOW)
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.faces_stored = 0
+        self.errors = 0
+        self.last_error = None
+
+    def start(self) -> None:
+        self.reader.start()
+        self.worker.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self.reader.stop()
+        self.worker.join(timeout)
+        self.reader.join(timeout)
+
+    def _run(self) -> None:
+        started_epoch = self.storage.started_at.replace(tzinfo=datetime.timezone.utc).timestamp()
+        min_interval = 1 / self.max_fps if self.max_fps else 0
+        last_seq = 0
+
+        while not self.reader.stopped:
+            latest = self.reader.read_latest(last_seq)
+            if latest is None:
+                if self.reader.finished:
+                    break
+                continue
+
+            seq, frame, grabbed_at, captured_at = latest
+            if seq - last_seq > 1:
+                self.frames_dropped += seq - last_seq - 1
+                FRAMES_SKIPPED.inc(seq - last_seq - 1, reason="stream_drop")
+            last_seq = seq
+            try:
+                self.faces_stored += self.storage.process_frame(
+                    frame, seq, captured_at - started_epoch, captured_at=captured_at
+                )
+            except Exception as err:
+                self.errors += 1
+                self.last_error = str(err)
+                logger.exception(f"Error processing frame {seq} of {self.cam_id}",
+                                 extra={"sample_key": f"frame_error:{self.cam_id}"})
+            self.frames_processed += 1
+            self.latencies.append(time.monotonic() - grabbed_at)
+
+            if min_interval:
+                self.reader.sleep(min_interval - (time.monotonic() - grabbed_at))
+
+    @property
+    def status(self) -> str:
+        if self.reader.finished:
+            return "finished"
+        if self.reader.stopped:
+            return "stopped"
+        return "streaming" if self.reader.connected else "connecting"
+
+    def stats(self) -> dict:
+        """Counters and end-to-end latency (grab to stored) percentiles in milliseconds."""
+        latencies = np.array(self.latencies) * 1000
+        return {
+            "cam_id": self.cam_id,
+            "source": self.source,
+            "status": self.status,
+            "fps": self.reader.fps,
+            "frames_read": self.reader.frames_read,
+            "frames_processed": self.frames_processed,
+            "frames_dropped": self.frames_dropped,
+            "faces_stored": self.faces_stored,
+            "reconnects": self.reader.reconnects,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "latency_ms": {
+                "last": float(latencies[-1]) if latencies.size else None,
+                "p50": float(np.percentile(latencies, 50)) if latencies.size else None,
+                "p95": float(np.percentile(latencies, 95)) if latencies.size else None,
+                "max": float(latencies.max()) if latencies.size else None
+            }
+        }
+
+
+class StreamIngestService:
+    """
+    Manages many concurrent camera streams sharing one lazily loaded detection model.
+    """
+
+    def __init__(self, loader: ModelLoader = model_loader):
+        # Streams share the API's model (and its inference lock) instead of loading another copy
+        self._loader = loader
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def add_stream(self, source: str, max_fps: float = config.STREAM_MAX_FPS,
+                   store_crops: bool = config.STORE_FACE_CROPS, loop: bool = False) -> CameraStream:
+        """Start ingesting `source` (RTSP/HTTP URL, file path or webcam index) as a new camera."""
+        stream = CameraStream(source, self._loader.get(), self._loader.inference_lock,
+                              max_fps=max_fps, store_crops=store_crops, loop=loop)
+        with self._lock:
+            self._streams[stream.cam_id] = stream
+        stream.start()
+        logger.info(f"Started stream ingestion of {source} as {stream.cam_id}")
+        return stream
+
+    def remove_stream(self, cam_id: str) -> bool:
+        """Stop and forget a stream; returns False if it is unknown."""
+        with self._lock:
+            stream = self._streams.pop(cam_id, None)
+        if stream is None:
+            return False
+        stream.stop()
+        logger.info(f"Stopped stream ingestion of {stream.source} ({cam_id})")
+        return True
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            streams = list(self._streams.values())
+        return [stream.stats() for stream in streams]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            cam_ids = list(self._streams)
+        for cam_id in cam_ids:
+            self.remove_stream(cam_id)
+
+
+# Shared service used by the API
+stream_service = StreamIngestService()
+
+
+if __name__ == "__main__":
+    # Standalone service: python -m app.utilities.stream_ingest <source> [<source> ...]
+    if len(sys.argv) < 2:
+        print("usage: python -m app.utilities.stream_ingest <rtsp-url|file|webcam-index> ...")
+        sys.exit(2)
+
+    from app.database_sqlite.db import SessionLocal
+    from app.database_sqlite.models.all_models import Camera
+
+    streams = [stream_service.add_stream(source) for source in sys.argv[1:]]
+    with SessionLocal() as db:
+        for stream in streams:
+            db.add(Camera(cam_id=stream.cam_id, source=stream.source, started_at=stream.storage.started_at))
+        db.commit()
+
+    try:
+        while any(stream.status != "finished" for stream in streams):
+            time.sleep(config.STREAM_STATS_INTERVAL_SECONDS)
+            for stats in stream_service.stats():
+                logger.info(f"Stream stats: {stats}")
+                print(stats)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stream_service.shutdown()
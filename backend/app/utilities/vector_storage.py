@@ -1,25 +1,109 @@
-from chromadb import PersistentClient
+import threading
+import time
+import numpy as np
+from app.utilities import config
 from app.utilities.logger_config import logger
+from app.utilities.metrics import observe_stage
 
-# Initialize the Chroma client and collections once at module load
-db_path = "./databases/chroma_db"
-client = PersistentClient(path=db_path)
 
-# Collections for storing frame face vectors and missing-person embeddings
-face_collection = client.get_or_create_collection(
-    name="face_vectors",
-    metadata={"hnsw:space": "cosine"}
-)
-missing_collection = client.get_or_create_collection(
-    name="missing_person",
-    metadata={"hnsw:space": "cosine"}
-)
+def hnsw_metadata(m: int = config.HNSW_M,
+                  construction_ef: int = config.HNSW_CONSTRUCTION_EF,
+                  search_ef: int = config.HNSW_SEARCH_EF) -> dict:
+    """
+    Collection metadata for a cosine HNSW index. Chroma only applies it when a collection
+    is created; existing collections keep the parameters they were built with.
+    """
+    return {
+        "hnsw:space": "cosine",
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:search_ef": search_ef
+    }
+
+
+def collection_name(base: str, model_id: str = config.EMBEDDING_MODEL) -> str:
+    """
+    Name of the collection holding `model_id` vectors. Vectors of different embedding models
+    are not comparable, so each model has its own collections; the legacy model keeps the
+    original names.
+    """
+    return base if model_id == config.LEGACY_EMBEDDING_MODEL else f"{base}__{model_id}"
+
+
+def _open_collection(client, base: str, metadata: dict, model_id: str = config.EMBEDDING_MODEL):
+    collection = client.get_or_create_collection(
+        name=collection_name(base, model_id),
+        metadata={**metadata, "embedding_model": model_id}
+    )
+    stored_model = (collection.metadata or {}).get("embedding_model", config.LEGACY_EMBEDDING_MODEL)
+    if stored_model != model_id:
+        raise RuntimeError(f"Collection {collection.name} holds {stored_model} vectors, not {model_id}")
+    return collection
+
+
+# Recorded with every stored vector; Chroma itself rejects vectors of another dimension
+def _embedding_metadata(vector) -> dict:
+    return {"embedding_model": config.EMBEDDING_MODEL, "embedding_dim": len(vector)}
+
+
+# The Chroma client and collections are opened on first use, not at import
+db_path = config.CHROMA_DB_PATH
+_client = None
+_collections = {}
+_init_lock = threading.Lock()
+
+
+def _open_store() -> None:
+    global _client
+    with _init_lock:
+        if _client is not None:
+            return
+        start = time.perf_counter()
+        if config.CHROMA_HOST:
+            # A Chroma server lets the API and ingest workers on other machines share one store
+            from chromadb import HttpClient
+            client = HttpClient(host=config.CHROMA_HOST, port=config.CHROMA_PORT)
+        else:
+            from chromadb import PersistentClient
+            client = PersistentClient(path=db_path)
+        # Collections for storing frame face vectors and missing-person embeddings
+        _collections["face_vectors"] = _open_collection(client, "face_vectors", hnsw_metadata())
+        _collections["missing_person"] = _open_collection(client, "missing_person", {"hnsw:space": "cosine"})
+        _client = client
+        location = f"{config.CHROMA_HOST}:{config.CHROMA_PORT}" if config.CHROMA_HOST else db_path
+        logger.info(f"Opened vector store at {location} in {time.perf_counter() - start:.2f}s")
+
+
+def is_open() -> bool:
+    return _client is not None
+
+
+def get_client():
+    """Return the Chroma client, opening the store on the first call."""
+    if _client is None:
+        _open_store()
+    return _client
+
+
+def get_face_collection():
+    if _client is None:
+        _open_store()
+    return _collections["face_vectors"]
+
+
+def get_missing_collection():
+    if _client is None:
+        _open_store()
+    return _collections["missing_person"]
+
 
 def store_frame_vectors(cam_id: str,
                         frame_id: str,
                         bounding_boxes: list[tuple[float, float, float, float]],
                         vectors: list[list[float]],
-                        timestamp: float) -> None:
+                        timestamp: str,
+                        timestamp_seconds: float = None,
+                        captured_at: float = None) -> None:
     """
     Store face embeddings for a single video frame.
 
@@ -28,7 +112,9 @@ def store_frame_vectors(cam_id: str,
         frame_id:     Identifier for the video frame.
         bounding_boxes: List of (x, y, w, h) tuples for each face.
         vectors:      List of corresponding embedding vectors.
-        timestamp:    Unix timestamp for when the frame was captured.
+        timestamp:    Offset of the frame into the video, e.g. "0:00:03.000".
+        timestamp_seconds: Offset of the frame into the video in seconds.
+        captured_at:  Unix timestamp for when the frame was captured.
     """
     if len(bounding_boxes) != len(vectors):
         logger.error("Number of bounding boxes must match number of vectors.")
@@ -45,10 +131,18 @@ def store_frame_vectors(cam_id: str,
             "y": y,
             "w": w,
             "h": h,
-            "timestamp": timestamp
+            "face_idx": idx,
+            "timestamp": timestamp,
+            **_embedding_metadata(vector)
         }
+        # Chroma rejects None metadata values, so optional fields are only set when known
+        if timestamp_seconds is not None:
+            metadata["timestamp_seconds"] = timestamp_seconds
+        if captured_at is not None:
+            metadata["captured_at"] = captured_at
 
-        face_collection.add(
+        # Upsert, so a retried ingest job rewrites the faces it already stored instead of failing
+        get_face_collection().upsert(
             ids=[unique_id],
             embeddings=[vector],
             metadatas=[metadata],
@@ -64,10 +158,10 @@ def store_missing(person_id: str, vector: list[float]) -> None:
         person_id: Unique identifier for the person.
         vector:    Embedding vector for the person's face.
     """
-    metadata = {"person_id": person_id}
+    metadata = {"person_id": person_id, **_embedding_metadata(vector)}
 
     # Use upsert to overwrite any existing embedding for the same ID
-    missing_collection.upsert(
+    get_missing_collection().upsert(
         ids=[person_id],
         embeddings=[vector],
         metadatas=[metadata],
@@ -75,6 +169,36 @@ def store_missing(person_id: str, vector: list[float]) -> None:
     )
 
 
+def store_missing_batch(person_ids: list[str], vectors: list[list[float]]) -> None:
+    """
+    Store the embeddings of many missing persons, in as few upsert calls as Chroma allows.
+
+    Args:
+        person_ids: Unique identifiers, one per vector.
+        vectors:    Embedding vectors for the persons' faces.
+    """
+    if len(person_ids) != len(vectors):
+        raise ValueError("Number of person IDs must match number of vectors.")
+
+    max_batch_size = get_client().get_max_batch_size()
+    for start in range(0, len(person_ids), max_batch_size):
+        ids = person_ids[start:start + max_batch_size]
+        get_missing_collection().upsert(
+            ids=ids,
+            embeddings=vectors[start:start + max_batch_size],
+            metadatas=[{"person_id": person_id, **_embedding_metadata(vector)}
+                       for person_id, vector in zip(ids, vectors[start:start + max_batch_size])],
+            documents=[f"Missing person {person_id}" for person_id in ids]
+        )
+
+
+def delete_missing_batch(person_ids: list[str]) -> None:
+    """Remove the embeddings of missing persons, e.g. when their registration was rolled back."""
+    max_batch_size = get_client().get_max_batch_size()
+    for start in range(0, len(person_ids), max_batch_size):
+        get_missing_collection().delete(ids=person_ids[start:start + max_batch_size])
+
+
 def search_matches(query_vector: list[float],
                    top_k: int = 2000,
                    max_distance: float = 0.5) -> list[dict]:
@@ -87,30 +211,145 @@ def search_matches(query_vector: list[float],
         max_distance:   Maximum allowable distance (cosine distance) for a match.
 
     Returns:
-        List of dicts with match info: frame_id, cam_id, score, box, timestamp.
+        List of dicts with match info: frame_id, cam_id, face_idx, score, box, timestamp,
+        timestamp_seconds and captured_at (Unix timestamp, None for older vectors).
     """
-    results = face_collection.query(
-        query_embeddings=[query_vector],
-        n_results=top_k
-    )
+    return search_matches_batch([query_vector], top_k=top_k, max_distance=max_distance)[0]
 
-    matches = []
-    distances = results.get("distances", [[]])[0]
-    metadatas = results.get("metadatas", [[]])[0]
 
+def _collect_matches(distances: list[float], metadatas: list[dict], max_distance: float) -> list[dict]:
+    matches = []
     for dist, md in zip(distances, metadatas):
         # Lower distance means more similar under cosine metric
         if dist <= max_distance:
             matches.append({
                 "cam_id": md["cam_id"],
                 "frame_id": md["frame_id"],
+                "face_idx": md.get("face_idx"),
                 "timestamp": md["timestamp"],
+                "timestamp_seconds": md.get("timestamp_seconds"),
+                "captured_at": md.get("captured_at"),
                 "score": dist,
                 "box": [md["x"], md["y"], md["w"], md["h"]]
             })
     return matches
 
 
+def search_matches_batch(query_vectors: list[list[float]],
+                         top_k: int = 2000,
+                         max_distance: float = 0.5,
+                         collection=None) -> list[list[dict]]:
+    """
+    Search stored frame vectors for many query vectors in a single query call.
+
+    Args:
+        collection: Collection to search instead of the frame vector collection, e.g. in benchmarks.
+
+    Returns:
+        One list of matches per query vector, in the format of `search_matches`.
+    """
+    if not query_vectors:
+        return []
+    start = time.perf_counter()
+    results = (collection or get_face_collection()).query(
+        query_embeddings=query_vectors,
+        n_results=top_k
+    )
+    observe_stage("vector_search", time.perf_counter() - start)
+    return [
+        _collect_matches(distances, metadatas, max_distance)
+        for distances, metadatas in zip(results.get("distances") or [[]] * len(query_vectors),
+                                        results.get("metadatas") or [[]] * len(query_vectors))
+    ]
+
+
+def template_vector(vectors: list[list[float]]) -> list[float]:
+    """
+    Aggregate the face vectors of a person's reference photos into one template:
+    the mean of the L2-normalized vectors, normalized again.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    mean = matrix.mean(axis=0)
+    return (mean / np.linalg.norm(mean)).tolist()
+
+
+def get_missing_vector(person_id: str):
+    """Return the stored (template) vector of a missing person, or None."""
+    result = get_missing_collection().get(ids=[person_id], include=["embeddings"])
+    embeddings = result.get("embeddings")
+    if embeddings is None or len(embeddings) == 0:
+        return None
+    return np.asarray(embeddings[0], dtype=np.float32).tolist()
+
+
+def search_gallery_matches_batch(templates: list[list[float]],
+                                 galleries: list[list[list[float]]],
+                                 top_k: int = 2000,
+                                 max_distance: float = 0.5,
+                                 candidate_margin: float = config.GALLERY_CANDIDATE_MARGIN) -> list[list[dict]]:
+    """
+    Search stored frame vectors with each person's template, then rescore with the gallery.
+
+    One vector search per person retrieves candidates within `max_distance + candidate_margin`
+    of the template; each candidate is then scored by its closest vector among the template
+    and the per-photo gallery vectors, and kept if that distance is within `max_distance`.
+    A face resembling only one of several reference photos is found without searching once
+    per photo. Persons with at most one gallery vector are searched with the template alone.
+
+    Args:
+        templates:        Template vector of each person.
+        galleries:        Per-photo vectors of each person, in the same order.
+        top_k:            Number of nearest neighbors to retrieve per person.
+        max_distance:     Maximum allowable distance (cosine distance) for a match.
+        candidate_margin: Extra distance allowed for candidates before rescoring.
+
+    Returns:
+        One list of matches per person, in the format of `search_matches`, closest first.
+    """
+    if not templates:
+        return []
+    rescore = any(len(gallery) > 1 for gallery in galleries)
+    start = time.perf_counter()
+    results = get_face_collection().query(
+        query_embeddings=templates,
+        n_results=top_k,
+        include=["metadatas", "distances", "embeddings"] if rescore else ["metadatas", "distances"]
+    )
+    observe_stage("vector_search", time.perf_counter() - start)
+
+    all_matches = []
+    for idx, gallery in enumerate(galleries):
+        distances = results["distances"][idx]
+        metadatas = results["metadatas"][idx]
+        if len(gallery) <= 1 or not distances:
+            all_matches.append(_collect_matches(distances, metadatas, max_distance))
+            continue
+
+        candidates = [i for i, dist in enumerate(distances) if dist <= max_distance + candidate_margin]
+        if not candidates:
+            all_matches.append([])
+            continue
+        embeddings = np.asarray([results["embeddings"][idx][i] for i in candidates], dtype=np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        references = np.asarray(gallery, dtype=np.float32)
+        references /= np.linalg.norm(references, axis=1, keepdims=True)
+        gallery_distances = (1 - embeddings @ references.T).min(axis=1)
+        rescored = np.minimum(gallery_distances, [distances[i] for i in candidates])
+
+        matches = _collect_matches(rescored.tolist(), [metadatas[i] for i in candidates], max_distance)
+        all_matches.append(sorted(matches, key=lambda match: match["score"]))
+    return all_matches
+
+
+def search_gallery_matches(template: list[float],
+                           gallery: list[list[float]],
+                           top_k: int = 2000,
+                           max_distance: float = 0.5) -> list[dict]:
+    """Search matches for a single person, see `search_gallery_matches_batch`."""
+    return search_gallery_matches_batch([template], [gallery], top_k=top_k, max_distance=max_distance)[0]
+
+
 def store_and_search_missing(person_id: str,
                               query_vector: list[float],
                               top_k: int = 2000,
@@ -119,4 +358,40 @@ def store_and_search_missing(person_id: str,
     Store a missing-person embedding and then search for matches in stored frame vectors.
     """
     store_missing(person_id, query_vector)
-    return search_matches(query_vector, top_k=top_k, max_distance=max_distance)
\ No newline at end of file
+    return search_matches(query_vector, top_k=top_k, max_distance=max_distance)
+
+
+def match_missing_persons(vectors: list[list[float]],
+                          max_distance: float = 0.5) -> list[dict]:
+    """
+    Find the closest registered missing person for each face vector of a frame.
+
+    Args:
+        vectors:      Face embeddings of one frame, queried in a single call.
+        max_distance: Maximum allowable distance (cosine distance) for a match.
+
+    Returns:
+        List of dicts with match info: face_idx, person_id, score.
+    """
+    if not vectors:
+        return []
+    missing_collection = get_missing_collection()
+    if missing_collection.count() == 0:
+        return []
+
+    start = time.perf_counter()
+    results = missing_collection.query(
+        query_embeddings=vectors,
+        n_results=1
+    )
+    observe_stage("vector_search", time.perf_counter() - start)
+
+    matches = []
+    for face_idx, (distances, metadatas) in enumerate(zip(results["distances"], results["metadatas"])):
+        if distances and distances[0] <= max_distance:
+            matches.append({
+                "face_idx": face_idx,
+                "person_id": metadatas[0]["person_id"],
+                "score": distances[0]
+            })
+    return matches
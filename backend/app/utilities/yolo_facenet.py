@@ -1,3 +1,5 @@
+import os
+from abc import ABC, abstractmethod
 import torch
 import numpy as np
 import cv2
@@ -5,20 +7,125 @@ from ultralytics import YOLO
 from facenet_pytorch import InceptionResnetV1
 from torchvision import transforms
 from PIL import Image
+from app.utilities import config
 from app.utilities.logger_config import logger
 
-class Model:
-    def __init__(self, model_path="C:/Users/tharu/OneDrive/Desktop/godseye/backend/yolov11l-face.pt"):
-        self.yolo = YOLO(model_path)
-        self.facenet = InceptionResnetV1(pretrained='vggface2').eval()
+
+class EmbeddingBackend(ABC):
+    """
+    A face embedding model. `model_id` and `dim` are recorded with every stored vector,
+    and each model gets its own vector collections, so embeddings of different models are
+    never compared with each other.
+    """
+    model_id = None
+    dim = None
+
+    @abstractmethod
+    def embed(self, faces: list) -> list[list[float]]:
+        """Embed face crops (PIL images) in one batch."""
+
+
+class FaceNetBackend(EmbeddingBackend):
+    """InceptionResnetV1 from facenet-pytorch: 160x160 input, 512-d output."""
+    dim = 512
+
+    def __init__(self, pretrained: str = "vggface2"):
+        self.model_id = f"facenet-{pretrained}"
+        self.facenet = InceptionResnetV1(pretrained=pretrained).eval()
         self.transform = transforms.Compose([
             transforms.Resize((160, 160)),
             transforms.ToTensor(),
             transforms.Normalize(mean=[0.5, 0.5, 0.5], std=[0.5, 0.5, 0.5])
         ])
 
+    def embed(self, faces: list) -> list[list[float]]:
+        batch = torch.stack([self.transform(face) for face in faces])
+        with torch.no_grad():
+            embeddings = self.facenet(batch)
+        return embeddings.numpy().tolist()
+
+
+class OnnxArcFaceBackend(EmbeddingBackend):
+    """
+    ArcFace-style ONNX model run with onnxruntime: RGB input scaled to [-1, 1].
+
+    Used for MobileFaceNet (`w600k_mbf.onnx` from the insightface buffalo_s pack, 112x112,
+    512-d), a mobile-class model for high-throughput cameras; `benchmarks.embedding_benchmark`
+    compares its speed and accuracy with FaceNet.
+    """
+
+    def __init__(self, model_id: str, model_path: str, input_size: int = 112):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError(f"The {model_id} embedding backend requires onnxruntime: pip install onnxruntime")
+        if not os.path.isfile(model_path):
+            raise FileNotFoundError(f"The {model_id} embedding backend needs its ONNX weights at {model_path}")
+        self.model_id = model_id
+        self.input_size = input_size
+        self.session = onnxruntime.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.dim = self.session.get_outputs()[0].shape[-1]
+
+    def embed(self, faces: list) -> list[list[float]]:
+        size = (self.input_size, self.input_size)
+        batch = np.stack([np.asarray(face.convert("RGB").resize(size), dtype=np.float32) for face in faces])
+        batch = ((batch - 127.5) / 127.5).transpose(0, 3, 1, 2)
+        return self.session.run(None, {self.input_name: batch})[0].tolist()
+
+
+class DeepFaceBackend(EmbeddingBackend):
+    """DeepFace recognition models (ArcFace, Facenet512, ...) on already detected faces. Requires deepface."""
+
+    DIMS = {"ArcFace": 512, "Facenet512": 512, "Facenet": 128, "SFace": 128}
+
+    def __init__(self, model_name: str):
+        try:
+            from deepface import DeepFace
+        except ImportError:
+            raise ImportError(f"The deepface-{model_name} embedding backend requires deepface: pip install deepface")
+        self.deepface = DeepFace
+        self.model_name = model_name
+        self.model_id = f"deepface-{model_name}"
+        self.dim = self.DIMS[model_name]
+
+    def embed(self, faces: list) -> list[list[float]]:
+        # DeepFace takes BGR arrays; detection already happened, so its own detector is skipped
+        return [
+            self.deepface.represent(cv2.cvtColor(np.asarray(face.convert("RGB")), cv2.COLOR_RGB2BGR),
+                                    model_name=self.model_name, detector_backend="skip",
+                                    enforce_detection=False)[0]["embedding"]
+            for face in faces
+        ]
+
+
+# Selectable embedding backends by model ID, see `config.EMBEDDING_MODEL`
+EMBEDDING_BACKENDS = {
+    "facenet-vggface2": lambda: FaceNetBackend("vggface2"),
+    "facenet-casia-webface": lambda: FaceNetBackend("casia-webface"),
+    "mobilefacenet": lambda: OnnxArcFaceBackend("mobilefacenet", config.MOBILEFACENET_PATH),
+    "deepface-ArcFace": lambda: DeepFaceBackend("ArcFace"),
+    "deepface-Facenet512": lambda: DeepFaceBackend("Facenet512"),
+}
+
+
+def create_embedding_backend(model_id: str = config.EMBEDDING_MODEL) -> EmbeddingBackend:
+    if model_id not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding model {model_id}, expected one of: {', '.join(EMBEDDING_BACKENDS)}")
+    backend = EMBEDDING_BACKENDS[model_id]()
+    logger.info(f"Loaded embedding backend {backend.model_id} ({backend.dim}-d)")
+    return backend
+
+
+class Model:
+    def __init__(self, model_path="C:/Users/tharu/OneDrive/Desktop/godseye/backend/yolov11l-face.pt",
+                 embedding_model: str = config.EMBEDDING_MODEL):
+        self.yolo = YOLO(model_path)
+        self.embedder = create_embedding_backend(embedding_model)
+
     def _get_results(self, image: Image, show=False):
-        results = self.yolo(image)
+        # verbose=False: ultralytics otherwise prints a summary line to stdout for every frame
+        results = self.yolo(image, verbose=False)
         if show:
             for result in results:
                 result.show()
@@ -39,14 +146,50 @@ class Model:
         return cropped_images
 
     def vectorize_face(self, image: Image):
-        image_tensor = self.transform(image).unsqueeze(0)
-        with torch.no_grad():
-            embedding = self.facenet(image_tensor)
-        return embedding.numpy().squeeze().tolist()
+        return self.embedder.embed([image])[0]
+
+    def vectorize_boxes(self, image: Image, boxes):
+        """Embed the faces at already detected `boxes` in one batch, without re-running YOLO."""
+        return self.vectorize_face_batch(self.crop_images(image, boxes))
 
     def vectorize_faces(self, image: Image,padding=None):
         faces = self.crop_images(image, self.bounding_boxes(image,padding=padding))
         vectors = [self.vectorize_face(face) for face in faces]
         # return np.array(vectors)
         logger.debug(f"Length of Vecs : {len(vectors)}")
-        return vectors
\ No newline at end of file
+        return vectors
+
+    def vectorize_face_batch(self, faces: list):
+        """Embed many face crops in a single forward pass of the embedding backend."""
+        if not faces:
+            return []
+        return self.embedder.embed(faces)
+
+    def vectorize_primary_faces(self, images: list, padding=None):
+        """
+        Embed the largest detected face of each image, running detection and embedding
+        once per batch instead of once per image. Reference photos can show several people;
+        the largest face is taken to be the subject.
+
+        Returns:
+            One vector per image, None for images without a detected face.
+        """
+        if not images:
+            return []
+        results = self.yolo(images, verbose=False)
+        faces, owners = [], []
+        for idx, (image, result) in enumerate(zip(images, results)):
+            boxes = result.boxes.xyxy.cpu().numpy().tolist()
+            if padding:
+                boxes = [[x + padding if i>=2 else x for i,x in enumerate(box)] for box in boxes]
+            if boxes:
+                largest = max(boxes, key=lambda box: (box[2] - box[0]) * (box[3] - box[1]))
+                faces.extend(self.crop_images(image, [largest]))
+                owners.append(idx)
+
+        vectors = [None] * len(images)
+        for idx, vector in zip(owners, self.vectorize_face_batch(faces)):
+            vectors[idx] = vector
+        logger.debug(f"Faces found in {len(owners)} of {len(images)} images")
+        return vectors
+
@@ -0,0 +1,99 @@
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+# Results are written here unless --output is given
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def environment_info() -> dict:
+    """Describe the machine and code version a benchmark ran on."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+
+    info = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit
+    }
+    for module in ("numpy", "cv2", "torch", "ultralytics", "chromadb"):
+        if module in sys.modules:
+            info[f"{module}_version"] = getattr(sys.modules[module], "__version__", None)
+    return info
+
+
+def write_results(name: str, config: dict, results: list[dict], output: str = None) -> str:
+    """
+    Write benchmark results as JSON and return the file path.
+
+    Args:
+        name:    Benchmark name, used in the default file name.
+        config:  Parameters the benchmark ran with.
+        results: One dict per measured case; each has a "case" key identifying it across runs.
+        output:  File path, defaults to `RESULTS_DIR/<name>-<UTC timestamp>.json`.
+    """
+    if output is None:
+        stamp = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        output = os.path.join(RESULTS_DIR, f"{name}-{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    with open(output, "w") as results_file:
+        json.dump({
+            "benchmark": name,
+            "created_at": datetime.datetime.utcnow().isoformat() + "Z",
+            "environment": environment_info(),
+            "config": config,
+            "results": results
+        }, results_file, indent=2)
+    return output
+
+
+def compare_results(baseline_path: str, results: list[dict], metrics: dict, tolerance: float) -> list[str]:
+    """
+    Compare results with an earlier run of the same benchmark.
+
+    Args:
+        baseline_path: Results file of the earlier run.
+        results:       Results of this run.
+        metrics:       Metric name to +1 if higher is better, -1 if lower is better.
+        tolerance:     Relative change beyond which a metric counts as regressed, e.g. 0.1.
+
+    Returns:
+        One message per regressed metric; empty if nothing regressed.
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = {result["case"]: result for result in json.load(baseline_file)["results"]}
+
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["case"])
+        if previous is None:
+            continue
+        for metric, direction in metrics.items():
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change * direction < -tolerance:
+                regressions.append(f"{result['case']}: {metric} {old:.4g} -> {new:.4g} ({change:+.1%})")
+    return regressions
+
+
+def print_table(rows: list[dict], columns: list[str]) -> None:
+    """Print results as an aligned text table."""
+    def fmt(value):
+        return f"{value:.4g}" if isinstance(value, float) else str(value)
+
+    cells = [[fmt(row.get(column, "")) for column in columns] for row in rows]
+    widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(columns)]
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in cells:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
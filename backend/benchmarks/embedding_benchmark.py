@@ -0,0 +1,259 @@
+"""
+Embedding model benchmark: speed versus match accuracy on a local labelled sample.
+
+The sample is a folder with one subfolder of photos per identity, e.g. consented test
+portraits or an LFW subset. The largest face of every photo is detected once with YOLO and
+the same crops are embedded by each model, so only the embedding backends are compared.
+
+For each model it reports the load time and embedding throughput per batch size, and from
+the cosine distances of all photo pairs: the genuine acceptance and false acceptance rates
+at `MATCH_MAX_DISTANCE` (or `--threshold`), the threshold with the best verification
+accuracy, ROC AUC, and rank-1 identification (nearest other photo has the same identity).
+
+Usage (from the backend folder):
+    python -m benchmarks.embedding_benchmark --dataset ./labelled_faces --model-path yolov11n-face.pt
+    python -m benchmarks.embedding_benchmark --dataset ./labelled_faces --models facenet-vggface2,mobilefacenet
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.common import write_results, compare_results, print_table
+
+# Metrics checked by --compare: +1 if higher is better, -1 if lower is better
+REGRESSION_METRICS = {
+    "embed_faces_per_s": 1,
+    "tar_at_threshold": 1,
+    "auc": 1,
+    "rank1": 1
+}
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", required=True, help="Folder with one subfolder of photos per identity")
+    parser.add_argument("--models", default="facenet-vggface2,mobilefacenet",
+                        help="Embedding model IDs from yolo_facenet.EMBEDDING_BACKENDS, comma separated")
+    parser.add_argument("--model-path", default=None, help="YOLO face model weights, defaults to config.MODEL_PATH")
+    parser.add_argument("--mobilefacenet-path", default=None,
+                        help="MobileFaceNet ONNX weights, defaults to config.MOBILEFACENET_PATH")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Cosine distance counted as a match, defaults to config.MATCH_MAX_DISTANCE")
+    parser.add_argument("--batch-sizes", default="1,8,32")
+    parser.add_argument("--batches", type=int, default=5, help="Timed batches per speed case")
+    parser.add_argument("--threads", type=int, default=None, help="Torch CPU threads")
+    parser.add_argument("--workdir", default=None, help="Scratch directory, a temporary one by default")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory")
+    parser.add_argument("--output", default=None, help="Results JSON path")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative drop counted as a regression")
+    return parser.parse_args(argv)
+
+
+def load_labelled_faces(dataset: str, model_path: str) -> tuple[list, list[str]]:
+    """
+    Detect the largest face of every photo in the dataset.
+
+    Returns:
+        The face crops (PIL images) and their identity labels; photos without a face are skipped.
+    """
+    from PIL import Image
+    from ultralytics import YOLO
+
+    yolo = YOLO(model_path)
+    faces, labels, skipped = [], [], 0
+    for identity in sorted(os.listdir(dataset)):
+        folder = os.path.join(dataset, identity)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            image = Image.open(os.path.join(folder, name)).convert("RGB")
+            boxes = yolo(image, verbose=False)[0].boxes.xyxy.cpu().numpy().tolist()
+            if not boxes:
+                skipped += 1
+                continue
+            largest = max(boxes, key=lambda box: (box[2] - box[0]) * (box[3] - box[1]))
+            faces.append(image.crop(tuple(largest)))
+            labels.append(identity)
+    print(f"Loaded {len(faces)} faces of {len(set(labels))} identities, {skipped} photos without a face",
+          flush=True)
+    return faces, labels
+
+
+def embed_all(backend, faces: list, batch_size: int) -> np.ndarray:
+    vectors = []
+    for start in range(0, len(faces), batch_size):
+        vectors.extend(backend.embed(faces[start:start + batch_size]))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def roc_auc(genuine: np.ndarray, impostor: np.ndarray) -> float:
+    """Probability that a genuine pair is closer than an impostor pair (ties count half)."""
+    distances = np.concatenate([genuine, impostor])
+    order = distances.argsort(kind="mergesort")
+    ranks = np.empty(len(distances))
+    ranks[order] = np.arange(1, len(distances) + 1)
+    # Average the ranks of tied distances
+    _, inverse, counts = np.unique(distances, return_inverse=True, return_counts=True)
+    ranks = np.bincount(inverse, weights=ranks)[inverse] / counts[inverse]
+    impostor_rank_sum = ranks[len(genuine):].sum()
+    return float((impostor_rank_sum - len(impostor) * (len(impostor) + 1) / 2) / (len(genuine) * len(impostor)))
+
+
+def accuracy_metrics(vectors: np.ndarray, labels: list[str], threshold: float) -> dict:
+    """Verification and identification accuracy from the cosine distances of all photo pairs."""
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    distances = 1 - normalized @ normalized.T
+    labels = np.asarray(labels)
+    same = labels[:, None] == labels[None, :]
+    upper = np.triu(np.ones_like(same), k=1)
+    genuine = distances[same & upper]
+    impostor = distances[~same & upper]
+
+    # Sweep every observed distance as a threshold for the best balanced verification accuracy
+    candidates = np.unique(np.concatenate([genuine, impostor]))
+    genuine_sorted, impostor_sorted = np.sort(genuine), np.sort(impostor)
+    tar = np.searchsorted(genuine_sorted, candidates, side="right") / max(len(genuine), 1)
+    far = np.searchsorted(impostor_sorted, candidates, side="right") / max(len(impostor), 1)
+    balanced = (tar + 1 - far) / 2
+    best = int(balanced.argmax())
+
+    # Rank-1: the nearest other photo shows the same identity, for identities with several photos
+    np.fill_diagonal(distances, np.inf)
+    probes = same.sum(axis=1) > 1
+    nearest = distances.argmin(axis=1)
+    rank1 = float((labels[nearest] == labels)[probes].mean()) if probes.any() else None
+
+    return {
+        "genuine_pairs": len(genuine),
+        "impostor_pairs": len(impostor),
+        "threshold": threshold,
+        "tar_at_threshold": float((genuine <= threshold).mean()) if len(genuine) else None,
+        "far_at_threshold": float((impostor <= threshold).mean()) if len(impostor) else None,
+        "best_threshold": float(candidates[best]),
+        "best_accuracy": float(balanced[best]),
+        "auc": roc_auc(genuine, impostor) if len(genuine) and len(impostor) else None,
+        "rank1": rank1
+    }
+
+
+def bench_speed(backend, faces: list, batch_size: int, batches: int) -> dict:
+    """Time batched embedding of the sample's face crops."""
+    pick = lambda i: [faces[(i * batch_size + j) % len(faces)] for j in range(batch_size)]
+
+    backend.embed(pick(0))  # warm-up
+    start = time.perf_counter()
+    for i in range(batches):
+        backend.embed(pick(i))
+    embed_s = time.perf_counter() - start
+
+    count = batches * batch_size
+    return {
+        "case": f"speed/{backend.model_id}/batch{batch_size}",
+        "kind": "speed",
+        "model": backend.model_id,
+        "batch_size": batch_size,
+        "embed_ms_per_face": embed_s / count * 1000,
+        "embed_faces_per_s": count / embed_s
+    }
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    dataset = os.path.abspath(args.dataset)
+    output = os.path.abspath(args.output) if args.output else None
+    compare = os.path.abspath(args.compare) if args.compare else None
+    from app.utilities import config
+    # Weight paths may be relative to the backend folder; resolve them before leaving it
+    model_path = os.path.abspath(args.model_path or config.MODEL_PATH)
+    if not os.path.isfile(model_path):
+        print(f"YOLO face model weights not found at {model_path}, pass them with --model-path")
+        return 2
+    config.MOBILEFACENET_PATH = os.path.abspath(args.mobilefacenet_path or config.MOBILEFACENET_PATH)
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="godseye-embed-bench-")
+    os.makedirs(workdir, exist_ok=True)
+
+    # Storage paths in the app are relative; running from the scratch directory isolates them
+    os.chdir(workdir)
+    import torch
+    from app.utilities.yolo_facenet import create_embedding_backend
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    threshold = config.MATCH_MAX_DISTANCE if args.threshold is None else args.threshold
+    batch_sizes = [int(value) for value in args.batch_sizes.split(",")]
+
+    results = []
+    try:
+        faces, labels = load_labelled_faces(dataset, model_path)
+        if len(set(labels)) < 2:
+            print("The dataset needs at least two identities with a detectable face")
+            return 2
+
+        for model_id in args.models.split(","):
+            start = time.perf_counter()
+            try:
+                backend = create_embedding_backend(model_id)
+            except Exception as err:
+                # Missing optional packages or weights; onnxruntime raises its own exception types
+                print(f"{model_id}: {err}, skipped", flush=True)
+                continue
+            load_s = time.perf_counter() - start
+
+            vectors = embed_all(backend, faces, max(batch_sizes))
+            results.append({
+                "case": f"accuracy/{model_id}",
+                "kind": "accuracy",
+                "model": model_id,
+                "dim": vectors.shape[1],
+                "load_s": load_s,
+                **accuracy_metrics(vectors, labels, threshold)
+            })
+            print(f"{results[-1]['case']}: AUC {results[-1]['auc']}, rank-1 {results[-1]['rank1']}", flush=True)
+
+            for batch_size in batch_sizes:
+                results.append(bench_speed(backend, faces, batch_size, args.batches))
+                print(f"{results[-1]['case']}: {results[-1]['embed_faces_per_s']:.2f} faces/s", flush=True)
+    finally:
+        os.chdir(BACKEND_DIR)
+        if args.keep or args.workdir:
+            print(f"Scratch directory kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    print_table([r for r in results if r["kind"] == "accuracy"],
+                ["case", "dim", "load_s", "tar_at_threshold", "far_at_threshold", "best_threshold",
+                 "best_accuracy", "auc", "rank1"])
+    print()
+    print_table([r for r in results if r["kind"] == "speed"], ["case", "embed_ms_per_face", "embed_faces_per_s"])
+
+    config_used = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    config_used.update(model_path=model_path, mobilefacenet_path=config.MOBILEFACENET_PATH, threshold=threshold, faces=len(faces),
+                       identities=len(set(labels)), torch_threads=torch.get_num_threads())
+    path = write_results("embedding", config_used, results, output)
+    print(f"\nResults written to {path}")
+
+    if compare:
+        regressions = compare_results(compare, results, REGRESSION_METRICS, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+import os
+import cv2
+import numpy as np
+
+
+def draw_synthetic_face(size: int, rng: np.random.Generator) -> np.ndarray:
+    """Draw a simple cartoon face (BGR) of `size` x `size` pixels; black pixels are treated as transparent."""
+    face = np.zeros((size, size, 3), dtype=np.uint8)
+    center = (size // 2, size // 2)
+    skin = tuple(int(c) for c in rng.integers((90, 120, 170), (140, 170, 230)))
+    cv2.ellipse(face, center, (int(size * 0.38), int(size * 0.48)), 0, 0, 360, skin, -1)
+    hair = tuple(int(c) for c in rng.integers(0, 80, 3))
+    cv2.ellipse(face, (center[0], int(size * 0.18)), (int(size * 0.4), int(size * 0.18)), 0, 180, 360, hair, -1)
+    for dx in (-0.15, 0.15):
+        eye = (int(size * (0.5 + dx)), int(size * 0.42))
+        cv2.ellipse(face, eye, (int(size * 0.07), int(size * 0.04)), 0, 0, 360, (255, 255, 255), -1)
+        cv2.circle(face, eye, int(size * 0.03), (40, 30, 20), -1)
+    cv2.line(face, (center[0], int(size * 0.45)), (center[0] - int(size * 0.04), int(size * 0.6)), (60, 80, 120), 2)
+    cv2.ellipse(face, (center[0], int(size * 0.7)), (int(size * 0.12), int(size * 0.05)), 0, 0, 180, (50, 50, 150), 2)
+    return face
+
+
+def load_face_images(face_dir: str) -> list[np.ndarray]:
+    """Load every image in `face_dir` (BGR), e.g. a folder of consented test portraits."""
+    images = []
+    for name in sorted(os.listdir(face_dir)):
+        image = cv2.imread(os.path.join(face_dir, name))
+        if image is not None:
+            images.append(image)
+    return images
+
+
+def make_synthetic_video(path: str, width: int, height: int, seconds: float = 10, fps: int = 25,
+                         num_faces: int = 3, face_images: list = None, seed: int = 0) -> str:
+    """
+    Write a deterministic MP4 with `num_faces` faces drifting over a textured background.
+
+    Faces are taken from `face_images` when given (real portraits exercise the detector
+    realistically), otherwise drawn. The same arguments always produce the same video,
+    so results of different runs are comparable.
+
+    Returns:
+        `path`.
+    """
+    rng = np.random.default_rng(seed)
+    face_size = max(48, min(width, height) // 5)
+    if face_images:
+        faces = [cv2.resize(face_images[i % len(face_images)], (face_size, face_size)) for i in range(num_faces)]
+        masks = [np.full((face_size, face_size), True) for _ in faces]
+    else:
+        faces = [draw_synthetic_face(face_size, rng) for _ in range(num_faces)]
+        masks = [face.any(axis=2) for face in faces]
+
+    positions = rng.uniform(0, 1, (num_faces, 2)) * (width - face_size, height - face_size)
+    velocities = rng.uniform(-1, 1, (num_faces, 2)) * min(width, height) / fps / 4
+
+    gradient = np.linspace(40, 200, width, dtype=np.float32)[None, :, None]
+    background = np.broadcast_to(gradient, (height, width, 3)).astype(np.uint8)
+    noise = rng.integers(0, 25, (height, width, 3), dtype=np.uint8)
+    background = cv2.add(background, noise)
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for _ in range(int(seconds * fps)):
+        frame = background.copy()
+        for idx, (face, mask) in enumerate(zip(faces, masks)):
+            x, y = positions[idx].astype(int)
+            region = frame[y:y + face_size, x:x + face_size]
+            region[mask] = face[mask]
+            positions[idx] += velocities[idx]
+            for axis, limit in enumerate((width - face_size, height - face_size)):
+                if not 0 <= positions[idx][axis] <= limit:
+                    velocities[idx][axis] *= -1
+                    positions[idx][axis] = min(max(positions[idx][axis], 0), limit)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def read_frames(path: str, count: int) -> list[np.ndarray]:
+    """Read up to `count` frames (BGR) from the start of a video."""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
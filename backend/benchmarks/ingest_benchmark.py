@@ -0,0 +1,198 @@
+"""
+End-to-end ingest benchmark on synthetic videos, runnable offline on CPU.
+
+Measures `Video_FramesStorage.extract_frames` (frames/sec, faces/sec and time per stage)
+across resolutions and frame skips, and the detection and embedding models across batch
+sizes. Everything runs in a scratch working directory, so the vector store, frames and
+logs of the real deployment are never touched.
+
+Usage (from the backend folder):
+    python -m benchmarks.ingest_benchmark --model-path yolov11n-face.pt
+    python -m benchmarks.ingest_benchmark --resolutions 640x360 --frame-skips 5 --compare old.json
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.common import write_results, compare_results, print_table
+from benchmarks.fixtures import make_synthetic_video, load_face_images, read_frames
+
+# Metrics checked by --compare: +1 if higher is better, -1 if lower is better
+REGRESSION_METRICS = {
+    "processed_fps": 1,
+    "faces_per_s": 1,
+    "detect_images_per_s": 1,
+    "embed_faces_per_s": 1
+}
+
+
+def parse_resolution(value: str) -> tuple[int, int]:
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-path", default=None, help="YOLO face model weights, defaults to config.MODEL_PATH")
+    parser.add_argument("--resolutions", default="640x360,1280x720,1920x1080")
+    parser.add_argument("--frame-skips", default="1,5,10")
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--seconds", type=float, default=10, help="Length of each synthetic video")
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--faces", type=int, default=3, help="Faces per synthetic frame")
+    parser.add_argument("--face-images", default=None, help="Folder of portraits to paste instead of drawn faces")
+    parser.add_argument("--batches", type=int, default=5, help="Timed batches per model case")
+    parser.add_argument("--threads", type=int, default=None, help="Torch CPU threads")
+    parser.add_argument("--store-crops", action="store_true", help="Also write face crops and thumbnails")
+    parser.add_argument("--workdir", default=None, help="Scratch directory, a temporary one by default")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory")
+    parser.add_argument("--output", default=None, help="Results JSON path")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative slowdown counted as a regression")
+    return parser.parse_args(argv)
+
+
+def bench_ingest(model, video_path: str, resolution: str, frame_skip: int, store_crops: bool) -> dict:
+    """Run `extract_frames` on a copy of the video and report throughput and stage times."""
+    from app.utilities.frames_storage import Video_FramesStorage
+
+    # extract_frames removes the video it processed
+    run_path = f"{video_path}.run.mp4"
+    shutil.copyfile(video_path, run_path)
+    storage = Video_FramesStorage(detection_model=model, store_crops=store_crops, live_alerts=False)
+
+    start = time.perf_counter()
+    storage.extract_frames(run_path, frame_skip=frame_skip)
+    wall = time.perf_counter() - start
+
+    return {
+        "case": f"ingest/{resolution}/skip{frame_skip}",
+        "kind": "ingest",
+        "resolution": resolution,
+        "frame_skip": frame_skip,
+        "frames_decoded": storage.frames_decoded,
+        "frames_processed": storage.frames_processed,
+        "faces": storage.faces_stored,
+        "wall_s": wall,
+        "decoded_fps": storage.frames_decoded / wall,
+        "processed_fps": storage.frames_processed / wall,
+        "faces_per_s": storage.faces_stored / wall,
+        "stages": storage.timer.summary()
+    }
+
+
+def bench_model(model, frames: list, resolution: str, batch_size: int, batches: int, face_size: int) -> dict:
+    """Time batched YOLO detection on frames and batched FaceNet embedding on face-sized crops."""
+    import cv2
+    from PIL import Image
+
+    images = [Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)) for frame in frames]
+    crops = [image.crop((0, 0, face_size, face_size)) for image in images]
+    pick = lambda items, i: [items[(i * batch_size + j) % len(items)] for j in range(batch_size)]
+
+    model.yolo(pick(images, 0), verbose=False)  # warm-up
+    start = time.perf_counter()
+    for i in range(batches):
+        model.yolo(pick(images, i), verbose=False)
+    detect_s = time.perf_counter() - start
+
+    model.vectorize_face_batch(pick(crops, 0))  # warm-up
+    start = time.perf_counter()
+    for i in range(batches):
+        model.vectorize_face_batch(pick(crops, i))
+    embed_s = time.perf_counter() - start
+
+    count = batches * batch_size
+    return {
+        "case": f"model/{resolution}/batch{batch_size}",
+        "kind": "model",
+        "resolution": resolution,
+        "batch_size": batch_size,
+        "detect_ms_per_image": detect_s / count * 1000,
+        "detect_images_per_s": count / detect_s,
+        "embed_ms_per_face": embed_s / count * 1000,
+        "embed_faces_per_s": count / embed_s
+    }
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    face_images = load_face_images(os.path.abspath(args.face_images)) if args.face_images else None
+    output = os.path.abspath(args.output) if args.output else None
+    compare = os.path.abspath(args.compare) if args.compare else None
+    from app.utilities import config
+    model_path = os.path.abspath(args.model_path or config.MODEL_PATH)
+    if not os.path.isfile(model_path):
+        print(f"YOLO face model weights not found at {model_path}, pass them with --model-path")
+        return 2
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="godseye-bench-")
+    os.makedirs(workdir, exist_ok=True)
+
+    # Storage paths in the app are relative; running from the scratch directory isolates them
+    os.chdir(workdir)
+    import torch
+    from app.utilities.yolo_facenet import Model
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    model = Model(model_path)
+
+    resolutions = [parse_resolution(value) for value in args.resolutions.split(",")]
+    frame_skips = [int(value) for value in args.frame_skips.split(",")]
+    batch_sizes = [int(value) for value in args.batch_sizes.split(",")]
+
+    results = []
+    try:
+        for width, height in resolutions:
+            resolution = f"{width}x{height}"
+            video_path = os.path.join(workdir, "fixtures", f"{resolution}.mp4")
+            if not os.path.exists(video_path):
+                make_synthetic_video(video_path, width, height, seconds=args.seconds, fps=args.fps,
+                                     num_faces=args.faces, face_images=face_images)
+
+            for frame_skip in frame_skips:
+                results.append(bench_ingest(model, video_path, resolution, frame_skip, args.store_crops))
+                print(f"{results[-1]['case']}: {results[-1]['processed_fps']:.2f} frames/s", flush=True)
+
+            frames = read_frames(video_path, max(batch_sizes) * 2)
+            for batch_size in batch_sizes:
+                results.append(bench_model(model, frames, resolution, batch_size, args.batches,
+                                           face_size=max(48, min(width, height) // 5)))
+                print(f"{results[-1]['case']}: {results[-1]['embed_faces_per_s']:.2f} faces/s", flush=True)
+    finally:
+        if args.keep or args.workdir:
+            print(f"Scratch directory kept at {workdir}")
+        else:
+            os.chdir(BACKEND_DIR)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    print_table([r for r in results if r["kind"] == "ingest"],
+                ["case", "frames_processed", "faces", "wall_s", "decoded_fps", "processed_fps", "faces_per_s"])
+    print()
+    print_table([r for r in results if r["kind"] == "model"],
+                ["case", "detect_ms_per_image", "detect_images_per_s", "embed_ms_per_face", "embed_faces_per_s"])
+
+    config_used = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    config_used["model_path"] = model_path
+    config_used["torch_threads"] = torch.get_num_threads()
+    path = write_results("ingest", config_used, results, output)
+    print(f"\nResults written to {path}")
+
+    if compare:
+        regressions = compare_results(compare, results, REGRESSION_METRICS, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Import and startup time benchmark.
+
+Each measurement runs in a fresh interpreter, so nothing is cached between runs except the
+OS file cache (one untimed warm-up run per case takes care of that). For the API module it
+reports the import time, the slowest modules under `python -X importtime`, and the time a
+first detection request spends opening the vector store and loading the model.
+
+Pass `--baseline <git ref>` to measure a second tree checked out from that ref into a
+temporary worktree, e.g. the commit before lazy initialization, for a before/after table.
+
+Usage (from the backend folder):
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --baseline HEAD~1 --runs 10
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.common import write_results, compare_results, print_table
+
+# Metrics checked by --compare: +1 if higher is better, -1 if lower is better
+REGRESSION_METRICS = {
+    "median_s": -1
+}
+
+# Modules timed by default: the API, the vector store and the ML stack on its own
+DEFAULT_MODULES = "faceDetection,app.utilities.vector_storage,app.utilities.yolo_facenet"
+
+# Run in the child interpreter: time one import, then optionally the lazy first-use initialization
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+result = {"import_s": time.perf_counter() - start}
+if sys.argv[2] == "1":
+    from app.utilities import vector_storage
+    from app.utilities.model_loader import model_loader
+    start = time.perf_counter()
+    vector_storage.get_client()
+    result["vector_store_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    model_loader.get()
+    result["model_s"] = time.perf_counter() - start
+print(json.dumps(result))
+"""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", default=DEFAULT_MODULES, help="Modules to time, comma separated")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per module")
+    parser.add_argument("--baseline", default=None, help="Git ref to measure as well, e.g. HEAD~1")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list from -X importtime")
+    parser.add_argument("--no-first-use", action="store_true",
+                        help="Skip timing the first vector store and model load")
+    parser.add_argument("--workdir", default=None, help="Scratch directory, a temporary one by default")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory")
+    parser.add_argument("--output", default=None, help="Results JSON path")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative slowdown counted as a regression")
+    return parser.parse_args(argv)
+
+
+def run_child(tree: str, workdir: str, module: str, first_use: bool = False, importtime: bool = False):
+    """Import `module` from `tree` in a new interpreter running in `workdir`."""
+    env = dict(os.environ, PYTHONPATH=tree, PYTHONDONTWRITEBYTECODE="1")
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + \
+        ["-c", CHILD, module, "1" if first_use else "0"]
+    process = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{process.stderr.strip().splitlines()[-1]}")
+    return json.loads(process.stdout.strip().splitlines()[-1]), process.stderr
+
+
+def slowest_imports(importtime_output: str, top: int) -> list[dict]:
+    """Parse `-X importtime` output into the `top` modules with the largest cumulative time."""
+    modules = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name[1:].rstrip(),  # nested imports are indented by two spaces per level
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000
+        })
+    # Only top-level imports sum up cleanly; nested ones are already part of their parents
+    top_level = [module for module in modules if not module["module"].startswith(" ")]
+    return sorted(top_level, key=lambda module: -module["cumulative_ms"])[:top]
+
+
+def bench_tree(label: str, tree: str, workdir: str, modules: list[str], runs: int, first_use: bool) -> list[dict]:
+    results = []
+    for module in modules:
+        if not os.path.exists(os.path.join(tree, *module.split(".")) + ".py"):
+            print(f"{label}: {module} does not exist in this tree, skipped", flush=True)
+            continue
+        try:
+            run_child(tree, workdir, module)  # warm-up
+            timings = [run_child(tree, workdir, module)[0]["import_s"] for _ in range(runs)]
+        except RuntimeError as err:
+            print(f"{label}: {err}", flush=True)
+            continue
+        results.append({
+            "case": f"{label}/import/{module}",
+            "tree": label,
+            "module": module,
+            "median_s": statistics.median(timings),
+            "min_s": min(timings),
+            "max_s": max(timings)
+        })
+        print(f"{results[-1]['case']}: {results[-1]['median_s']:.3f} s", flush=True)
+
+    lazy = os.path.exists(os.path.join(tree, "app", "utilities", "model_loader.py"))
+    if first_use and lazy and "faceDetection" in modules:
+        timing = run_child(tree, workdir, "faceDetection", first_use=True)[0]
+        results.append({
+            "case": f"{label}/first_use",
+            "tree": label,
+            "module": "faceDetection",
+            "median_s": timing["import_s"] + timing["vector_store_s"] + timing["model_s"],
+            "vector_store_s": timing["vector_store_s"],
+            "model_s": timing["model_s"]
+        })
+        print(f"{results[-1]['case']}: vector store {timing['vector_store_s']:.3f} s, "
+              f"model {timing['model_s']:.3f} s", flush=True)
+    return results
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    output = os.path.abspath(args.output) if args.output else None
+    compare = os.path.abspath(args.compare) if args.compare else None
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="godseye-startup-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    modules = args.modules.split(",")
+
+    trees = [("current", BACKEND_DIR)]
+    worktree = None
+    if args.baseline:
+        # Check the baseline out next to the scratch data; the worktree's backend folder is measured
+        repo_root = subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, text=True,
+                                   cwd=BACKEND_DIR, check=True).stdout.strip()
+        worktree = os.path.join(workdir, "baseline-tree")
+        subprocess.run(["git", "worktree", "add", "--detach", worktree, args.baseline],
+                       cwd=repo_root, check=True, capture_output=True)
+        trees.insert(0, (f"baseline-{args.baseline}",
+                         os.path.join(worktree, os.path.relpath(BACKEND_DIR, repo_root))))
+
+    results = []
+    slowest = {}
+    try:
+        for label, tree in trees:
+            # Each tree gets its own scratch directory for the relative database and log paths
+            tree_workdir = os.path.join(workdir, label)
+            os.makedirs(tree_workdir, exist_ok=True)
+            results.extend(bench_tree(label, tree, tree_workdir, modules, args.runs, not args.no_first_use))
+            if "faceDetection" in modules:
+                try:
+                    slowest[label] = slowest_imports(
+                        run_child(tree, tree_workdir, "faceDetection", importtime=True)[1], args.top)
+                except RuntimeError:
+                    pass
+    finally:
+        if worktree:
+            subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=BACKEND_DIR, capture_output=True)
+        if args.keep or args.workdir:
+            print(f"Scratch directory kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    print_table(results, ["case", "median_s", "min_s", "max_s", "vector_store_s", "model_s"])
+    for label, modules_list in slowest.items():
+        print(f"\nSlowest imports of faceDetection ({label}):")
+        print_table(modules_list, ["module", "cumulative_ms", "self_ms"])
+
+    config_used = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    config_used["slowest_imports"] = slowest
+    path = write_results("startup", config_used, results, output)
+    print(f"\nResults written to {path}")
+
+    if compare:
+        regressions = compare_results(compare, results, REGRESSION_METRICS, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""
+Vector search scale benchmark on synthetic face embeddings.
+
+Fills a scratch Chroma store with clustered synthetic embeddings (many faces per identity,
+like a video archive) up to each configured size and, for every HNSW configuration,
+measures insert throughput, `search_matches` latency (p50/p99) and recall against exact
+brute-force search at each `max_distance`, plus memory and disk footprint.
+
+Usage (from the backend folder):
+    python -m benchmarks.vector_benchmark --sizes 100000,1000000
+    python -m benchmarks.vector_benchmark --sizes 100000 --hnsw 16:100:10,32:200:100 --top-k 100,2000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+import numpy as np
+from benchmarks.common import write_results, compare_results, print_table
+
+# Embeddings are generated in fixed chunks so any prefix of the dataset is reproducible
+CHUNK_SIZE = 10000
+
+# Metrics checked by --compare: +1 if higher is better, -1 if lower is better
+REGRESSION_METRICS = {
+    "insert_per_s": 1,
+    "p50_ms": -1,
+    "p99_ms": -1,
+    "min_recall": 1
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100000,1000000,5000000", help="Collection sizes to measure at")
+    parser.add_argument("--hnsw", default="16:100:10,32:200:100",
+                        help="HNSW configurations as M:construction_ef:search_ef, comma separated")
+    parser.add_argument("--top-k", default="2000", help="n_results values to query with")
+    parser.add_argument("--max-distances", default="0.3,0.5,0.75", help="Thresholds to report recall at")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=512, help="Embedding dimension (FaceNet: 512)")
+    parser.add_argument("--faces-per-identity", type=int, default=50)
+    parser.add_argument("--noise", type=float, default=0.03,
+                        help="Per-component noise around identity centers; 0.03 gives FaceNet-like distances")
+    parser.add_argument("--insert-batch", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=None, help="Scratch directory, a temporary one by default")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch directory")
+    parser.add_argument("--output", default=None, help="Results JSON path")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Relative change counted as a regression")
+    return parser.parse_args(argv)
+
+
+class SyntheticFaces:
+    """Deterministic clustered unit-norm embeddings: identity centers plus Gaussian noise."""
+
+    def __init__(self, total: int, dim: int, faces_per_identity: int, noise: float, seed: int):
+        self.dim = dim
+        self.noise = noise
+        self.seed = seed
+        rng = np.random.default_rng([seed, 0])
+        self.centers = self._normalize(rng.standard_normal((max(1, total // faces_per_identity), dim),
+                                                           dtype=np.float32))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def _sample(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        identities = rng.integers(0, len(self.centers), count)
+        noise = rng.standard_normal((count, self.dim), dtype=np.float32) * self.noise
+        return self._normalize(self.centers[identities] + noise)
+
+    def chunk(self, index: int) -> np.ndarray:
+        """Embeddings with ids [index * CHUNK_SIZE, (index + 1) * CHUNK_SIZE)."""
+        return self._sample(np.random.default_rng([self.seed, 1, index]), CHUNK_SIZE)
+
+    def queries(self, count: int) -> np.ndarray:
+        """New faces of known identities, so every query has true matches."""
+        return self._sample(np.random.default_rng([self.seed, 2]), count)
+
+
+def iter_chunks(faces: SyntheticFaces, start: int, stop: int):
+    """Yield (first_id, vectors) covering ids [start, stop)."""
+    position = start
+    while position < stop:
+        index = position // CHUNK_SIZE
+        offset = position - index * CHUNK_SIZE
+        count = min(CHUNK_SIZE - offset, stop - position)
+        yield position, faces.chunk(index)[offset:offset + count]
+        position += count
+
+
+def exact_neighbors(faces: SyntheticFaces, queries: np.ndarray, sizes: list[int], k: int) -> dict:
+    """
+    Brute-force `k` nearest neighbors (cosine distance) of each query within the first
+    `size` embeddings, for every size, in one pass over the dataset.
+
+    Returns:
+        {size: (ids, distances)}, both (queries, k) arrays sorted by distance.
+    """
+    best_ids = np.empty((len(queries), 0), dtype=np.int64)
+    best_dist = np.empty((len(queries), 0), dtype=np.float32)
+    snapshots = {}
+    position = 0
+    for size in sorted(sizes):
+        for first_id, vectors in iter_chunks(faces, position, size):
+            dist = 1 - queries @ vectors.T
+            ids = np.broadcast_to(np.arange(first_id, first_id + len(vectors)), dist.shape)
+            best_dist = np.concatenate([best_dist, dist], axis=1)
+            best_ids = np.concatenate([best_ids, ids], axis=1)
+            if best_dist.shape[1] > k:
+                keep = np.argpartition(best_dist, k, axis=1)[:, :k]
+                best_dist = np.take_along_axis(best_dist, keep, axis=1)
+                best_ids = np.take_along_axis(best_ids, keep, axis=1)
+        position = size
+        order = np.argsort(best_dist, axis=1)
+        snapshots[size] = (np.take_along_axis(best_ids, order, axis=1), np.take_along_axis(best_dist, order, axis=1))
+    return snapshots
+
+
+def insert_vectors(collection, faces: SyntheticFaces, start: int, stop: int, batch_size: int) -> float:
+    """Add embeddings [start, stop) with frame-like metadata; returns the seconds spent in `add`."""
+    elapsed = 0.0
+    for first_id, vectors in iter_chunks(faces, start, stop):
+        for offset in range(0, len(vectors), batch_size):
+            batch = vectors[offset:offset + batch_size]
+            ids = range(first_id + offset, first_id + offset + len(batch))
+            metadatas = [{"cam_id": "cam-bench", "frame_id": f"frame_{i}", "x": 0.0, "y": 0.0, "w": 1.0, "h": 1.0,
+                          "face_idx": 0, "timestamp": "0:00:00", "timestamp_seconds": 0.0} for i in ids]
+            begin = time.perf_counter()
+            collection.add(ids=[f"bench_{i}" for i in ids], embeddings=batch.tolist(), metadatas=metadatas)
+            elapsed += time.perf_counter() - begin
+    return elapsed
+
+
+def memory_mb() -> dict:
+    """Current and peak resident memory of this process, where the platform reports them."""
+    info = {}
+    try:
+        import psutil
+        info["rss_mb"] = psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        info["peak_rss_mb"] = peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    except ImportError:
+        pass
+    return info
+
+
+def disk_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total / 2**20
+
+
+def measure_queries(collection, queries: np.ndarray, exact: tuple, top_k: int, max_distances: list[float]) -> dict:
+    """Query one vector at a time through `search_matches_batch`; latency and recall per threshold."""
+    from app.utilities.vector_storage import search_matches_batch
+
+    exact_ids, exact_dist = exact
+    latencies = []
+    recalls = {threshold: [] for threshold in max_distances}
+    for q, query in enumerate(queries):
+        begin = time.perf_counter()
+        matches = search_matches_batch([query.tolist()], top_k=top_k, max_distance=max(max_distances),
+                                       collection=collection)[0]
+        latencies.append(time.perf_counter() - begin)
+
+        found = [(int(match["frame_id"].split("_")[1]), match["score"]) for match in matches]
+        for threshold in max_distances:
+            truth = set(exact_ids[q, :top_k][exact_dist[q, :top_k] <= threshold].tolist())
+            if truth:
+                hits = {face_id for face_id, score in found if score <= threshold} & truth
+                recalls[threshold].append(len(hits) / len(truth))
+
+    latencies_ms = np.array(latencies) * 1000
+    recall = {str(threshold): float(np.mean(values)) if values else None for threshold, values in recalls.items()}
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "mean_ms": float(latencies_ms.mean()),
+        "recall": recall,
+        "min_recall": min((value for value in recall.values() if value is not None), default=None)
+    }
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    output = os.path.abspath(args.output) if args.output else None
+    compare = os.path.abspath(args.compare) if args.compare else None
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="godseye-vector-bench-")
+    os.makedirs(workdir, exist_ok=True)
+
+    # Storage paths in the app are relative; running from the scratch directory isolates them
+    os.chdir(workdir)
+    from chromadb import PersistentClient
+    from app.utilities.vector_storage import hnsw_metadata
+
+    sizes = sorted(int(value) for value in args.sizes.split(","))
+    top_ks = [int(value) for value in args.top_k.split(",")]
+    max_distances = [float(value) for value in args.max_distances.split(",")]
+    hnsw_configs = [tuple(int(part) for part in value.split(":")) for value in args.hnsw.split(",")]
+
+    faces = SyntheticFaces(sizes[-1], args.dim, args.faces_per_identity, args.noise, args.seed)
+    queries = faces.queries(args.queries)
+    print(f"Computing exact neighbors for {len(queries)} queries up to {sizes[-1]} vectors...", flush=True)
+    exact = exact_neighbors(faces, queries, sizes, max(top_ks))
+
+    results = []
+    try:
+        for m, construction_ef, search_ef in hnsw_configs:
+            label = f"M{m}-efc{construction_ef}-efs{search_ef}"
+            store_path = os.path.join(workdir, label)
+            client = PersistentClient(path=store_path)
+            collection = client.get_or_create_collection(
+                name="face_vectors", metadata=hnsw_metadata(m, construction_ef, search_ef)
+            )
+            batch_size = min(args.insert_batch, client.get_max_batch_size())
+
+            inserted = 0
+            for size in sizes:
+                insert_s = insert_vectors(collection, faces, inserted, size, batch_size)
+                insert_rate = (size - inserted) / insert_s if insert_s else None
+                inserted = size
+                for top_k in top_ks:
+                    result = {
+                        "case": f"vector/{label}/n{size}/k{top_k}",
+                        "hnsw": {"M": m, "construction_ef": construction_ef, "search_ef": search_ef},
+                        "size": size,
+                        "top_k": top_k,
+                        "insert_per_s": insert_rate,
+                        "disk_mb": disk_mb(store_path),
+                        **memory_mb(),
+                        **measure_queries(collection, queries, exact[size], top_k, max_distances)
+                    }
+                    results.append(result)
+                    print(f"{result['case']}: p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms, "
+                          f"recall {result['recall']}", flush=True)
+            del collection, client
+    finally:
+        if args.keep or args.workdir:
+            print(f"Scratch directory kept at {workdir}")
+        else:
+            os.chdir(BACKEND_DIR)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    print_table(results, ["case", "insert_per_s", "p50_ms", "p99_ms", "min_recall", "disk_mb", "rss_mb"])
+
+    config_used = {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    path = write_results("vector", config_used, results, output)
+    print(f"\nResults written to {path}")
+
+    if compare:
+        regressions = compare_results(compare, results, REGRESSION_METRICS, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,49 @@
 from collections import defaultdict
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Form, Query, status
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Form, Query, Request, status
+from sqlalchemy import and_, or_, func, text
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from passlib.hash import argon2
 import uuid
 from PIL import Image
 from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 import os
 import io
-import base64
 import numpy as np
 import shutil
 from app.utilities.frames_storage import Video_FramesStorage
 from app.utilities.validation import get_current_user 
-from app.utilities.yolo_facenet import Model
+from app.utilities.model_loader import model_loader
+from app.utilities import vector_storage
 from app.utilities import config
-from app.database_sqlite.models.all_models import MissingPersons, MissingPersonsFrame, User, Base
-from app.database_sqlite.schemas.all_schemas import RegisterUser, LoginUser
-from app.database_sqlite.db import get_db,engine
-from app.utilities.helper import draw_box, create_access_token
+from app.database_sqlite.models.all_models import MissingPersons, MissingPersonsFrame, MissingPersonPhoto, User, \
+    Camera, VideoHash, Sighting, Base
+from app.database_sqlite.schemas.all_schemas import RegisterUser, LoginUser, StreamSource, ProfilerSettings
+from app.database_sqlite.db import get_db, engine, MATCH_ARRAY_COLUMNS
+from app.utilities.helper import draw_box, create_access_token, make_etag, jpeg_response, encode_cursor, decode_cursor, \
+    parse_duration, parse_time_bound, to_utc_naive
 from fastapi.middleware.cors import CORSMiddleware
 from app.utilities.logger_config import logger
-from datetime import timedelta
+from datetime import datetime, timedelta
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from app.utilities.vector_storage import store_and_search_missing
+from app.utilities.gallery import prepare_photos, add_gallery_photos, gallery_vectors, match_person
+from app.utilities.frame_images import IMAGE_MODES, image_etag, render_image
+from app.utilities.image_cache import image_cache
+from app.utilities.stream_ingest import stream_service, check_stream_source
+from app.utilities.alerts import alert_broker
+from app.utilities.chunked_upload import upload_registry, UPLOAD_EXTENSIONS
+from app.utilities.job_queue import ingest_queue
+from app.utilities.dedup import copy_and_hash
+from app.utilities.metrics import registry as metrics_registry, HTTP_REQUEST_SECONDS
+from app.utilities.profiling import ingest_profiler
+from app.utilities.bulk_import import import_registry, read_zip_batch, read_manifest, BatchFormatError
+from fastapi.responses import StreamingResponse, Response
+import asyncio
+import json
+import threading
+import time
 
 
 
@@ -44,6 +63,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Record the latency of every request, labelled by route template to bound cardinality."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    if config.METRICS_ENABLED:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            route=route.path if route is not None else "unmatched",
+            status=response.status_code
+        )
+    return response
+
 logger.info("Application Started")
 
 ############################
@@ -224,21 +259,26 @@ async def register_missing_person(
     last_name: str = Form(...),
     details: str = Form(...),
     photo: UploadFile = File(...),
+    additional_photos: list[UploadFile] = File(None, description="More reference photos of the same person"),
     db: Session = Depends(get_db)
 ):
     """
     Register a new missing person in the database.
 
+    All photos form the person's gallery: their face vectors are averaged into a template
+    that is used for searching, and matches are rescored against every photo.
+
     Args:
         user_id (str): Authenticated user's ID (auto-injected via Depends).
         first_name (str): First name of the missing person.
         last_name (str): Last name of the missing person.
         details (str): Additional details about the missing person.
         photo (UploadFile): Image file of the missing person.
+        additional_photos (list[UploadFile]): (Optional) More images of the missing person.
         db (Session): SQLAlchemy session for DB interaction.
 
     Raises:
-        HTTPException: If no face is detected in the image (400).
+        HTTPException: If a photo is unreadable, has no detectable face or there are too many (400).
         HTTPException: For general database or processing errors (500).
 
     Returns:
@@ -247,58 +287,44 @@ async def register_missing_person(
     try:
         logger.info("Starting registration process for missing person by user %s", user_id)
 
-        # Load and convert the uploaded image to RGB JPEG
-        image = Image.open(io.BytesIO(await photo.read())).convert("RGB")
-        image_buffer = io.BytesIO()
-        image.save(image_buffer, format="JPEG")
-        jpeg_bytes = image_buffer.getvalue()
+        uploads = [photo] + (additional_photos or [])
+        if len(uploads) > config.GALLERY_MAX_PHOTOS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {config.GALLERY_MAX_PHOTOS} photos can be registered per person."
+            )
 
-        # Generate unique ID and extract face vector
-        missing_person_id = str(uuid.uuid4())
-        face_model = Model(config.MODEL_PATH)
-        face_vector = face_model.vectorize_faces(image)[0]
-        logger.info(f"Face vector: {face_vector}")
+        # Convert photos to JPEG and extract face vectors, reusing the embeddings of known photos.
+        # Inference waits for the shared model (held by live streams), so it runs off the event loop
+        photo_bytes = [await upload.read() for upload in uploads]
+        try:
+            prepared = await run_in_threadpool(prepare_photos, db, photo_bytes, model_loader.vectorize_primary_faces)
+        except ValueError as err:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
 
-        if face_vector is None:
+        missing_faces = [upload.filename for upload, item in zip(uploads, prepared) if item["vector"] is None]
+        if missing_faces:
             logger.warning("Face not detected in uploaded image by user %s", user_id)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No face detected in the uploaded photo."
+                detail=f"No face detected in the uploaded photo: {', '.join(missing_faces)}."
             )
 
-        # Create and store missing person record
+        # Create and store missing person record, the first photo stays the registered photo
+        missing_person_id = str(uuid.uuid4())
         missing_person = MissingPersons(
             missing_person_id=missing_person_id,
             first_name=first_name,
             last_name=last_name,
             details=details,
-            photo=jpeg_bytes
+            photo=prepared[0]["jpeg"]
         )
         db.add(missing_person)
+        add_gallery_photos(db, missing_person_id, prepared)
         logger.info("Missing person record stored in database: %s", missing_person_id)
 
-        # Store vector in external vector DB and fetch possible matches
-        potential_matches = store_and_search_missing(person_id=missing_person_id, query_vector=face_vector,max_distance=0.75)
-        logger.info(f"Stored face vector and retrieved {len(potential_matches)} potential matches")
-        d = {}
-        for match in potential_matches:
-            cam_id = match['cam_id']
-
-            d[cam_id] = d.get(cam_id, 0)
-            missing_frame_id = d[cam_id]
-
-            logger.info(f"cam_id : {match['cam_id']}, frame_id: {match['frame_id']}, missing_frame_id: {d[match['cam_id']]}")
-            frame = MissingPersonsFrame(
-                missing_person_id=missing_person_id,
-                missing_frame_id=missing_frame_id,
-                frame_id=match["frame_id"],
-                cam_id=match["cam_id"],
-                timestamp=match["timestamp"],
-                box=match["box"],
-                score=match['score']
-            )
-            d[cam_id] += 1
-            db.add(frame)
+        # Store the template in the vector DB and record possible matches
+        await run_in_threadpool(match_person, db, missing_person_id, [item["vector"] for item in prepared])
         db.commit()
 
         logger.info("Missing person registration completed successfully for ID: %s", missing_person_id)
@@ -309,70 +335,395 @@ async def register_missing_person(
             "missing_person_id": missing_person_id
         }
 
+    except HTTPException as http_err:
+        db.rollback()
+        raise http_err
+
     except Exception as ex:
+        db.rollback()
         logger.exception("Unexpected error occurred during missing person registration.")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Unexpected error: {str(ex)}"
         )
  
+# Bulk import missing persons
+@app.post("/api/missing_persons/import", status_code=status.HTTP_202_ACCEPTED)
+async def import_missing_persons(
+    user_id: str = Depends(get_current_user),
+    archive: UploadFile = File(None, description="Zip holding manifest.csv and the photos it names"),
+    manifest: UploadFile = File(None, description="CSV with first_name, last_name, details, photo columns"),
+    photos: list[UploadFile] = File(None, description="Photos named by the manifest's photo column")
+):
+    """
+    Register a batch of missing persons in the background.
+
+    The batch is either a zip `archive` containing `manifest.csv` and the photos, or a
+    `manifest` CSV sent together with the `photos` as multipart files. Faces are detected
+    and embedded in batches, all vectors are stored together and matching against stored
+    frames runs as one batched job. Poll `GET /api/missing_persons/import/{job_id}` for
+    progress and the status of every record.
+
+    Args:
+        user_id (str): Authenticated user ID from JWT.
+        archive (UploadFile): (Optional) Zip batch.
+        manifest (UploadFile): (Optional) CSV manifest, used with `photos`.
+        photos (list[UploadFile]): (Optional) Photos named by the manifest.
+
+    Raises:
+        HTTPException: If the batch is missing or cannot be read (400).
+
+    Returns:
+        dict: Import job state with per-record status.
+    """
+    try:
+        if archive is not None:
+            entries = await run_in_threadpool(read_zip_batch, archive.file)
+        elif manifest is not None:
+            photo_bytes = {os.path.basename(photo.filename): await photo.read() for photo in photos or []}
+            entries = read_manifest((await manifest.read()).decode("utf-8-sig"), photo_bytes)
+        else:
+            raise BatchFormatError("Send a zip archive, or a manifest with its photos.")
+    except (BatchFormatError, UnicodeDecodeError) as err:
+        logger.warning(f"Rejected import batch from user {user_id}: {err}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(err)
+        )
+
+    job = import_registry.create(user_id, entries)
+    logger.info(f"Import {job.job_id} started with {len(entries)} records by user {user_id}")
+    return job.info()
+
+# Get the status of a bulk import
+@app.get("/api/missing_persons/import/{job_id}", status_code=status.HTTP_200_OK)
+def get_import_status(
+    job_id: str,
+    include_records: bool = Query(True, description="Include the status of every record"),
+    user_id: str = Depends(get_current_user)
+):
+    """
+    Report the progress of a bulk import and the outcome of each record.
+
+    Args:
+        job_id (str): Import job ID.
+        include_records (bool): Whether to list every record.
+        user_id (str): Authenticated user ID from JWT.
+
+    Raises:
+        HTTPException: If the job is unknown (404).
+
+    Returns:
+        dict: Import job state.
+    """
+    job = import_registry.get(job_id)
+    if job is None or job.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import not found."
+        )
+    return job.info(include_records=include_records)
+
+# Add reference photos to a missing person's gallery
+@app.post("/api/missing_persons/{missing_person_id}/photos", status_code=status.HTTP_201_CREATED)
+async def add_missing_person_photos(
+    missing_person_id: str,
+    photos: list[UploadFile] = File(...),
+    user_id: str = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Add reference photos to a missing person's gallery, recompute the template and
+    re-run matching against stored frames.
+
+    Args:
+        missing_person_id (str): ID of the missing person.
+        photos (list[UploadFile]): Images of the missing person.
+        user_id (str): Authenticated user ID from JWT.
+        db (Session): SQLAlchemy DB session.
+
+    Raises:
+        HTTPException: If the person is not found (404).
+        HTTPException: If a photo is unreadable, has no detectable face or the gallery is full (400).
+        HTTPException: For general database or processing errors (500).
+
+    Returns:
+        dict: Gallery size and number of matches after the update.
+    """
+    try:
+        if db.query(MissingPersons.missing_person_id).filter_by(missing_person_id=missing_person_id).first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Missing person not found."
+            )
+
+        # Checked before any embedding work; every stored photo counts, and persons registered
+        # before galleries existed have their registered photo
+        gallery_size = max(
+            db.query(MissingPersonPhoto.photo_id).filter_by(missing_person_id=missing_person_id).count(), 1
+        )
+        if gallery_size + len(photos) > config.GALLERY_MAX_PHOTOS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {config.GALLERY_MAX_PHOTOS} photos can be registered per person."
+            )
+
+        # Embedding and vector store calls run off the event loop, see register_missing_person
+        photo_bytes = [await photo.read() for photo in photos]
+        vectors = await run_in_threadpool(gallery_vectors, db, missing_person_id, model_loader.vectorize_primary_faces)
+
+        try:
+            prepared = await run_in_threadpool(prepare_photos, db, photo_bytes, model_loader.vectorize_primary_faces)
+        except ValueError as err:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(err))
+
+        missing_faces = [photo.filename for photo, item in zip(photos, prepared) if item["vector"] is None]
+        if missing_faces:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No face detected in the uploaded photo: {', '.join(missing_faces)}."
+            )
+
+        add_gallery_photos(db, missing_person_id, prepared)
+        vectors += [item["vector"] for item in prepared]
+        match_count = await run_in_threadpool(match_person, db, missing_person_id, vectors, replace=True)
+        db.commit()
+        # Match numbering changed, cached frame images of the person are stale
+        image_cache.invalidate(missing_person_id)
+
+        logger.info(f"Added {len(photos)} photos to gallery of {missing_person_id}, {match_count} matches")
+        return {
+            "missing_person_id": missing_person_id,
+            "photos": gallery_size + len(prepared),
+            "matches": match_count
+        }
+
+    except HTTPException as http_err:
+        db.rollback()
+        raise http_err
+
+    except Exception as ex:
+        db.rollback()
+        logger.exception("Unexpected error while adding missing person photos.")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Unexpected error: {str(ex)}"
+        )
+
+# List the reference photos of a missing person
+@app.get("/api/missing_persons/{missing_person_id}/photos", status_code=status.HTTP_200_OK)
+def list_missing_person_photos(
+    missing_person_id: str,
+    user_id: str = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    List the gallery of a missing person with an image URL per photo.
+
+    Args:
+        missing_person_id (str): ID of the missing person.
+        user_id (str): Authenticated user ID from JWT.
+        db (Session): SQLAlchemy DB session.
+
+    Returns:
+        dict: Gallery photos, oldest first.
+    """
+    rows = db.query(MissingPersonPhoto.photo_id, MissingPersonPhoto.created_at) \
+        .filter_by(missing_person_id=missing_person_id) \
+        .order_by(MissingPersonPhoto.created_at).all()
+    return {
+        "missing_person_id": missing_person_id,
+        "photos": [
+            {
+                "photo_id": row.photo_id,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+                "image": f"/api/images/gallery_photo/{missing_person_id}/{row.photo_id}"
+            }
+            for row in rows
+        ]
+    }
+
+# Columns needed to list missing persons, the photo blob is deliberately left out
+PERSON_SUMMARY_COLUMNS = (
+    MissingPersons.missing_person_id,
+    MissingPersons.first_name,
+    MissingPersons.last_name,
+    MissingPersons.details
+)
+
+def person_summary(person) -> dict:
+    """Build the listing entry of a missing person from a `PERSON_SUMMARY_COLUMNS` row."""
+    return {
+        "id": person.missing_person_id,
+        "first_name": person.first_name,
+        "last_name": person.last_name,
+        "name": f"{person.first_name}, {person.last_name}",
+        "details": person.details
+    }
+
+# List missing persons page by page
+@app.get("/api/missing_persons", status_code=status.HTTP_200_OK)
+def list_missing_persons(
+    user_id: str = Depends(get_current_user),
+    search: str = Query(None, description="Case-insensitive search on first or last name"),
+    cursor: str = Query(None, description="Cursor returned as `next_cursor` by the previous page"),
+    limit: int = Query(50, ge=1, le=500, description="Number of persons per page"),
+    db: Session = Depends(get_db)
+):
+    """
+    Return a page of registered missing persons, ordered by name.
+
+    Only the listing columns are selected, so photos are never loaded, and pages are
+    fetched with an opaque keyset cursor.
+
+    Args:
+        user_id (str): Authenticated user ID from JWT.
+        search (str): (Optional) Substring to match against first or last name.
+        cursor (str): (Optional) Cursor of the page to fetch.
+        limit (int): Page size.
+        db (Session): SQLAlchemy DB session.
+
+    Raises:
+        HTTPException: If the cursor is invalid (400).
+        HTTPException: For database errors (500).
+
+    Returns:
+        dict: Persons of the page and `next_cursor` (None on the last page).
+    """
+    try:
+        query = db.query(*PERSON_SUMMARY_COLUMNS)
+
+        if search:
+            escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"%{escaped}%"
+            query = query.filter(or_(
+                MissingPersons.first_name.ilike(pattern, escape="\\"),
+                MissingPersons.last_name.ilike(pattern, escape="\\")
+            ))
+
+        if cursor:
+            try:
+                position = decode_cursor(cursor)
+                last_first, last_last, last_id = position["first_name"], position["last_name"], position["id"]
+                # Values are compared in SQL, so a cursor of the right shape must also hold the right types
+                if not all(isinstance(value, str) for value in (last_first, last_last, last_id)):
+                    raise ValueError("Cursor names and ID must be strings")
+            except (ValueError, KeyError, TypeError) as err:
+                logger.warning(f"Invalid persons cursor: {err}")
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor."
+                )
+            query = query.filter(or_(
+                MissingPersons.first_name > last_first,
+                and_(MissingPersons.first_name == last_first, MissingPersons.last_name > last_last),
+                and_(
+                    MissingPersons.first_name == last_first,
+                    MissingPersons.last_name == last_last,
+                    MissingPersons.missing_person_id > last_id
+                )
+            ))
+
+        # Fetch one extra row to know whether another page follows
+        rows = query.order_by(
+            MissingPersons.first_name,
+            MissingPersons.last_name,
+            MissingPersons.missing_person_id
+        ).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = encode_cursor({
+            "first_name": rows[-1].first_name,
+            "last_name": rows[-1].last_name,
+            "id": rows[-1].missing_person_id
+        }) if has_more else None
+
+        logger.info(f"Returned {len(rows)} missing persons, has_more={has_more}")
+        return {
+            "persons": [person_summary(person) for person in rows],
+            "next_cursor": next_cursor
+        }
+
+    except HTTPException as http_err:
+        raise http_err
+
+    except SQLAlchemyError as db_err:
+        logger.error(f"Database error while listing missing persons: {db_err}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error. Please try again later."
+        )
+
 # Get missing person frame
 @app.get("/api/missing_person_frame", status_code=status.HTTP_200_OK)
 async def get_missing_person_frame(
     user_id: str = Depends(get_current_user),
     missing_person_id: str = Query(None, description="filter by Missing person ID to retrieve frames"),
     camera_id: str = Query(None, description="Filter by camera ID(default to 0) to retrieve frames from specific camera"),
-    frame_id: str = Query("0", description="Filter by Frame ID(default to frame_0) to retrieve specific frame"),
+    frame_id: int = Query(0, description="Filter by Frame ID(default to frame_0) to retrieve specific frame"),
     start_date: str = Query(None),
     end_date: str = Query(None),
     start_timestamp: str = Query(None),
     end_timestamp: str = Query(None),
+    image_mode: str = Query("frame", description="Image to return: full annotated 'frame', face 'crop' or 'thumbnail'"),
     db: Session = Depends(get_db)
 ):
     """
     Retrieves a specific frame related to a missing person from a given camera.
 
     - If `missing_person_id` is not provided, returns a list of all missing persons.
-    - If `missing_person_id` is provided along with camera and frame IDs, it returns the corresponding frame,
-      the registered photo, and total frames found for that person in the camera.
+    - If `missing_person_id` is provided along with camera and frame IDs, it returns URLs of the corresponding
+      frame and the registered photo, and total frames found for that person in the camera.
+    - `image_mode` selects whether the frame URL points to the full annotated frame, or to the face crop /
+      thumbnail stored at ingest time.
 
     Args:
         user_id (str): Authenticated user ID from JWT.
         missing_person_id (str): ID of the missing person to retrieve frames for.
         camera_id (str): ID of the camera where frames were recorded.
-        frame_id (str): Specific frame ID to retrieve.
-        start_date (str): (Optional) Filter by start date.
-        end_date (str): (Optional) Filter by end date.
-        start_timestamp (str): (Optional) Filter by start timestamp.
-        end_timestamp (str): (Optional) Filter by end timestamp.
+        frame_id (int): Specific frame ID to retrieve.
+        start_date (str): (Optional) Filter by start date (YYYY-MM-DD or ISO datetime, UTC).
+        end_date (str): (Optional) Filter by end date (YYYY-MM-DD or ISO datetime, UTC).
+        start_timestamp (str): (Optional) Filter by start timestamp, see `match_time_filters`.
+        end_timestamp (str): (Optional) Filter by end timestamp, see `match_time_filters`.
+        image_mode (str): One of "frame", "crop" or "thumbnail".
         db (Session): SQLAlchemy DB session.
 
     Returns:
         JSON response with frame data or list of missing persons.
     """
+    if image_mode not in IMAGE_MODES:
+        logger.warning(f"Invalid image mode requested: {image_mode}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"image_mode must be one of: {', '.join(IMAGE_MODES)}."
+        )
+
     try:
         # Case: No specific person ID provided — return list of all missing persons
         if missing_person_id is None:
             logger.info("Fetching all missing persons.")
-            persons = db.query(MissingPersons).all()
-            result = [
-                {
-                    "id": person.missing_person_id,
-                    "first_name": person.first_name,
-                    "last_name" : person.last_name,
-                    "name": f"{person.first_name}, {person.last_name}",
-                    "details": person.details
-                }
-                for person in persons
-            ]
+            persons = db.query(*PERSON_SUMMARY_COLUMNS).all()
+            result = [person_summary(person) for person in persons]
             logger.info("Returning missing persons list and camera names.")
             return JSONResponse(
                 content={"persons": result},
                 status_code=status.HTTP_200_OK
             )
 
+        # Restrict matches to the requested time window, if any
+        try:
+            time_filters = match_time_filters(start_date, end_date, start_timestamp, end_timestamp)
+        except ValueError as err:
+            logger.warning(f"Invalid time range for person_id={missing_person_id}: {err}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid time range: {err}"
+            )
+
         camera_ids = db.query(MissingPersonsFrame.cam_id)\
-            .filter_by(missing_person_id=missing_person_id)\
+            .filter(MissingPersonsFrame.missing_person_id == missing_person_id, *time_filters)\
             .distinct()\
             .all()
         camera_ids = [cam_id[0] for cam_id in camera_ids]
@@ -391,17 +742,26 @@ async def get_missing_person_frame(
         logger.info(f"cameras_ids: {camera_ids}, current_cam: {camera_id}")
 
         # Count total frames for the person in this camera
-        total_frames = db.query(MissingPersonsFrame).filter_by(
-            missing_person_id=missing_person_id,
-            cam_id=camera_id
+        total_frames = db.query(MissingPersonsFrame).filter(
+            MissingPersonsFrame.missing_person_id == missing_person_id,
+            MissingPersonsFrame.cam_id == camera_id,
+            *time_filters
         ).count()
 
         # Fetch specific frame for the person
-        frame = db.query(MissingPersonsFrame).filter_by(
-            missing_person_id=missing_person_id,
-            cam_id=camera_id,
-            missing_frame_id=frame_id
-        ).first()
+        if time_filters:
+            # `frame_id` is the position of the frame within the matches of the time window
+            frame = db.query(MissingPersonsFrame).filter(
+                MissingPersonsFrame.missing_person_id == missing_person_id,
+                MissingPersonsFrame.cam_id == camera_id,
+                *time_filters
+            ).order_by(MissingPersonsFrame.missing_frame_id).offset(max(frame_id, 0)).first()
+        else:
+            frame = db.query(MissingPersonsFrame).filter_by(
+                missing_person_id=missing_person_id,
+                cam_id=camera_id,
+                missing_frame_id=frame_id
+            ).first()
 
         if not frame:
             logger.warning(f"No frame found for person_id={missing_person_id}, camera_id={camera_id}, missing_frame_id={frame_id}")
@@ -410,35 +770,12 @@ async def get_missing_person_frame(
                 detail="Frame not found for given ID and camera."
             )
 
-        # Load and encode registered photo (from database)
-        registered_photo_bytes = frame.missing_person.photo
-        registered_image = Image.open(io.BytesIO(registered_photo_bytes))
-        buffer_registered = io.BytesIO()
-        registered_image.save(buffer_registered, format="JPEG")
-        buffer_registered.seek(0)
-        encoded_registered_photo = base64.b64encode(buffer_registered.read()).decode("utf-8")
-
-        # Build path to saved frame image
-        frame_image_path = os.path.join(config.FRAME_DIR, frame.cam_id, f"{frame.frame_id}.jpeg")
-        if not os.path.exists(frame_image_path):
-            logger.error(f"Frame image not found on disk at {frame_image_path}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Frame image file not found on disk."
-            )
-
-        # Annotate and encode frame image
-        image = Image.open(frame_image_path).convert("RGB")
-        np_image = np.array(image)
-
-        if frame.box:
-            np_image = draw_box(np_image, frame.box)
-
-        image_with_boxes = Image.fromarray(np_image)
-        buffer_frame = io.BytesIO()
-        image_with_boxes.save(buffer_frame, format="JPEG")
-        buffer_frame.seek(0)
-        encoded_frame_image = base64.b64encode(buffer_frame.read()).decode("utf-8")
+        # Images are served by the binary image endpoints so clients can cache them
+        frame_image_url = (
+            f"/api/images/frame/{frame.missing_person_id}/{frame.cam_id}/{frame.missing_frame_id}"
+            f"?image_mode={image_mode}"
+        )
+        registered_photo_url = f"/api/images/registered_photo/{frame.missing_person_id}"
 
         logger.info(f"Successfully returned frame for missing_person_id={missing_person_id}, frame_id={frame_id}")
         return JSONResponse(
@@ -448,8 +785,9 @@ async def get_missing_person_frame(
                     "frame_id": frame.frame_id,
                     "present_camera": frame.cam_id,
                     "missing_person_id": frame.missing_person_id,
-                    "frame_image": f"data:image/jpeg;base64,{encoded_frame_image}",
-                    "registered_photo": f"data:image/jpeg;base64,{encoded_registered_photo}",
+                    "frame_image": frame_image_url,
+                    "image_mode": image_mode,
+                    "registered_photo": registered_photo_url,
                     "total_frames": total_frames - 1,
                     "camera_names": camera_ids
                 }
@@ -468,80 +806,1185 @@ async def get_missing_person_frame(
         )
 
 
-############################
-# Video Streaming Endpoint
-############################
+def match_time_filters(start_date: str = None, end_date: str = None,
+                       start_timestamp: str = None, end_timestamp: str = None) -> list:
+    """
+    Build SQL conditions restricting missing person matches to a time window.
 
-# Upload video for processing
-@app.post("/api/upload_video",status_code=status.HTTP_201_CREATED)
-async def upload_video_only(
+    - With a date, bounds apply to the absolute capture time and a timestamp sets the time of day
+      of its bound; a bound without its own date uses the other one (a single day with a time range).
+    - Without dates, timestamps ("0:01:30", "90") bound the offset into the video.
+
+    Raises:
+        ValueError: If a value is malformed or the window is empty.
+    """
+    conditions = []
+    if start_date or end_date:
+        if start_date or start_timestamp:
+            lower = parse_time_bound(start_date or end_date, start_timestamp)
+            conditions.append(MissingPersonsFrame.captured_at >= lower)
+        if end_date or end_timestamp:
+            upper = parse_time_bound(end_date or start_date, end_timestamp, end=True)
+            conditions.append(MissingPersonsFrame.captured_at <= upper)
+        if len(conditions) == 2 and lower > upper:
+            raise ValueError("start is after end")
+        return conditions
+
+    if start_timestamp:
+        conditions.append(MissingPersonsFrame.timestamp_seconds >= parse_duration(start_timestamp))
+    if end_timestamp:
+        conditions.append(MissingPersonsFrame.timestamp_seconds <= parse_duration(end_timestamp))
+    return conditions
+
+# List matches of a missing person page by page
+@app.get("/api/missing_person_matches", status_code=status.HTTP_200_OK)
+def list_missing_person_matches(
     user_id: str = Depends(get_current_user),
-    video_file: UploadFile = File(..., description="MP4 video file to be uploaded."),
-    frame_skip:int = Form(..., description="Number of frames to skip between extractions")
+    missing_person_id: str = Query(..., description="Missing person ID to list matches for"),
+    camera_id: str = Query(None, description="Restrict the listing to one camera"),
+    cursor: str = Query(None, description="Cursor returned as `next_cursor` by the previous page"),
+    limit: int = Query(50, ge=1, le=500, description="Number of matches per page"),
+    start_date: str = Query(None, description="Earliest capture date (YYYY-MM-DD or ISO datetime, UTC)"),
+    end_date: str = Query(None, description="Latest capture date (YYYY-MM-DD or ISO datetime, UTC)"),
+    start_timestamp: str = Query(None, description="Start time of day with a date, or video offset without one"),
+    end_timestamp: str = Query(None, description="End time of day with a date, or video offset without one"),
+    image_mode: str = Query("thumbnail", description="Image mode used for `image_url`: 'frame', 'crop' or 'thumbnail'"),
+    db: Session = Depends(get_db)
 ):
     """
-    Upload and process an MP4 video to extract frames for facial recognition.
+    Return a page of matches for a missing person in a single query.
 
-    This endpoint allows an authenticated user to upload a video file (only `.mp4` format supported),
-    stores it temporarily, extracts frames using a detection model, and then deletes the file after processing.
+    Matches are ordered by camera and match index and paginated with an opaque keyset cursor,
+    so later pages cost the same as the first one. The first page (no cursor) also carries the
+    number of matches per camera.
 
     Args:
-        video_file (UploadFile): The video file uploaded by the user.
-        user_id (str): Authenticated user ID extracted from JWT.
+        user_id (str): Authenticated user ID from JWT.
+        missing_person_id (str): ID of the missing person.
+        camera_id (str): (Optional) Restrict the listing to one camera.
+        cursor (str): (Optional) Cursor of the page to fetch.
+        limit (int): Page size.
+        start_date (str): (Optional) Filter by start date.
+        end_date (str): (Optional) Filter by end date.
+        start_timestamp (str): (Optional) Filter by start timestamp, see `match_time_filters`.
+        end_timestamp (str): (Optional) Filter by end timestamp, see `match_time_filters`.
+        image_mode (str): Image mode used to build the image URLs.
+        db (Session): SQLAlchemy DB session.
+
+    Raises:
+        HTTPException: If the cursor, time range or image mode is invalid (400).
+        HTTPException: For database errors (500).
 
     Returns:
-        JSONResponse: A success message with the associated camera ID on successful processing,
-                      or an error message with the appropriate status code.
+        dict: Matches of the page, `next_cursor` (None on the last page) and per-camera counts.
     """
-    # Validate video file type
-    if video_file.content_type != "video/mp4":
-        logger.warning(f" Invalid video format: {video_file.content_type}")
+    if image_mode not in IMAGE_MODES:
+        logger.warning(f"Invalid image mode requested: {image_mode}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only MP4 videos are accepted."
+            detail=f"image_mode must be one of: {', '.join(IMAGE_MODES)}."
         )
 
-    temp_video_dir = config.UPLOAD_DIR
-    os.makedirs(temp_video_dir, exist_ok=True)
+    try:
+        query = db.query(
+            MissingPersonsFrame.cam_id,
+            MissingPersonsFrame.missing_frame_id,
+            MissingPersonsFrame.frame_id,
+            MissingPersonsFrame.timestamp,
+            MissingPersonsFrame.captured_at,
+            *MATCH_ARRAY_COLUMNS  # boxes, score and timestamp_seconds
+        ).filter(MissingPersonsFrame.missing_person_id == missing_person_id)
+
+        try:
+            time_filters = match_time_filters(start_date, end_date, start_timestamp, end_timestamp)
+        except ValueError as err:
+            logger.warning(f"Invalid time range for person_id={missing_person_id}: {err}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid time range: {err}"
+            )
+        query = query.filter(*time_filters)
+
+        if camera_id:
+            query = query.filter(MissingPersonsFrame.cam_id == camera_id)
+
+        if cursor:
+            try:
+                position = decode_cursor(cursor)
+                last_cam, last_match = str(position["cam_id"]), int(position["missing_frame_id"])
+            except (ValueError, KeyError, TypeError) as err:
+                logger.warning(f"Invalid cursor for person_id={missing_person_id}: {err}")
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid cursor."
+                )
+            query = query.filter(or_(
+                MissingPersonsFrame.cam_id > last_cam,
+                and_(MissingPersonsFrame.cam_id == last_cam, MissingPersonsFrame.missing_frame_id > last_match)
+            ))
+
+        # Fetch one extra row to know whether another page follows
+        rows = query.order_by(MissingPersonsFrame.cam_id, MissingPersonsFrame.missing_frame_id)\
+            .limit(limit + 1)\
+            .all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        matches = [
+            {
+                "cam_id": row.cam_id,
+                "missing_frame_id": row.missing_frame_id,
+                "frame_id": row.frame_id,
+                "timestamp": row.timestamp,
+                "timestamp_seconds": row.timestamp_seconds,
+                "captured_at": row.captured_at.isoformat() if row.captured_at else None,
+                "score": row.score,
+                "box": [row.box_x1, row.box_y1, row.box_x2, row.box_y2] if row.box_x1 is not None else None,
+                "image_url": f"/api/images/frame/{missing_person_id}/{row.cam_id}/{row.missing_frame_id}?image_mode={image_mode}",
+                "frame_url": f"/api/images/frame/{missing_person_id}/{row.cam_id}/{row.missing_frame_id}?image_mode=frame"
+            }
+            for row in rows
+        ]
+        next_cursor = encode_cursor({
+            "cam_id": rows[-1].cam_id,
+            "missing_frame_id": rows[-1].missing_frame_id
+        }) if has_more else None
+
+        response = {
+            "missing_person_id": missing_person_id,
+            "matches": matches,
+            "next_cursor": next_cursor,
+            "registered_photo": f"/api/images/registered_photo/{missing_person_id}"
+        }
 
-    temp_video_path = os.path.join(temp_video_dir, video_file.filename)
+        # Per-camera totals only change with registration, so they are sent with the first page
+        if not cursor:
+            camera_counts = db.query(MissingPersonsFrame.cam_id, func.count())\
+                .filter(MissingPersonsFrame.missing_person_id == missing_person_id, *time_filters)\
+                .group_by(MissingPersonsFrame.cam_id)\
+                .order_by(MissingPersonsFrame.cam_id)\
+                .all()
+            response["camera_counts"] = {cam: count for cam, count in camera_counts}
 
-    detector_model = None
-    try:
-        # Save uploaded video to temporary path
-        with open(temp_video_path, "wb") as output_file:
-            shutil.copyfileobj(video_file.file, output_file)
+        logger.info(f"Returned {len(matches)} matches for person_id={missing_person_id}, has_more={has_more}")
+        return response
 
-        logger.info(f"Video uploaded and saved to: {temp_video_path}")
+    except HTTPException as http_err:
+        raise http_err
 
-        # Initialize detection model and extract frames
-        detector_model = Model(config.MODEL_PATH)
-        frame_extractor = Video_FramesStorage(detection_model=detector_model)
+    except SQLAlchemyError as db_err:
+        logger.error(f"Database error while listing matches: {db_err}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error. Please try again later."
+        )
 
-        logger.info(f"Beginning frame extraction.")
-        extraction_success = frame_extractor.extract_frames(temp_video_path,frame_skip)
 
-        if not extraction_success:
-            logger.error(f"Frame extraction failed for video: {video_file.filename}")
+# Cross-camera timeline of a missing person
+@app.get("/api/missing_persons/{missing_person_id}/timeline", status_code=status.HTTP_200_OK)
+def get_missing_person_timeline(
+    missing_person_id: str,
+    camera_id: str = Query(None, description="Restrict the timeline to one camera"),
+    start_date: str = Query(None, description="Earliest capture date (YYYY-MM-DD or ISO datetime, UTC)"),
+    end_date: str = Query(None, description="Latest capture date (YYYY-MM-DD or ISO datetime, UTC)"),
+    image_mode: str = Query("thumbnail", description="Image mode used for `image_url`: 'frame', 'crop' or 'thumbnail'"),
+    user_id: str = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Return where a missing person was seen as an ordered list of sightings across cameras.
+
+    A sighting is a contiguous appearance on one camera (matches at most `SIGHTING_GAP_SECONDS`
+    apart) with its first and last time, number of matches, best score and representative
+    frame. Sightings are kept up to date as matches are recorded, so the timeline is read in
+    one query instead of scanning every match. They are ordered by capture time; sightings
+    of cameras without a known start time follow, by camera and video offset.
+
+    Args:
+        missing_person_id (str): ID of the missing person.
+        camera_id (str): (Optional) Restrict the timeline to one camera.
+        start_date (str): (Optional) Keep sightings that end at or after this capture time.
+        end_date (str): (Optional) Keep sightings that start at or before this capture time.
+        image_mode (str): Image mode used to build the image URLs.
+        user_id (str): Authenticated user ID from JWT.
+        db (Session): SQLAlchemy DB session.
+
+    Raises:
+        HTTPException: If the date range or image mode is invalid (400).
+        HTTPException: If the missing person is not found (404).
+        HTTPException: For database errors (500).
+
+    Returns:
+        dict: Sightings in timeline order and the number of cameras they span.
+    """
+    if image_mode not in IMAGE_MODES:
+        logger.warning(f"Invalid image mode requested: {image_mode}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"image_mode must be one of: {', '.join(IMAGE_MODES)}."
+        )
+
+    try:
+        if db.get(MissingPersons, missing_person_id) is None:
+            logger.warning(f"Timeline requested for unknown person_id={missing_person_id}")
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Frame extraction failed."
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Missing person not found."
             )
 
-        logger.info(f"Video processed successfully. Camera ID: {frame_extractor.cam_id}")
+        query = db.query(Sighting).filter(Sighting.missing_person_id == missing_person_id)
+        if camera_id:
+            query = query.filter(Sighting.cam_id == camera_id)
+        try:
+            if start_date:
+                query = query.filter(Sighting.last_seen >= parse_time_bound(start_date))
+            if end_date:
+                query = query.filter(Sighting.first_seen <= parse_time_bound(end_date, end=True))
+        except ValueError as err:
+            logger.warning(f"Invalid date range for person_id={missing_person_id}: {err}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid date range: {err}"
+            )
+
+        sightings = query.order_by(Sighting.first_seen.is_(None), Sighting.first_seen,
+                                   Sighting.cam_id, Sighting.first_seconds).all()
+        timeline = [
+            {
+                "cam_id": sighting.cam_id,
+                "first_seen": sighting.first_seen.isoformat() if sighting.first_seen else None,
+                "last_seen": sighting.last_seen.isoformat() if sighting.last_seen else None,
+                "first_seconds": sighting.first_seconds,
+                "last_seconds": sighting.last_seconds,
+                "duration_seconds": sighting.last_seconds - sighting.first_seconds,
+                "match_count": sighting.match_count,
+                "best_score": sighting.best_score,
+                "frame_id": sighting.best_frame_id,
+                "missing_frame_id": sighting.best_missing_frame_id,
+                "image_url": f"/api/images/frame/{missing_person_id}/{sighting.cam_id}/{sighting.best_missing_frame_id}?image_mode={image_mode}"
+            }
+            for sighting in sightings
+        ]
+
+        logger.info(f"Returned timeline of {len(timeline)} sightings for person_id={missing_person_id}")
         return {
-            "message": "Video processed successfully.",
-            "camera_id": frame_extractor.cam_id
+            "missing_person_id": missing_person_id,
+            "sightings": timeline,
+            "camera_count": len({sighting.cam_id for sighting in sightings})
         }
 
-    except Exception as err:
-        logger.exception(f"Error occurred while processing video: {str(err)}")
+    except HTTPException as http_err:
+        raise http_err
+
+    except SQLAlchemyError as db_err:
+        logger.error(f"Database error while building timeline: {db_err}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Internal server error: {str(err)}"
+            detail="Internal server error. Please try again later."
         )
 
-    finally:
-        if detector_model:
-            detector_model = None
-            logger.debug("Detection model released.")
\ No newline at end of file
+############################
+# Image Endpoints
+############################
+
+# Get a (possibly annotated) frame image for a missing person match
+@app.get("/api/images/frame/{missing_person_id}/{cam_id}/{missing_frame_id}", status_code=status.HTTP_200_OK)
+def get_frame_image(
+    request: Request,
+    missing_person_id: str,
+    cam_id: str,
+    missing_frame_id: int,
+    image_mode: str = Query("frame", description="Image to return: full annotated 'frame', face 'crop' or 'thumbnail'"),
+    user_id: str = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream the JPEG image of a matched frame as raw bytes.
+
+    Responses carry an `ETag` and `Cache-Control: no-cache`: match numbers are reassigned when
+    a person's gallery changes, so clients revalidate every time, and a request whose
+    `If-None-Match` matches the current ETag gets `304 Not Modified` without the image being rendered.
+    Rendered images are kept in a bounded in-memory LRU cache keyed by
+    (missing_person_id, cam_id, missing_frame_id, image_mode).
+
+    Args:
+        request (Request): Incoming request, used for conditional headers.
+        missing_person_id (str): ID of the missing person.
+        cam_id (str): ID of the camera the frame was recorded by.
+        missing_frame_id (int): Index of the match within the camera.
+        image_mode (str): One of "frame", "crop" or "thumbnail".
+        user_id (str): Authenticated user ID from JWT.
+        db (Session): SQLAlchemy DB session.
+
+    Raises:
+        HTTPException: If the image mode is invalid (400).
+        HTTPException: If the match or its image is not found (404).
+
+    Returns:
+        Response: JPEG image bytes, or an empty 304 response.
+    """
+    if image_mode not in IMAGE_MODES:
+        logger.warning(f"Invalid image mode requested: {image_mode}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"image_mode must be one of: {', '.join(IMAGE_MODES)}."
+        )
+
+    # Serve previously rendered images straight from memory
+    cache_key = (missing_person_id, cam_id, missing_frame_id, image_mode)
+    cached = image_cache.get(cache_key)
+    if cached is not None:
+        etag, jpeg_bytes = cached
+        return jpeg_response(request, etag, lambda: jpeg_bytes, revalidate=True)
+
+    frame = db.query(MissingPersonsFrame).filter_by(
+        missing_person_id=missing_person_id,
+        cam_id=cam_id,
+        missing_frame_id=missing_frame_id
+    ).first()
+    if not frame:
+        logger.warning(f"No frame found for person_id={missing_person_id}, camera_id={cam_id}, missing_frame_id={missing_frame_id}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Frame not found for given ID and camera."
+        )
+
+    try:
+        etag = image_etag(frame.cam_id, frame.frame_id, box=frame.box, face_idx=frame.face_idx, mode=image_mode)
+
+        def load_image():
+            jpeg_bytes = render_image(frame.cam_id, frame.frame_id, box=frame.box, face_idx=frame.face_idx, mode=image_mode)
+            image_cache.put(cache_key, etag, jpeg_bytes)
+            return jpeg_bytes
+
+        return jpeg_response(request, etag, load_image, revalidate=True)
+    except FileNotFoundError as missing:
+        logger.error(f"Frame image not found on disk at {missing}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Frame image file not found on disk."
+        )
+
+# Get the registered photo of a missing person
+@app.get("/api/images/registered_photo/{missing_person_id}", status_code=status.HTTP_200_OK)
+def get_registered_photo(
+    request: Request,
+    missing_person_id: str,
+    user_id: str = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream the registered photo of a missing person as raw JPEG bytes.
+
+    The photo is stored as JPEG at registration time, so it is returned without re-encoding
+    and kept in the in-memory image cache.
+    Supports `ETag` based conditional requests like the frame image endpoint.
+
+    Args:
+        request (Request): Incoming request, used for conditional headers.
+        missing_person_id (str): ID of the missing person.
+        user_id (str): Authenticated user ID from JWT.
+        db (Session): SQLAlchemy DB session.
+
+    Raises:
+        HTTPException: If the person or photo is not found (404).
+
+    Returns:
+        Response: JPEG image bytes, or an empty 304 response.
+    """
+    def load_photo():
+        row = db.query(MissingPersons.photo).filter_by(missing_person_id=missing_person_id).first()
+        if not row or not row.photo:
+            logger.warning(f"No registered photo found for person_id={missing_person_id}")
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Registered photo not found for given ID."
+            )
+        return make_etag(row.photo), row.photo
+
+    etag, jpeg_bytes = image_cache.get_or_load((missing_person_id, "registered_photo"), load_photo)
+    return jpeg_response(request, etag, lambda: jpeg_bytes)
+
+# Get a gallery photo of a missing person
+@app.get("/api/images/gallery_photo/{missing_person_id}/{photo_id}", status_code=status.HTTP_200_OK)
+def get_gallery_photo(
+    request: Request,
+    missing_person_id: str,
+    photo_id: str,
+    user_id: str = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream a reference photo from a missing person's gallery as raw JPEG bytes.
+
+    Args:
+        request (Request): Incoming request, used for conditional headers.
+        missing_person_id (str): ID of the missing person.
+        photo_id (str): ID of the gallery photo.
+        user_id (str): Authenticated user ID from JWT.
+        db (Session): SQLAlchemy DB session.
+
+    Raises:
+        HTTPException: If the photo is not found (404).
+
+    Returns:
+        Response: JPEG image bytes, or an empty 304 response.
+    """
+    def load_photo():
+        row = db.query(MissingPersonPhoto.photo) \
+            .filter_by(missing_person_id=missing_person_id, photo_id=photo_id).first()
+        if not row or not row.photo:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Gallery photo not found."
+            )
+        return make_etag(row.photo), row.photo
+
+    etag, jpeg_bytes = image_cache.get_or_load((missing_person_id, "gallery_photo", photo_id), load_photo)
+    return jpeg_response(request, etag, lambda: jpeg_bytes)
+
+# Image cache statistics
+@app.get("/api/image_cache/stats", status_code=status.HTTP_200_OK)
+def get_image_cache_stats(user_id: str = Depends(get_current_user)):
+    """
+    Report hit/miss counters and occupancy of the in-memory image cache.
+
+    Args:
+        user_id (str): Authenticated user ID from JWT.
+
+    Returns:
+        dict: Cache statistics.
+    """
+    return image_cache.stats()
+
+
+############################
+# Video Streaming Endpoint
+############################
+
+# Upload video for processing
+@app.post("/api/upload_video",status_code=status.HTTP_201_CREATED)
+async def upload_video_only(
+    user_id: str = Depends(get_current_user),
+    video_file: UploadFile = File(..., description="MP4 video file to be uploaded."),
+    frame_skip:int = Form(..., description="Number of frames to skip between extractions"),
+    store_crops: bool = Form(config.STORE_FACE_CROPS, description="Store face crops and thumbnails for each detection"),
+    recorded_at: datetime = Form(None, description="Capture time of the first frame (ISO 8601), defaults to upload time"),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload and process an MP4 video to extract frames for facial recognition.
+
+    This endpoint allows an authenticated user to upload a video file (only `.mp4` format supported),
+    stores it temporarily, extracts frames using a detection model, and then deletes the file after processing.
+    With `INGEST_QUEUE` enabled the video is queued for the ingest workers instead and the response
+    (202) carries the job ID to follow with `GET /api/ingest_jobs/{job_id}`.
+
+    Args:
+        video_file (UploadFile): The video file uploaded by the user.
+        user_id (str): Authenticated user ID extracted from JWT.
+        frame_skip (int): Number of frames to skip between extractions.
+        store_crops (bool): Whether to persist a face crop and thumbnail per detection.
+        recorded_at (datetime): Capture time of the first frame, anchors absolute frame times.
+        db (Session): SQLAlchemy DB session.
+
+    Returns:
+        JSONResponse: A success message with the associated camera ID on successful processing,
+                      or an error message with the appropriate status code.
+    """
+    # Validate video file type
+    if video_file.content_type != "video/mp4":
+        logger.warning(f" Invalid video format: {video_file.content_type}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only MP4 videos are accepted."
+        )
+
+    temp_video_dir = config.UPLOAD_DIR
+    os.makedirs(temp_video_dir, exist_ok=True)
+
+    # Unique name so concurrent uploads of files with the same name don't overwrite each other
+    temp_video_path = os.path.join(temp_video_dir, f"{uuid.uuid4()}_{os.path.basename(video_file.filename)}")
+
+    # Disk and database work below is blocking, so it runs in the threadpool like the extraction
+    def save_video():
+        with open(temp_video_path, "wb") as output_file:
+            return copy_and_hash(video_file.file, output_file)
+
+    def claim_hash(video_hash, video_size, cam_id):
+        # Returns the row of an identical video that was already claimed, or None once claimed
+        try:
+            db.add(VideoHash(content_hash=video_hash, cam_id=cam_id, filename=video_file.filename, size=video_size))
+            db.commit()
+            return None
+        except IntegrityError:
+            db.rollback()
+            return db.get(VideoHash, video_hash)
+
+    def mark_processed(video_hash, frame_extractor):
+        # Record the camera so match times can be related back to the recording
+        db.add(Camera(
+            cam_id=f"cam-{frame_extractor.cam_id}",
+            source=video_file.filename,
+            started_at=frame_extractor.started_at,
+            fps=frame_extractor.fps
+        ))
+        db.get(VideoHash, video_hash).status = "done"
+        db.commit()
+
+    def release_hash(video_hash):
+        db.rollback()
+        db.query(VideoHash).filter_by(content_hash=video_hash, status="processing").delete()
+        db.commit()
+
+    claimed_hash = None
+    queued = False
+    try:
+        # Save uploaded video to temporary path, hashing it on the way
+        video_hash, video_size = await run_in_threadpool(save_video)
+
+        logger.info(f"Video uploaded and saved to: {temp_video_path} (sha256 {video_hash})")
+
+        frame_extractor = Video_FramesStorage(
+            store_crops=store_crops,
+            started_at=to_utc_naive(recorded_at) if recorded_at else None
+        )
+
+        # Claim the content hash; an identical video that was already uploaded is not reprocessed
+        existing = await run_in_threadpool(claim_hash, video_hash, video_size, f"cam-{frame_extractor.cam_id}")
+        if existing:
+            logger.info(f"Duplicate video upload {video_file.filename}, matches camera {existing.cam_id}")
+            await run_in_threadpool(frame_extractor.discard)
+            return {
+                "message": "Video already processed." if existing.status == "done" else "Video is already being processed.",
+                "camera_id": existing.cam_id.removeprefix("cam-"),
+                "duplicate": True
+            }
+        claimed_hash = video_hash
+
+        if config.INGEST_QUEUE:
+            # Hand the video to the ingest workers; they resolve the content hash when the job ends
+            job_id = await run_in_threadpool(
+                ingest_queue.enqueue,
+                os.path.basename(temp_video_path),
+                f"cam-{frame_extractor.cam_id}",
+                frame_skip,
+                store_crops=store_crops,
+                recorded_at=frame_extractor.started_at,
+                filename=video_file.filename,
+                content_hash=video_hash
+            )
+            claimed_hash = None
+            queued = True
+            return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content={
+                "message": "Video queued for processing.",
+                "camera_id": frame_extractor.cam_id,
+                "job_id": job_id
+            })
+
+        # Initialize detection model and extract frames
+        frame_extractor.detection_model = await run_in_threadpool(model_loader.create)
+
+        logger.info(f"Beginning frame extraction.")
+        # Run extraction off the event loop so other requests and live alerts keep flowing
+        extraction_success = await run_in_threadpool(frame_extractor.extract_frames, temp_video_path, frame_skip)
+
+        if not extraction_success:
+            logger.error(f"Frame extraction failed for video: {video_file.filename}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Frame extraction failed."
+            )
+
+        await run_in_threadpool(mark_processed, claimed_hash, frame_extractor)
+        claimed_hash = None
+
+        logger.info(f"Video processed successfully. Camera ID: {frame_extractor.cam_id}")
+        return {
+            "message": "Video processed successfully.",
+            "camera_id": frame_extractor.cam_id
+        }
+
+    except Exception as err:
+        logger.exception(f"Error occurred while processing video: {str(err)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(err)}"
+        )
+
+    finally:
+        # Release the hash of a failed upload so the video can be uploaded again
+        if claimed_hash:
+            await run_in_threadpool(release_hash, claimed_hash)
+        # extract_frames removes the video once processed; clean up after failures too
+        if not queued and os.path.exists(temp_video_path):
+            os.remove(temp_video_path)
+            logger.info(f"Removed leftover video file {temp_video_path}")
+
+
+# Ingest queue depth
+@app.get("/api/ingest_jobs", status_code=status.HTTP_200_OK)
+def get_ingest_queue(user_id: str = Depends(get_current_user)):
+    """
+    Report how many queued video jobs are waiting, running, done or failed.
+
+    Args:
+        user_id (str): Authenticated user ID from JWT.
+
+    Returns:
+        dict: Whether uploads are queued and the number of jobs per status.
+    """
+    return {"enabled": config.INGEST_QUEUE, "jobs": ingest_queue.counts()}
+
+# Status of a queued video job
+@app.get("/api/ingest_jobs/{job_id}", status_code=status.HTTP_200_OK)
+def get_ingest_job(job_id: str, user_id: str = Depends(get_current_user)):
+    """
+    Report the status, attempts, worker and progress of a queued video.
+
+    Args:
+        job_id (str): Job ID returned by the upload.
+        user_id (str): Authenticated user ID from JWT.
+
+    Raises:
+        HTTPException: If the job does not exist (404).
+
+    Returns:
+        dict: Job status; `position` is the next frame to process.
+    """
+    info = ingest_queue.info(job_id)
+    if info is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ingest job not found."
+        )
+    return info
+
+def get_upload_session(upload_id: str, user_id: str):
+    """Return the caller's chunked upload session or raise 404."""
+    session = upload_registry.get(upload_id)
+    if session is None or session.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload not found."
+        )
+    return session
+
+# Start a chunked, resumable video upload
+@app.post("/api/uploads", status_code=status.HTTP_201_CREATED)
+def create_chunked_upload(
+    user_id: str = Depends(get_current_user),
+    filename: str = Form(..., description="Name of the video file (.mp4 or .ts)"),
+    frame_skip: int = Form(..., description="Number of frames to skip between extractions"),
+    total_size: int = Form(None, description="Total size of the file in bytes, checked on completion"),
+    progressive: bool = Form(True, description="Start processing before the upload completes when the format allows it"),
+    store_crops: bool = Form(config.STORE_FACE_CROPS, description="Store face crops and thumbnails for each detection"),
+    recorded_at: datetime = Form(None, description="Capture time of the first frame (ISO 8601), defaults to upload time"),
+    content_hash: str = Form(None, description="SHA-256 of the file, lets duplicates return before any bytes are sent"),
+    db: Session = Depends(get_db)
+):
+    """
+    Open a chunked upload session for a video.
+
+    Chunks are then sent with `PUT /api/uploads/{upload_id}?offset=N`. With `progressive`
+    processing, faststart/fragmented MP4 and MPEG-TS files start decoding as soon as the
+    first megabytes arrive; other files are processed once the upload is completed.
+
+    Args:
+        user_id (str): Authenticated user ID from JWT.
+        filename (str): Name of the video file.
+        frame_skip (int): Number of frames to skip between extractions.
+        total_size (int): (Optional) Expected size in bytes.
+        progressive (bool): Whether to process while uploading.
+        store_crops (bool): Whether to persist a face crop and thumbnail per detection.
+        recorded_at (datetime): Capture time of the first frame.
+        content_hash (str): (Optional) Client-computed SHA-256 of the file.
+        db (Session): SQLAlchemy DB session.
+
+    Raises:
+        HTTPException: If the file type is not supported (400).
+
+    Returns:
+        dict: Upload session state, including `upload_id`, or the camera of an identical
+              video that was already processed (status "duplicate").
+    """
+    if os.path.splitext(filename)[1].lower() not in UPLOAD_EXTENSIONS:
+        logger.warning(f"Invalid chunked upload file type: {filename}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Only {', '.join(UPLOAD_EXTENSIONS)} videos are accepted."
+        )
+
+    if content_hash:
+        existing = db.get(VideoHash, content_hash.lower())
+        if existing is not None and existing.status == "done":
+            logger.info(f"Duplicate upload of {filename} skipped, matches camera {existing.cam_id}")
+            return {
+                "upload_id": None,
+                "filename": filename,
+                "status": "duplicate",
+                "content_hash": existing.content_hash,
+                "camera_id": existing.cam_id.removeprefix("cam-")
+            }
+
+    session = upload_registry.create(
+        user_id=user_id,
+        filename=filename,
+        frame_skip=frame_skip,
+        store_crops=store_crops,
+        started_at=to_utc_naive(recorded_at) if recorded_at else None,
+        progressive=progressive,
+        total_size=total_size
+    )
+    logger.info(f"Chunked upload {session.upload_id} created for {filename} by user {user_id}")
+    return session.info()
+
+# Append a chunk to an upload
+@app.put("/api/uploads/{upload_id}", status_code=status.HTTP_200_OK)
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset of the chunk, must equal the bytes received so far"),
+    user_id: str = Depends(get_current_user)
+):
+    """
+    Append the raw request body to an upload at `offset`.
+
+    The body is written as it streams in, in pieces of up to `UPLOAD_CHUNK_SIZE` appended on a
+    worker thread so file writes never block the event loop. If the offset does not match the bytes
+    received so far (e.g. after a dropped connection), 409 is returned with the offset to resume from.
+
+    Args:
+        upload_id (str): Upload session ID.
+        request (Request): Incoming request whose body is the chunk.
+        offset (int): Byte offset of the chunk.
+        user_id (str): Authenticated user ID from JWT.
+
+    Raises:
+        HTTPException: If the upload is unknown (404).
+        HTTPException: If the offset is wrong or the upload is complete (409).
+
+    Returns:
+        dict: Upload session state.
+    """
+    session = get_upload_session(upload_id, user_id)
+    try:
+        buffered = bytearray()
+        async for piece in request.stream():
+            buffered += piece
+            if len(buffered) >= config.UPLOAD_CHUNK_SIZE:
+                offset = await run_in_threadpool(session.append, offset, bytes(buffered))
+                buffered.clear()
+        if buffered:
+            await run_in_threadpool(session.append, offset, bytes(buffered))
+    except ValueError as err:
+        logger.warning(f"Rejected chunk for upload {upload_id}: {err}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(err), "offset": session.received}
+        )
+    return session.info()
+
+# Complete an upload
+@app.post("/api/uploads/{upload_id}/complete", status_code=status.HTTP_202_ACCEPTED)
+def complete_upload(
+    upload_id: str,
+    user_id: str = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Mark an upload complete. Processing continues (or starts) in the background;
+    poll `GET /api/uploads/{upload_id}` for its status and camera ID.
+    If the same file was uploaded before and processing has not started yet,
+    the upload resolves immediately to the earlier camera (status "duplicate").
+
+    Args:
+        upload_id (str): Upload session ID.
+        user_id (str): Authenticated user ID from JWT.
+        db (Session): SQLAlchemy DB session.
+
+    Raises:
+        HTTPException: If the upload is unknown (404).
+        HTTPException: If fewer bytes than `total_size` were received (409).
+
+    Returns:
+        dict: Upload session state.
+    """
+    session = get_upload_session(upload_id, user_id)
+    try:
+        content_hash = session.finish()
+    except ValueError as err:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(err), "offset": session.received}
+        )
+    logger.info(f"Chunked upload {upload_id} completed with {session.received} bytes (sha256 {content_hash})")
+
+    # An identical video was uploaded before: reuse its camera unless processing already started
+    existing = db.get(VideoHash, content_hash)
+    if existing is not None and not session.processing_started:
+        logger.info(f"Duplicate chunked upload {upload_id}, matches camera {existing.cam_id}")
+        session.mark_duplicate(existing.cam_id)
+    else:
+        session.start_processing()
+    return session.info()
+
+# Get upload and processing status
+@app.get("/api/uploads/{upload_id}", status_code=status.HTTP_200_OK)
+def get_upload_status(upload_id: str, user_id: str = Depends(get_current_user)):
+    """
+    Report bytes received (the offset to resume from) and processing progress of an upload.
+
+    Args:
+        upload_id (str): Upload session ID.
+        user_id (str): Authenticated user ID from JWT.
+
+    Raises:
+        HTTPException: If the upload is unknown (404).
+
+    Returns:
+        dict: Upload session state.
+    """
+    return get_upload_session(upload_id, user_id).info()
+
+# Abort an upload
+@app.delete("/api/uploads/{upload_id}", status_code=status.HTTP_200_OK)
+def abort_upload(upload_id: str, user_id: str = Depends(get_current_user)):
+    """
+    Abort an upload, stopping its processing and removing the temporary file.
+    Frames and vectors already stored are kept.
+
+    Args:
+        upload_id (str): Upload session ID.
+        user_id (str): Authenticated user ID from JWT.
+
+    Raises:
+        HTTPException: If the upload is unknown (404).
+
+    Returns:
+        dict: Success message.
+    """
+    session = get_upload_session(upload_id, user_id)
+    session.abort()
+    upload_registry.remove(upload_id)
+    return {"message": "Upload aborted."}
+
+
+############################
+# Live Stream Endpoints
+############################
+
+# Start ingesting a live camera
+@app.post("/api/streams", status_code=status.HTTP_201_CREATED)
+def start_stream(
+    stream_source: StreamSource,
+    user_id: str = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Start continuous ingestion of a live camera source.
+
+    A dedicated reader thread keeps only the newest frame of the source, so processing
+    always works on live video and latency stays bounded; dropped streams are reconnected
+    with exponential backoff.
+
+    Args:
+        stream_source (StreamSource): Source URL/path/webcam index and processing options.
+        user_id (str): Authenticated user ID from JWT.
+        db (Session): SQLAlchemy DB session.
+
+    Raises:
+        HTTPException: If the source is not an allowed URL, webcam or file (400).
+        HTTPException: If the stream cannot be started (500).
+
+    Returns:
+        dict: Success message and the camera ID assigned to the stream.
+    """
+    try:
+        source = check_stream_source(stream_source.source)
+    except ValueError as err:
+        logger.warning(f"User {user_id} requested a disallowed stream source: {err}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(err)
+        )
+
+    try:
+        stream = stream_service.add_stream(
+            source,
+            max_fps=stream_source.max_fps,
+            store_crops=stream_source.store_crops,
+            loop=stream_source.loop
+        )
+        db.add(Camera(cam_id=stream.cam_id, source=stream.source, started_at=stream.storage.started_at))
+        db.commit()
+        logger.info(f"User {user_id} started stream {stream.cam_id}")
+        return {
+            "message": "Stream ingestion started.",
+            "camera_id": stream.cam_id
+        }
+
+    except Exception as err:
+        logger.exception(f"Error starting stream ingestion: {str(err)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Internal server error: {str(err)}"
+        )
+
+# List live cameras with their ingestion metrics
+@app.get("/api/streams", status_code=status.HTTP_200_OK)
+def list_streams(user_id: str = Depends(get_current_user)):
+    """
+    Report status, frame counters and end-to-end latency of every live camera.
+
+    Args:
+        user_id (str): Authenticated user ID from JWT.
+
+    Returns:
+        dict: Per-camera statistics.
+    """
+    return {"streams": stream_service.stats()}
+
+# Stop ingesting a live camera
+@app.delete("/api/streams/{cam_id}", status_code=status.HTTP_200_OK)
+def stop_stream(cam_id: str, user_id: str = Depends(get_current_user)):
+    """
+    Stop ingestion of a live camera. Frames and vectors stored so far are kept.
+
+    Args:
+        cam_id (str): Camera ID returned when the stream was started.
+        user_id (str): Authenticated user ID from JWT.
+
+    Raises:
+        HTTPException: If no stream is running under that ID (404).
+
+    Returns:
+        dict: Success message.
+    """
+    if not stream_service.remove_stream(cam_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No running stream with given camera ID."
+        )
+    return {"message": "Stream ingestion stopped."}
+
+@app.on_event("shutdown")
+def stop_all_streams():
+    """Stop every live camera reader and worker when the server shuts down."""
+    stream_service.shutdown()
+
+
+############################
+# Live Alert Endpoints
+############################
+
+# Subscribe to match alerts as Server-Sent Events
+@app.get("/api/alerts/stream", status_code=status.HTTP_200_OK)
+async def stream_alerts(request: Request, user_id: str = Depends(get_current_user)):
+    """
+    Push an alert event whenever an ingested face matches a registered missing person.
+
+    Events are sent as Server-Sent Events (`event: match`) carrying the person, camera,
+    frame, box, score and capture time. Alerts are throttled per person, and a comment
+    line is sent periodically to keep idle connections open through proxies.
+
+    Args:
+        request (Request): Incoming request, used to detect client disconnects.
+        user_id (str): Authenticated user ID from JWT.
+
+    Returns:
+        StreamingResponse: `text/event-stream` of match alerts.
+    """
+    queue = alert_broker.subscribe()
+    logger.info(f"User {user_id} subscribed to match alerts")
+
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=config.ALERT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            alert_broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Alert delivery statistics
+@app.get("/api/alerts/stats", status_code=status.HTTP_200_OK)
+def get_alert_stats(user_id: str = Depends(get_current_user)):
+    """
+    Report subscriber count and published/throttled/dropped alert counters.
+
+    Args:
+        user_id (str): Authenticated user ID from JWT.
+
+    Returns:
+        dict: Alert broker statistics.
+    """
+    return alert_broker.stats()
+
+
+############################
+# Metrics Endpoints
+############################
+
+# Prometheus scrape endpoint
+@app.get("/metrics", status_code=status.HTTP_200_OK)
+def get_metrics():
+    """
+    Expose ingest stage histograms, frame/face counters and request latencies
+    in the Prometheus text format.
+
+    Returns:
+        Response: Metrics as `text/plain`.
+    """
+    return Response(content=metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+# Ingest profiler state
+@app.get("/api/profiler", status_code=status.HTTP_200_OK)
+def get_profiler(user_id: str = Depends(get_current_user)):
+    """
+    Report whether ingest jobs are being profiled and list the written profiles.
+
+    Args:
+        user_id (str): Authenticated user ID from JWT.
+
+    Returns:
+        dict: Profiler settings and profile names, newest first.
+    """
+    return {
+        "enabled": ingest_profiler.enabled,
+        "interval_ms": ingest_profiler.interval * 1000,
+        "profiles": ingest_profiler.profiles()
+    }
+
+# Switch the ingest profiler on or off
+@app.post("/api/profiler", status_code=status.HTTP_200_OK)
+def update_profiler(settings: ProfilerSettings, user_id: str = Depends(get_current_user)):
+    """
+    Switch the sampling profiler around `extract_frames` on or off without a restart.
+    Ingest jobs started while it is on write a collapsed-stack profile when they finish.
+
+    Args:
+        settings (ProfilerSettings): Whether to profile and the sampling interval.
+        user_id (str): Authenticated user ID from JWT.
+
+    Returns:
+        dict: Updated profiler settings.
+    """
+    ingest_profiler.enabled = settings.enabled
+    if settings.interval_ms:
+        ingest_profiler.interval = settings.interval_ms / 1000
+    logger.info(f"Ingest profiler {'enabled' if settings.enabled else 'disabled'} by user {user_id}")
+    return get_profiler(user_id)
+
+# Download an ingest profile
+@app.get("/api/profiler/{name}", status_code=status.HTTP_200_OK)
+def download_profile(name: str, user_id: str = Depends(get_current_user)):
+    """
+    Download a collapsed-stack profile, e.g. for `flamegraph.pl` or speedscope.
+
+    Args:
+        name (str): Profile name from `GET /api/profiler`.
+        user_id (str): Authenticated user ID from JWT.
+
+    Raises:
+        HTTPException: If the profile does not exist (404).
+
+    Returns:
+        FileResponse: The profile as plain text.
+    """
+    if name not in ingest_profiler.profiles():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found."
+        )
+    return FileResponse(os.path.join(ingest_profiler.profile_dir, name), media_type="text/plain", filename=name)
+
+
+
+############################
+# Health Endpoints
+############################
+
+# Outcome of the optional background preload of the vector store and detection model
+preload_state = {"running": False, "seconds": None, "error": None}
+
+
+def preload_models():
+    """Open the vector store and load the shared detection model ahead of the first request."""
+    preload_state["running"] = True
+    start = time.perf_counter()
+    try:
+        vector_storage.get_client()
+        model_loader.get()
+        preload_state["seconds"] = time.perf_counter() - start
+        logger.info(f"Preloaded vector store and detection model in {preload_state['seconds']:.2f}s")
+    except Exception as err:
+        preload_state["error"] = str(err)
+        logger.exception(f"Preloading failed: {str(err)}")
+    finally:
+        preload_state["running"] = False
+
+@app.on_event("startup")
+def start_preload():
+    """Start preloading on a background thread, so the server accepts requests immediately."""
+    if config.PRELOAD_MODELS:
+        threading.Thread(target=preload_models, name="preload", daemon=True).start()
+
+# Liveness probe
+@app.get("/api/health", status_code=status.HTTP_200_OK)
+def health():
+    """
+    Report that the process is up. Does not touch the database, vector store or models.
+
+    Returns:
+        dict: {"status": "ok"}.
+    """
+    return {"status": "ok"}
+
+# Readiness probe
+@app.get("/api/ready", status_code=status.HTTP_200_OK)
+def ready(db: Session = Depends(get_db)):
+    """
+    Report whether the service can take traffic.
+
+    The database must be reachable. When preloading is enabled (`PRELOAD_MODELS=1`), the
+    vector store and detection model must also be loaded; otherwise they load on first use
+    and only their state is reported.
+
+    Args:
+        db (Session): SQLAlchemy database session.
+
+    Returns:
+        dict: Component states; sent with status 503 while the service is not ready.
+    """
+    try:
+        db.execute(text("SELECT 1"))
+        database_ok = True
+    except SQLAlchemyError as err:
+        logger.error(f"Readiness check could not reach the database: {str(err)}")
+        database_ok = False
+
+    components = {
+        "database": database_ok,
+        "vector_store": vector_storage.is_open(),
+        "model": model_loader.loaded
+    }
+    is_ready = database_ok
+    if config.PRELOAD_MODELS:
+        is_ready = is_ready and components["vector_store"] and components["model"]
+    body = {
+        "ready": is_ready,
+        "components": components,
+        "preload": {"enabled": config.PRELOAD_MODELS, **preload_state},
+        "model_load_seconds": model_loader.load_seconds
+    }
+    return JSONResponse(body, status_code=status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE)